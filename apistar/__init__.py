@@ -6,9 +6,8 @@
    \/     /_/   \_\_|  |___| |____/ \__\__,_|_|        \/
 """
 
-from apistar.cli import cli
-from apistar.client import Client
-from apistar.core import docs, validate
+import importlib
+
 from apistar.document import Document, Field, Link, Section
 
 __version__ = "0.7.2"
@@ -22,3 +21,26 @@ __all__ = [
     "docs",
     "validate",
 ]
+
+# The command line tool, client and schema loading pull in click, requests,
+# jinja2 and the meta-schemas, so they are only imported on first access.
+_LAZY_ATTRIBUTES = {
+    "Client": "apistar.client",
+    "cli": "apistar.cli",
+    "docs": "apistar.core",
+    "validate": "apistar.core",
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
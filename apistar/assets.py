@@ -0,0 +1,176 @@
+"""
+Optimized build output, for `apistar docs --optimize`.
+
+Static files are written with a content hash in their filename, such as
+`css/base.3f9a0c1d2e4b.css`, so that they can be served with far-future
+cache headers. References between static files, such as `url(...)` in
+stylesheets and source map comments, are rewritten to the hashed names. The
+documentation pages are minified, and text files are given precompressed
+`.gz` siblings, along with `.br` siblings if the `brotli` package is
+installed.
+"""
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+
+from apistar import compat
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".eot",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".ttf",
+    ".txt",
+    ".yaml",
+    ".yml",
+}
+# Extensions of files that may refer to other static files.
+REFERRING_EXTENSIONS = {".css", ".js"}
+COMPRESSED_EXTENSIONS = [".br", ".gz"]
+
+CSS_URL = re.compile(rb"""url\(\s*(['"]?)([^'"()\s]+)\1\s*\)""")
+SOURCE_MAP_URL = re.compile(rb"(sourceMappingURL=)([^\s*]+)")
+PRESERVED_HTML = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_name(path, content):
+    """
+    Return `path` with a hash of `content` inserted before the extension.
+    """
+    root, ext = posixpath.splitext(path)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return "%s.%s%s" % (root, digest, ext)
+
+
+def rewrite_references(path, content, manifest):
+    """
+    Rewrite any relative references to static files in a stylesheet or
+    script, using the `manifest` of original to fingerprinted paths.
+    """
+    directory = posixpath.dirname(path)
+
+    def rewrite(reference):
+        text = reference.decode("utf-8", "surrogateescape")
+        if ":" in text or text.startswith(("/", "#")):
+            return reference
+        target, suffix = re.match(r"([^?#]*)(.*)", text).groups()
+        resolved = posixpath.normpath(posixpath.join(directory, target))
+        if resolved not in manifest:
+            return reference
+        relative = posixpath.relpath(manifest[resolved], directory or ".")
+        return (relative + suffix).encode("utf-8", "surrogateescape")
+
+    def replace_url(match):
+        quote, reference = match.groups()
+        return b"url(" + quote + rewrite(reference) + quote + b")"
+
+    def replace_source_map(match):
+        prefix, reference = match.groups()
+        return prefix + rewrite(reference)
+
+    content = CSS_URL.sub(replace_url, content)
+    return SOURCE_MAP_URL.sub(replace_source_map, content)
+
+
+def minify_html(html):
+    """
+    Remove comments and collapse whitespace in an HTML page. The contents of
+    `<pre>`, `<textarea>`, `<script>` and `<style>` elements are left as-is.
+    """
+    output = []
+    parts = PRESERVED_HTML.split(html)
+    # `split` returns the text, then each preserved element and tag name.
+    for index in range(0, len(parts), 3):
+        text = HTML_COMMENT.sub("", parts[index])
+        output.append(WHITESPACE.sub(" ", text))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return "".join(output).strip()
+
+
+def compress(content):
+    """
+    Return a list of `(extension, compressed_content)` variants.
+    """
+    # A fixed mtime keeps the output identical between builds.
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    brotli = compat.brotli
+    if brotli is not None:
+        variants.insert(0, (".br", brotli.compress(content)))
+    return variants
+
+
+def write_compressed(path, content, force=False):
+    """
+    Write precompressed siblings for a file, if it is a text file and
+    compression makes it smaller. Existing siblings are only replaced if
+    `force` is set, since fingerprinted files never change.
+    """
+    if posixpath.splitext(path)[1] not in COMPRESSIBLE_EXTENSIONS:
+        return
+    for extension, compressed in compress(content):
+        compressed_path = path + extension
+        if not force and os.path.exists(compressed_path):
+            continue
+        if len(compressed) < len(content):
+            with open(compressed_path, "wb") as output_file:
+                output_file.write(compressed)
+        elif os.path.exists(compressed_path):
+            os.unlink(compressed_path)
+
+
+def remove_compressed(path):
+    """
+    Remove any precompressed siblings of a file, which would otherwise be
+    served in place of the file's new content.
+    """
+    for extension in COMPRESSED_EXTENSIONS:
+        if os.path.exists(path + extension):
+            os.unlink(path + extension)
+
+
+def build_static(static_dir, output_dir):
+    """
+    Write fingerprinted and precompressed copies of the files in
+    `static_dir` to `output_dir`. Returns a tuple of the manifest, mapping
+    original paths to fingerprinted paths, and the list of files written.
+    """
+    paths = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(files):
+            relative = os.path.relpath(os.path.join(root, name), static_dir)
+            paths.append(relative.replace(os.sep, "/"))
+
+    # Files that refer to other files are hashed after the files they refer
+    # to, so that their hashes change whenever a referenced file changes.
+    paths.sort(key=lambda path: posixpath.splitext(path)[1] in REFERRING_EXTENSIONS)
+
+    manifest = {}
+    written = []
+    for path in paths:
+        with open(os.path.join(static_dir, *path.split("/")), "rb") as input_file:
+            content = input_file.read()
+        if posixpath.splitext(path)[1] in REFERRING_EXTENSIONS:
+            content = rewrite_references(path, content, manifest)
+        manifest[path] = fingerprint_name(path, content)
+
+        output_path = os.path.join(output_dir, *manifest[path].split("/"))
+        if not os.path.exists(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "wb") as output_file:
+                output_file.write(content)
+            written.append(output_path)
+        write_compressed(output_path, content)
+
+    return manifest, written
@@ -0,0 +1,181 @@
+"""
+A load generator for making repeated requests against an API operation.
+
+Requests are made from `concurrency` worker threads sharing a single client,
+either as fast as possible (closed-loop), or at a fixed target `rate` of
+requests per second (open-loop). In open-loop mode latencies are measured
+from the time each request was scheduled, so that a slow server is not able
+to hide queueing delays by slowing the load generator down.
+"""
+import collections
+import math
+import re
+import threading
+import time
+
+import requests
+
+from apistar import exceptions
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_duration(value):
+    """
+    Parse a duration such as "30s", "2m", "500ms" or "1.5", returning seconds.
+    """
+    match = re.match(r"^\s*([0-9]*\.?[0-9]+)\s*(ms|s|m|h)?\s*$", str(value))
+    if match is None:
+        raise ValueError("Invalid duration %r." % value)
+    number, unit = match.groups()
+    return float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[unit]
+
+
+def percentile(sorted_values, percent):
+    """
+    Return the nearest-rank percentile of a sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(math.ceil(percent / 100.0 * len(sorted_values))), 1)
+    return sorted_values[rank - 1]
+
+
+class BenchmarkResult:
+    def __init__(self, operation_id, concurrency, rate, duration, latencies, errors):
+        self.operation_id = operation_id
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.latencies = sorted(latencies)
+        self.errors = errors
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    @property
+    def throughput(self):
+        return self.requests / self.duration if self.duration else 0.0
+
+    def as_dict(self):
+        latencies = self.latencies
+        return {
+            "operation": self.operation_id,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "duration": self.duration,
+            "requests": self.requests,
+            "errors": self.error_count,
+            "error_types": dict(self.errors),
+            "throughput": self.throughput,
+            "latency": {
+                "min": latencies[0] if latencies else None,
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "max": latencies[-1] if latencies else None,
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "p999": percentile(latencies, 99.9),
+            },
+        }
+
+
+def run_benchmark(
+    client, operation_id, params=None, concurrency=1, duration=10.0, rate=None
+):
+    """
+    Make requests to an operation for `duration` seconds, returning a
+    `BenchmarkResult`.
+
+    Each worker makes a single untimed request before the benchmark starts,
+    so that the connection pool is warm. Any unexpected exception raised by a
+    worker stops the benchmark, and is re-raised once all workers finish.
+    """
+    params = {} if params is None else params
+    errors = collections.Counter()
+    latencies = []
+    lock = threading.Lock()
+    warm = threading.Barrier(concurrency + 1)
+    go = threading.Event()
+    schedule = {"next": 0}
+    state = {}
+    failures = []
+
+    def make_request():
+        try:
+            client.request(operation_id, **params)
+        except exceptions.ErrorResponse as exc:
+            return str(exc.status_code)
+        except exceptions.ClientError:
+            return "client_error"
+        except requests.RequestException as exc:
+            return exc.__class__.__name__
+        return None
+
+    def worker():
+        try:
+            run_worker()
+        except threading.BrokenBarrierError:
+            pass
+        except Exception as exc:
+            failures.append(exc)
+            # Release the other workers and the main thread from the barrier.
+            warm.abort()
+
+    def run_worker():
+        make_request()
+        warm.wait()
+        go.wait()
+        start, end = state["start"], state["end"]
+        worker_latencies = []
+        worker_errors = collections.Counter()
+
+        while True:
+            if rate is None:
+                scheduled = time.perf_counter()
+                if scheduled >= end:
+                    break
+            else:
+                with lock:
+                    index = schedule["next"]
+                    schedule["next"] += 1
+                scheduled = start + index / rate
+                if scheduled >= end:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            error = make_request()
+            worker_latencies.append(time.perf_counter() - scheduled)
+            if error is not None:
+                worker_errors[error] += 1
+
+        with lock:
+            latencies.extend(worker_latencies)
+            errors.update(worker_errors)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        warm.wait()
+    except threading.BrokenBarrierError:
+        pass
+    else:
+        state["start"] = time.perf_counter()
+        state["end"] = state["start"] + duration
+        go.set()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise failures[0]
+    elapsed = time.perf_counter() - state["start"]
+
+    return BenchmarkResult(operation_id, concurrency, rate, elapsed, latencies, errors)
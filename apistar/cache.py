@@ -0,0 +1,231 @@
+"""
+A persistent on-disk cache of loaded schema documents, used by the CLI.
+
+Entries are keyed by the absolute schema path, format and encoding, and
+store the file's modification time, size and content hash alongside the
+pickled `Document`. If the modification time and size are unchanged the
+document is loaded without reading the schema file. Otherwise the content
+hash is checked, so that touching a file or checking it out again does not
+cause the schema to be validated again. Entries for schemas that refer to
+other files record the same details for each of those files.
+
+Syntax highlighted code samples are also cached, keyed by their text,
+language and style, since highlighting is a large part of the time taken to
+render the documentation.
+
+The cache directory may be set with the `APISTAR_CACHE_DIR` environment
+variable. Setting `APISTAR_NO_CACHE=1` disables the cache.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+CACHE_VERSION = 2
+
+
+def get_cache_dir():
+    """
+    Return the directory used for apistar's on-disk caches.
+    """
+    cache_dir = os.environ.get("APISTAR_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "apistar")
+
+
+def cache_enabled():
+    return os.environ.get("APISTAR_NO_CACHE", "") in ("", "0")
+
+
+def _entry_path(path, format, encoding):
+    from apistar import __version__
+
+    parts = [CACHE_VERSION, __version__, os.path.abspath(path), format, encoding]
+    key = "\0".join([str(part) for part in parts])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_dir(), "schemas", digest + ".pickle")
+
+
+def _read_entry(entry_path):
+    try:
+        with open(entry_path, "rb") as entry_file:
+            return pickle.load(entry_file)
+    except Exception:
+        # A missing, truncated or incompatible cache entry is just a miss.
+        return None
+
+
+def _write_file(entry_path, content):
+    directory = os.path.dirname(entry_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, entry_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        # Failing to write the cache should never prevent a command running.
+        pass
+
+
+def _write_entry(entry_path, entry):
+    try:
+        content = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    except pickle.PicklingError:
+        return
+    _write_file(entry_path, content)
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _dependencies_changed(dependencies):
+    """
+    Return `True` if any of the other files that a schema refers to have
+    changed since it was cached.
+    """
+    for dependency in dependencies:
+        try:
+            if _file_state(dependency["path"]) == dependency["state"]:
+                continue
+            with open(dependency["path"], "rb") as dependency_file:
+                digest = hashlib.sha256(dependency_file.read()).hexdigest()
+        except OSError:
+            return True
+        if digest != dependency["hash"]:
+            return True
+    return False
+
+
+def _validate(path, content, format, encoding):
+    """
+    Validate a schema, returning the document and the list of other files
+    that it refers to.
+    """
+    from apistar.core import validate
+    from apistar.resolver import Resolver, needs_bundle
+    from apistar.resolver import validate as validate_bundle
+
+    if not needs_bundle(content):
+        return validate(content, format=format, encoding=encoding), []
+
+    resolver = Resolver()
+    document = validate_bundle(path, format=format, resolver=resolver)
+    dependencies = []
+    for dependency_path in sorted(resolver.files):
+        if dependency_path == os.path.abspath(path):
+            continue
+        with open(dependency_path, "rb") as dependency_file:
+            digest = hashlib.sha256(dependency_file.read()).hexdigest()
+        dependencies.append(
+            {
+                "path": dependency_path,
+                "state": _file_state(dependency_path),
+                "hash": digest,
+            }
+        )
+    return document, dependencies
+
+
+def load_document(path, format=None, encoding=None):
+    """
+    Return the validated document for the schema file at `path`, using the
+    on-disk cache where possible. Schemas that refer to other files are
+    bundled first, and their cache entries are checked against every file.
+
+    Raises `typesystem.ParseError` or `typesystem.ValidationError` if the
+    schema is invalid. Invalid schemas are never cached.
+    """
+    if not cache_enabled():
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        return _validate(path, content, format, encoding)[0]
+
+    stat = os.stat(path)
+    entry_path = _entry_path(path, format, encoding)
+    entry = _read_entry(entry_path)
+    if entry is not None and _dependencies_changed(entry["dependencies"]):
+        entry = None
+    if (
+        entry is not None
+        and entry["mtime"] == stat.st_mtime_ns
+        and entry["size"] == stat.st_size
+    ):
+        return entry["document"]
+
+    with open(path, "rb") as schema_file:
+        content = schema_file.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    if entry is not None and entry["hash"] == digest:
+        document = entry["document"]
+        dependencies = entry["dependencies"]
+    else:
+        document, dependencies = _validate(path, content, format, encoding)
+
+    entry = {
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "hash": digest,
+        "document": document,
+        "dependencies": dependencies,
+    }
+    _write_entry(entry_path, entry)
+    return document
+
+
+@functools.lru_cache(maxsize=4096)
+def highlight(text, lang, style):
+    """
+    Return the syntax highlighted HTML for a code sample, using pygments.
+    Samples are memoized, and stored on disk while the cache is enabled.
+    """
+    from apistar import compat
+
+    entry_path = None
+    if cache_enabled() and compat.pygments is not None:
+        parts = [CACHE_VERSION, compat.pygments.__version__, lang, style, text]
+        key = "\0".join([str(part) for part in parts])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        entry_path = os.path.join(get_cache_dir(), "highlight", digest + ".html")
+        try:
+            with open(entry_path, "rb") as entry_file:
+                return entry_file.read().decode("utf-8")
+        except (OSError, UnicodeDecodeError):
+            pass
+
+    html = compat.pygments_highlight(text, lang, style)
+    if entry_path is not None:
+        _write_file(entry_path, html.encode("utf-8"))
+    return html
+
+
+def clear_cache():
+    """
+    Remove all cached schema documents and highlighted code samples.
+    """
+    highlight.cache_clear()
+    for name in ("schemas", "highlight"):
+        directory = os.path.join(get_cache_dir(), name)
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            try:
+                os.unlink(os.path.join(directory, filename))
+            except OSError:
+                pass
@@ -1,15 +1,16 @@
-import http.server
+import hashlib
 import json
 import os
 import shutil
-import socketserver
 import sys
+import threading
 
 import click
 
 import apistar
-from apistar.client import Client
-from apistar.client.debug import DebugSession
+import apistar.cache
+import apistar.codegen
+from apistar import compat
 from apistar.exceptions import ClientError, ErrorResponse
 
 import typesystem
@@ -54,19 +55,610 @@ def _echo_error(exc, content, summary, verbose=False):
     click.echo(click.style("✘ ", fg="red") + summary)
 
 
-def _copy_tree(src, dst, verbose=False):
-    if not os.path.exists(dst):
-        os.makedirs(dst)
+def _schema_error_summary(exc, format, encoding):
+    if isinstance(exc, typesystem.ParseError):
+        return {
+            "json": "Invalid JSON.",
+            "yaml": "Invalid YAML.",
+            None: "Parse error.",
+        }[encoding]
+    return {
+        "config": "Invalid APIStar config.",
+        "jsonschema": "Invalid JSONSchema document.",
+        "openapi": "Invalid OpenAPI schema.",
+        "swagger": "Invalid Swagger schema.",
+        None: "Invalid schema.",
+    }[format]
+
+
+def _echo_schema_error(exc, content, format, encoding, verbose=False):
+    summary = _schema_error_summary(exc, format, encoding)
+    _echo_error(exc, content, summary=summary, verbose=verbose)
+    sys.exit(1)
+
+
+def _validate_content(path, content, format, encoding):
+    """
+    Validate the content of a schema file, bundling it first if it refers to
+    other files.
+    """
+    from apistar.resolver import needs_bundle, validate
+
+    if format in (None, "openapi", "swagger") and needs_bundle(content):
+        return validate(path, format=format)
+    return apistar.validate(content, format=format, encoding=encoding)
+
+
+SCHEMA_EXTENSIONS = (".json", ".yaml", ".yml")
+# A top level "openapi" or "swagger" key, in either YAML or JSON.
+SCHEMA_KEY = rb"""(?m)^["']?(?:openapi|swagger)["']?\s*:|"(?:openapi|swagger)"\s*:"""
+
+
+def _is_schema_file(path):
+    """
+    Return `True` if a file found in a directory looks like a schema, rather
+    than a config file or a part of a multi-file schema.
+    """
+    import re
+
+    if os.path.basename(path) == "apistar.yml":
+        return False
+    try:
+        with open(path, "rb") as input_file:
+            content = input_file.read()
+    except OSError:
+        # Reported as unreadable when validated.
+        return True
+    return re.search(SCHEMA_KEY, content) is not None
+
+
+def _find_schema_files(paths):
+    """
+    Expand a list of files, directories and glob patterns into a sorted list
+    of schema files. Directories are searched recursively for JSON and YAML
+    files. Files found by searching a directory or matching a pattern are
+    skipped if they do not have a top level "openapi" or "swagger" key.
+    """
+    import glob
+
+    found = set()
+    for path in paths:
+        if glob.has_magic(path):
+            matches = glob.glob(path, recursive=True)
+            if not matches:
+                raise click.UsageError('No files match "%s".' % path)
+        elif os.path.exists(path):
+            matches = [path]
+        else:
+            raise click.UsageError('Schema file "%s" not found.' % path)
+
+        for match in matches:
+            if not os.path.isdir(match):
+                if match == path or _is_schema_file(match):
+                    found.add(os.path.normpath(match))
+                continue
+            for root, dirs, files in os.walk(match):
+                for name in files:
+                    filename = os.path.normpath(os.path.join(root, name))
+                    if name.endswith(SCHEMA_EXTENSIONS) and _is_schema_file(
+                        filename
+                    ):
+                        found.add(filename)
+    return sorted(found)
+
+
+def _validate_file(path, format, encoding):
+    """
+    Validate a single schema file, returning a dict describing the result.
+    Runs in a worker process, when validating several files.
+    """
+    import time
 
-    for name in os.listdir(src):
-        srcname = os.path.join(src, name)
-        dstname = os.path.join(dst, name)
-        if os.path.isdir(srcname):
-            _copy_tree(srcname, dstname, verbose=verbose)
+    if encoding is None:
+        # Falls back to inferring the encoding from the content.
+        encoding = _encoding_from_filename(path)
+
+    start = time.perf_counter()
+    result = {"path": path, "valid": True, "summary": None, "errors": []}
+    try:
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        _validate_content(path, content, format, encoding)
+    except (typesystem.ParseError, typesystem.ValidationError) as exc:
+        result["valid"] = False
+        result["summary"] = _schema_error_summary(exc, format, encoding)
+        for message in exc.messages():
+            position = message.start_position
+            result["errors"].append(
+                {
+                    "text": message.text,
+                    "code": message.code,
+                    "index": list(message.index),
+                    "line": position.line_no if position else None,
+                    "column": position.column_no if position else None,
+                }
+            )
+    except Exception as exc:
+        # Any other failure is reported against the file, rather than
+        # stopping the rest of the batch.
+        result["valid"] = False
+        if isinstance(exc, OSError):
+            result["summary"] = "Could not read file."
         else:
-            if verbose:
+            result["summary"] = "Could not validate file."
+        result["errors"].append(
+            {
+                "text": "%s: %s" % (exc.__class__.__name__, exc),
+                "code": "error",
+                "index": [],
+                "line": None,
+                "column": None,
+            }
+        )
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def _validate_files(paths, format, encoding, jobs):
+    """
+    Validate schema files using a pool of `jobs` processes, yielding results
+    in the same order as `paths`.
+    """
+    if jobs == 1 or len(paths) == 1:
+        for path in paths:
+            yield _validate_file(path, format, encoding)
+        return
+
+    import concurrent.futures
+    import functools
+
+    validate_file = functools.partial(_validate_file, format=format, encoding=encoding)
+    chunksize = max(len(paths) // (jobs * 4), 1)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(validate_file, paths, chunksize=chunksize)
+
+
+def _junit_report(results, elapsed):
+    """
+    Return a JUnit XML report of validation results, with a test case for
+    each schema file.
+    """
+    from xml.etree import ElementTree
+
+    failures = len([result for result in results if not result["valid"]])
+    suite = ElementTree.Element(
+        "testsuite",
+        name="apistar validate",
+        tests=str(len(results)),
+        failures=str(failures),
+        errors="0",
+        time="%.3f" % elapsed,
+    )
+    for result in results:
+        case = ElementTree.SubElement(
+            suite,
+            "testcase",
+            classname="apistar.validate",
+            name=result["path"],
+            time="%.3f" % result["time"],
+        )
+        if not result["valid"]:
+            failure = ElementTree.SubElement(
+                case, "failure", message=result["summary"], type="invalid_schema"
+            )
+            failure.text = "\n".join(
+                [_format_error_message(error) for error in result["errors"]]
+            )
+    return ElementTree.tostring(suite, encoding="unicode")
+
+
+def _format_error_message(error):
+    if error["line"] is None:
+        return "* %s" % error["text"]
+    index = error["index"][:-1] if error["code"] == "required" else error["index"]
+    if index:
+        fmt = "* %s (At %s, line %d, column %d.)"
+        return fmt % (error["text"], index, error["line"], error["column"])
+    fmt = "* %s (At line %d, column %d.)"
+    return fmt % (error["text"], error["line"], error["column"])
+
+
+def _validate_many(paths, format, encoding, jobs, report, output, verbose=False):
+    """
+    Validate any number of schema files, for `apistar validate PATHS...`.
+    """
+    import time
+
+    start = time.perf_counter()
+    paths = _find_schema_files(paths)
+    if not paths:
+        raise click.UsageError("No schema files found.")
+    if jobs is None:
+        jobs = min(os.cpu_count() or 1, len(paths))
+
+    results = []
+    for result in _validate_files(paths, format, encoding, jobs):
+        results.append(result)
+        if report == "text":
+            if result["valid"]:
+                if verbose:
+                    click.echo(click.style("✓ ", fg="green") + result["path"])
+            else:
+                msg = "%s: %s" % (result["path"], result["summary"])
+                click.echo(click.style("✘ ", fg="red") + msg)
+                for error in result["errors"]:
+                    click.echo("  " + _format_error_message(error))
+    elapsed = time.perf_counter() - start
+    invalid = len([result for result in results if not result["valid"]])
+
+    if report == "json":
+        data = {"files": len(results), "invalid": invalid, "results": results}
+        text = json.dumps(data, indent=4)
+    elif report == "junit":
+        text = _junit_report(results, elapsed)
+    else:
+        text = None
+
+    if text is not None:
+        if output is None:
+            click.echo(text)
+        else:
+            with open(output, "w") as output_file:
+                output_file.write(text + "\n")
+
+    if report == "text" or output is not None:
+        if invalid:
+            msg = "%d of %d schema files invalid." % (invalid, len(results))
+            click.echo(click.style("✘ ", fg="red") + msg)
+        else:
+            msg = "All %d schema files valid." % len(results)
+            click.echo(click.style("✓ ", fg="green") + msg)
+    if invalid:
+        sys.exit(1)
+
+
+def _load_document(path, format, encoding, verbose=False):
+    try:
+        return apistar.cache.load_document(path, format=format, encoding=encoding)
+    except (typesystem.ParseError, typesystem.ValidationError) as exc:
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        _echo_schema_error(exc, content, format, encoding, verbose=verbose)
+
+
+# From <linux/fs.h>, for copy-on-write clones on btrfs, XFS and similar.
+FICLONE = 0x40049409
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for chunk in iter(lambda: input_file.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _is_up_to_date(srcname, dstname, link=None):
+    """
+    Return `True` if the file at `dstname` already matches `srcname`. A
+    hardlink to the source is only up to date when copying with hardlinks.
+    """
+    try:
+        dst_stat = os.stat(dstname)
+    except OSError:
+        return False
+    src_stat = os.stat(srcname)
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        # Otherwise editing the output would also edit the source.
+        return link == "hardlink"
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if _file_digest(srcname) != _file_digest(dstname):
+        return False
+    # The content matches, so update the mtime to skip hashing next time.
+    os.utime(dstname, ns=(dst_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def _reflink(srcname, dstname):
+    import fcntl
+
+    with open(srcname, "rb") as src_file, open(dstname, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(srcname, dstname)
+
+
+def _copy_file(srcname, dstname, link=None):
+    # Always replace the destination rather than writing into it, since it
+    # may be hardlinked to the installed package by a previous build.
+    if os.path.lexists(dstname):
+        os.unlink(dstname)
+    try:
+        if link == "hardlink":
+            os.link(srcname, dstname)
+            return
+        elif link == "reflink":
+            _reflink(srcname, dstname)
+            return
+    except (OSError, ImportError):
+        # Not supported across devices or by this filesystem, so fall back
+        # to a regular copy.
+        if os.path.lexists(dstname):
+            os.unlink(dstname)
+    shutil.copy2(srcname, dstname)
+
+
+def _copy_tree(src, dst, verbose=False, link=None, jobs=1):
+    """
+    Copy a directory tree, skipping any files that are already up to date.
+    Files may optionally be hardlinked or reflinked rather than copied, and
+    copied using several threads.
+    """
+    pairs = []
+    for dirpath, dirnames, filenames in os.walk(src):
+        dstpath = os.path.normpath(os.path.join(dst, os.path.relpath(dirpath, src)))
+        if not os.path.exists(dstpath):
+            os.makedirs(dstpath)
+        for name in sorted(filenames):
+            pairs.append((os.path.join(dirpath, name), os.path.join(dstpath, name)))
+
+    def copy(pair):
+        srcname, dstname = pair
+        if _is_up_to_date(srcname, dstname, link=link):
+            return None
+        _copy_file(srcname, dstname, link=link)
+        return dstname
+
+    if jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            copied = list(executor.map(copy, pairs))
+    else:
+        copied = [copy(pair) for pair in pairs]
+
+    if verbose:
+        for dstname in copied:
+            if dstname is not None:
                 click.echo(dstname)
-            shutil.copy2(srcname, dstname)
+
+
+def _copy_theme_static(theme, output_dir, verbose=False, link=None, jobs=1):
+    package_dir = os.path.dirname(apistar.__file__)
+    static_dir = os.path.join(package_dir, "themes", theme, "static")
+    _copy_tree(static_dir, output_dir, verbose=verbose, link=link, jobs=jobs)
+
+
+def _build_theme_static(theme, output_dir, verbose=False):
+    """
+    Write fingerprinted copies of the theme's static files to the docs,
+    returning the manifest of original to fingerprinted paths.
+    """
+    from apistar.assets import build_static
+
+    package_dir = os.path.dirname(apistar.__file__)
+    static_dir = os.path.join(package_dir, "themes", theme, "static")
+    manifest, written = build_static(static_dir, output_dir)
+    if verbose:
+        for output_path in written:
+            click.echo(output_path)
+    return manifest
+
+
+def _write_docs_index(
+    document,
+    path,
+    output_dir,
+    theme,
+    live_reload,
+    verbose,
+    split=False,
+    static_url=None,
+    optimize=False,
+    jobs=1,
+    code_style=None,
+):
+    """
+    Write 'index.html' and the schema file to the docs, returning the path
+    to 'index.html'. With `split`, each section is written to its own page,
+    and any pages left over from sections that no longer exist are removed.
+    With `optimize`, pages are minified and precompressed.
+    """
+    from apistar.assets import (
+        COMPRESSED_EXTENSIONS,
+        minify_html,
+        remove_compressed,
+        write_compressed,
+    )
+    from apistar.core import docs_pages, split_url_for
+    from apistar.resolver import bundle, dumps, needs_bundle
+
+    schema_filename = os.path.basename(path)
+    schema_url = "/" + schema_filename
+    # Only the "apistar" theme uses the prebuilt search index.
+    search_url = "/search-index.json" if theme == "apistar" else None
+    if split:
+        pages = docs_pages(
+            document,
+            schema_url=schema_url,
+            theme=theme,
+            static_url=static_url,
+            jobs=jobs,
+            code_style=code_style,
+            search_url=search_url,
+        )
+    else:
+        index_html = apistar.docs(
+            document,
+            schema_url=schema_url,
+            theme=theme,
+            static_url=static_url,
+            jobs=jobs,
+            code_style=code_style,
+            search_url=search_url,
+        )
+        pages = {"index.html": index_html}
+
+    for filename, html in pages.items():
+        if live_reload:
+            from apistar.watch import inject_live_reload
+
+            html = inject_live_reload(html)
+        if optimize:
+            html = minify_html(html)
+        output_path = os.path.join(output_dir, filename)
+        if verbose:
+            click.echo(output_path)
+        with open(output_path, "w") as output_file:
+            output_file.write(html)
+        if optimize:
+            write_compressed(output_path, html.encode("utf-8"), force=True)
+        else:
+            remove_compressed(output_path)
+
+    for filename in os.listdir(output_dir):
+        page, extension = os.path.splitext(filename)
+        if extension not in COMPRESSED_EXTENSIONS:
+            page = filename
+        if (
+            page.startswith("section-")
+            and page.endswith(".html")
+            and page not in pages
+        ):
+            os.unlink(os.path.join(output_dir, filename))
+
+    if search_url is not None:
+        from apistar.search import build_index
+        from apistar.search import dumps as dumps_index
+
+        url_for = split_url_for(document) if split else None
+        index = build_index(document, url_for=url_for)
+        content = dumps_index(index).encode("utf-8")
+        search_path = os.path.join(output_dir, search_url.lstrip("/"))
+        if verbose:
+            click.echo(search_path)
+        with open(search_path, "wb") as search_file:
+            search_file.write(content)
+        if optimize:
+            write_compressed(search_path, content, force=True)
+        else:
+            remove_compressed(search_path)
+
+    schema_path = os.path.join(output_dir, schema_filename)
+    if verbose:
+        click.echo(schema_path)
+    with open(path, "rb") as schema_file:
+        content = schema_file.read()
+    if needs_bundle(content):
+        # The docs include a single file copy of a multi-file schema.
+        encoding = _encoding_from_filename(path) or "json"
+        content = dumps(bundle(path), encoding=encoding).encode("utf-8")
+        with open(schema_path, "wb") as schema_file:
+            schema_file.write(content)
+    else:
+        shutil.copy2(path, schema_path)
+    if optimize:
+        with open(schema_path, "rb") as schema_file:
+            write_compressed(schema_path, schema_file.read(), force=True)
+    else:
+        remove_compressed(schema_path)
+    return os.path.join(output_dir, "index.html")
+
+
+def _watch_docs(
+    options, output_dir, verbose=False, split=False, jobs=1, code_style=None
+):
+    """
+    Serve the docs, rebuilding 'index.html' and notifying any open browsers
+    whenever the schema or config file content changes.
+    """
+    from apistar.server import StaticFiles, make_server
+    from apistar.watch import LiveReload, get_watcher
+
+    config = _load_config(options, verbose=verbose)
+    path = config["schema"]["path"]
+    last_theme = config["docs"]["theme"] or "apistar"
+    watch_paths = [path]
+    if os.path.exists("apistar.yml"):
+        watch_paths.append("apistar.yml")
+    last_digest = _files_digest(watch_paths)
+
+    live_reload = LiveReload()
+    app = StaticFiles(output_dir, live_reload=live_reload)
+    server = make_server(app, port=8000, verbose=verbose)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    msg = 'Documentation available at "http://127.0.0.1:8000/" (Ctrl+C to quit)'
+    click.echo(click.style("✓ ", fg="green") + msg)
+    click.echo('Watching "%s" for changes.' % '", "'.join(watch_paths))
+
+    watcher = get_watcher(watch_paths)
+    try:
+        while True:
+            watcher.wait()
+            digest = _files_digest(watch_paths)
+            if digest == last_digest:
+                continue
+            last_digest = digest
+
+            # Errors are reported, and we carry on watching for a fix.
+            try:
+                config = _load_config(options, verbose=verbose)
+            except click.UsageError as exc:
+                click.echo(click.style("✘ ", fg="red") + exc.format_message())
+                continue
+            path = config["schema"]["path"]
+            format = config["schema"]["format"]
+            encoding = config["schema"]["encoding"]
+            try:
+                document = apistar.cache.load_document(
+                    path, format=format, encoding=encoding
+                )
+            except (typesystem.ParseError, typesystem.ValidationError) as exc:
+                with open(path, "rb") as schema_file:
+                    content = schema_file.read()
+                summary = _schema_error_summary(exc, format, encoding)
+                _echo_error(exc, content, summary=summary, verbose=verbose)
+                continue
+
+            # Only the page itself is rebuilt, unless the theme has changed.
+            theme = config["docs"]["theme"] or "apistar"
+            if theme != last_theme:
+                _copy_theme_static(theme, output_dir, verbose=verbose, jobs=jobs)
+                last_theme = theme
+            _write_docs_index(
+                document,
+                path,
+                output_dir,
+                theme,
+                live_reload=True,
+                verbose=verbose,
+                split=split,
+                jobs=jobs,
+                code_style=code_style,
+            )
+            live_reload.notify()
+            click.echo(click.style("✓ ", fg="green") + "Documentation rebuilt.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        server.shutdown()
+        server.server_close()
+
+
+def _files_digest(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, "rb") as input_file:
+                digest.update(input_file.read())
+        except OSError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
 
 
 def _load_config(options, verbose=False):
@@ -110,6 +702,8 @@ FORMAT_SCHEMA_CHOICES = click.Choice(["openapi", "swagger"])
 FORMAT_ALL_CHOICES = click.Choice(["config", "jsonschema", "openapi", "swagger"])
 ENCODING_CHOICES = click.Choice(["json", "yaml"])
 THEME_CHOICES = click.Choice(["apistar", "redoc", "swaggerui"])
+LINK_CHOICES = click.Choice(["hardlink", "reflink"])
+REPORT_CHOICES = click.Choice(["text", "json", "junit"])
 
 
 @click.group()
@@ -118,11 +712,33 @@ def cli():
 
 
 @click.command()
+@click.argument("paths", nargs=-1)
 @click.option("--path", type=click.Path(exists=True, dir_okay=False))
 @click.option("--format", type=FORMAT_ALL_CHOICES)
 @click.option("--encoding", type=ENCODING_CHOICES)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    help="Number of processes used to validate multiple files. "
+    "Defaults to the number of CPUs.",
+)
+@click.option(
+    "--report",
+    type=REPORT_CHOICES,
+    default="text",
+    help="Output format, when validating multiple files.",
+)
+@click.option("--output", type=click.Path(dir_okay=False))
 @click.option("--verbose", "-v", is_flag=True, default=False)
-def validate(path, format, encoding, verbose):
+def validate(paths, path, format, encoding, jobs, report, output, verbose):
+    if paths:
+        # Any number of files, directories or glob patterns.
+        if path is not None:
+            paths = (path,) + paths
+        _validate_many(paths, format, encoding, jobs, report, output, verbose)
+        return
+
     options = {"schema": {"path": path, "format": format, "encoding": encoding}}
     config = _load_config(options, verbose=verbose)
 
@@ -134,24 +750,9 @@ def validate(path, format, encoding, verbose):
         content = schema_file.read()
 
     try:
-        apistar.validate(content, format=format, encoding=encoding)
+        _validate_content(path, content, format, encoding)
     except (typesystem.ParseError, typesystem.ValidationError) as exc:
-        if isinstance(exc, typesystem.ParseError):
-            summary = {
-                "json": "Invalid JSON.",
-                "yaml": "Invalid YAML.",
-                None: "Parse error.",
-            }[encoding]
-        else:
-            summary = {
-                "config": "Invalid APIStar config.",
-                "jsonschema": "Invalid JSONSchema document.",
-                "openapi": "Invalid OpenAPI schema.",
-                "swagger": "Invalid Swagger schema.",
-                None: "Invalid schema.",
-            }[format]
-        _echo_error(exc, content, summary=summary, verbose=verbose)
-        sys.exit(1)
+        _echo_schema_error(exc, content, format, encoding, verbose=verbose)
 
     success_summary = {
         "json": "Valid JSON",
@@ -170,9 +771,58 @@ def validate(path, format, encoding, verbose):
 @click.option("--encoding", type=ENCODING_CHOICES)
 @click.option("--output-dir", type=click.Path())
 @click.option("--theme", type=THEME_CHOICES)
+@click.option(
+    "--link",
+    type=LINK_CHOICES,
+    help="Hardlink or reflink the theme's static files, instead of copying them.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of threads used to copy static files, and of processes used "
+    "to render the docs.",
+)
+@click.option(
+    "--split-pages",
+    is_flag=True,
+    default=False,
+    help="Write each section of the docs to a separate page.",
+)
+@click.option(
+    "--optimize",
+    is_flag=True,
+    default=False,
+    help="Minify, fingerprint and precompress the docs, for deployment.",
+)
+@click.option(
+    "--code-style",
+    help='Pygments style used to highlight code samples, such as "default".',
+)
 @click.option("--serve", is_flag=True, default=False)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="Serve the docs, and rebuild them whenever the schema changes.",
+)
 @click.option("--verbose", "-v", is_flag=True, default=False)
-def docs(path, format, encoding, output_dir, theme, serve, verbose):
+def docs(
+    path,
+    format,
+    encoding,
+    output_dir,
+    theme,
+    link,
+    jobs,
+    split_pages,
+    optimize,
+    code_style,
+    serve,
+    watch,
+    verbose,
+):
     options = {
         "schema": {"path": path, "format": format, "encoding": encoding},
         "docs": {"output_dir": output_dir, "theme": theme},
@@ -185,70 +835,64 @@ def docs(path, format, encoding, output_dir, theme, serve, verbose):
     output_dir = config["docs"]["output_dir"]
     theme = config["docs"]["theme"]
 
+    if optimize and watch:
+        raise click.UsageError('"--optimize" cannot be used with "--watch".')
     if output_dir is None:
         output_dir = "build"
     if theme is None:
         theme = "apistar"
 
-    schema_filename = os.path.basename(path)
-    schema_url = "/" + schema_filename
-    with open(path, "rb") as schema_file:
-        content = schema_file.read()
-
-    try:
-        index_html = apistar.docs(
-            content, format=format, encoding=encoding, schema_url=schema_url, theme=theme
-        )
-    except (typesystem.ParseError, typesystem.ValidationError) as exc:
-        if isinstance(exc, typesystem.ParseError):
-            summary = {
-                "json": "Invalid JSON.",
-                "yaml": "Invalid YAML.",
-                None: "Parse error.",
-            }[encoding]
-        else:
-            summary = {
-                "config": "Invalid APIStar config.",
-                "jsonschema": "Invalid JSONSchema document.",
-                "openapi": "Invalid OpenAPI schema.",
-                "swagger": "Invalid Swagger schema.",
-                None: "Invalid schema.",
-            }[format]
-        _echo_error(exc, content, summary=summary, verbose=verbose)
-        sys.exit(1)
+    document = _load_document(path, format, encoding, verbose=verbose)
 
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Write 'index.html' to the docs.
-    output_path = os.path.join(output_dir, "index.html")
-    if verbose:
-        click.echo(output_path)
-    output_file = open(output_path, "w")
-    output_file.write(index_html)
-    output_file.close()
+    # Write static files to the docs.
+    static_url = None
+    if optimize:
+        manifest = _build_theme_static(theme, output_dir, verbose=verbose)
 
-    # Write schema file to the docs.
-    schema_path = os.path.join(output_dir, schema_filename)
-    if verbose:
-        click.echo(schema_path)
-    shutil.copy2(path, schema_path)
+        def static_url(path):
+            return "/" + manifest.get(path, path)
 
-    # Write static files to the docs.
-    package_dir = os.path.dirname(apistar.__file__)
-    static_dir = os.path.join(package_dir, "themes", theme, "static")
-    _copy_tree(static_dir, output_dir, verbose=verbose)
+    else:
+        _copy_theme_static(theme, output_dir, verbose=verbose, link=link, jobs=jobs)
+
+    output_path = _write_docs_index(
+        document,
+        path,
+        output_dir,
+        theme,
+        live_reload=watch,
+        verbose=verbose,
+        split=split_pages,
+        static_url=static_url,
+        optimize=optimize,
+        jobs=jobs,
+        code_style=code_style,
+    )
 
     # All done.
-    if serve:
-        os.chdir(output_dir)
-        addr = ("", 8000)
-        handler = http.server.SimpleHTTPRequestHandler
-        socketserver.TCPServer.allow_reuse_address = True
-        with socketserver.TCPServer(addr, handler) as httpd:
+    if watch:
+        _watch_docs(
+            options,
+            output_dir,
+            verbose=verbose,
+            split=split_pages,
+            jobs=jobs,
+            code_style=code_style,
+        )
+    elif serve:
+        from apistar.server import StaticFiles, make_server
+
+        app = StaticFiles(output_dir)
+        with make_server(app, port=8000, verbose=verbose) as server:
             msg = 'Documentation available at "http://127.0.0.1:8000/" (Ctrl+C to quit)'
             click.echo(click.style("✓ ", fg="green") + msg)
-            httpd.serve_forever()
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
     else:
         msg = 'Documentation built at "%s".'
         click.echo(click.style("✓ ", fg="green") + (msg % output_path))
@@ -270,36 +914,20 @@ def request(ctx, operation, params, path, format, encoding, verbose):
     format = config["schema"]["format"]
     encoding = config["schema"]["encoding"]
 
-    with open(path, "rb") as schema_file:
-        schema = schema_file.read()
+    document = _load_document(path, format, encoding, verbose=verbose)
 
     params = [param.partition("=") for param in params]
     params = dict([(key, value) for key, sep, value in params])
 
+    from apistar.client import Client
+    from apistar.client.debug import DebugSession
+
     session = ctx.obj
 
     if verbose:
         session = DebugSession(session)
 
-    try:
-        client = Client(schema, format=format, encoding=encoding, session=session)
-    except (typesystem.ParseError, typesystem.ValidationError) as exc:
-        if isinstance(exc, typesystem.ParseError):
-            summary = {
-                "json": "Invalid JSON.",
-                "yaml": "Invalid YAML.",
-                None: "Parse error.",
-            }[encoding]
-        else:
-            summary = {
-                "config": "Invalid APIStar config.",
-                "jsonschema": "Invalid JSONSchema document.",
-                "openapi": "Invalid OpenAPI schema.",
-                "swagger": "Invalid Swagger schema.",
-                None: "Invalid schema.",
-            }[format]
-        _echo_error(exc, schema, summary=summary, verbose=verbose)
-        sys.exit(1)
+    client = Client.from_document(document, session=session)
 
     try:
         result = client.request(operation, **params)
@@ -321,6 +949,393 @@ def request(ctx, operation, params, path, format, encoding, verbose):
     click.echo(json.dumps(result, indent=4))
 
 
+@click.command()
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option("--output", type=click.Path(dir_okay=False))
+@click.option("--class-name", default="Client")
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def codegen(path, format, encoding, output, class_name, verbose):
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    document = _load_document(path, format, encoding, verbose=verbose)
+    source = apistar.codegen.generate(document, class_name=class_name)
+
+    if output is None:
+        click.echo(source, nl=False)
+    else:
+        with open(output, "w") as output_file:
+            output_file.write(source)
+        msg = 'Client module written to "%s".'
+        click.echo(click.style("✓ ", fg="green") + (msg % output))
+
+
+@click.command()
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option("--output", type=click.Path(dir_okay=False))
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def bundle(path, format, encoding, output, verbose):
+    from apistar.resolver import bundle, dumps
+    from apistar.resolver import validate as validate_bundle
+
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    try:
+        bundled = bundle(path)
+        validate_bundle(path, format=format, bundled=bundled)
+    except (typesystem.ParseError, typesystem.ValidationError) as exc:
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        _echo_schema_error(exc, content, format, encoding, verbose=verbose)
+
+    # The output encoding follows the output filename, or the schema's own.
+    if output is not None:
+        encoding = _encoding_from_filename(output) or encoding
+    text = dumps(bundled, encoding=encoding or "json")
+
+    if output is None:
+        click.echo(text, nl=False)
+    else:
+        with open(output, "w") as output_file:
+            output_file.write(text)
+        msg = 'Bundled schema written to "%s".'
+        click.echo(click.style("✓ ", fg="green") + (msg % output))
+
+
+@click.command()
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option("--output", type=click.Path(dir_okay=False))
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def normalize(path, format, encoding, output, verbose):
+    from apistar.resolver import bundle, dumps
+    from apistar.resolver import validate as validate_bundle
+    from apistar.schemas.normalize import normalize
+
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    try:
+        bundled = bundle(path)
+        validate_bundle(path, format=format, bundled=bundled)
+    except (typesystem.ParseError, typesystem.ValidationError) as exc:
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        _echo_schema_error(exc, content, format, encoding, verbose=verbose)
+
+    normalized, added = normalize(bundled)
+    if output is not None:
+        encoding = _encoding_from_filename(output) or encoding
+    text = dumps(normalized, encoding=encoding or "json")
+
+    if output is None:
+        click.echo(text, nl=False)
+    else:
+        with open(output, "w") as output_file:
+            output_file.write(text)
+        if verbose:
+            for name in added:
+                click.echo("Added schema %r." % name)
+        msg = 'Normalized schema written to "%s".'
+        click.echo(click.style("✓ ", fg="green") + (msg % output))
+
+
+def _load_schema_value(path, format, encoding, verbose=False):
+    """
+    Return the bundled and validated content of a schema file, as a dict.
+    """
+    from apistar.resolver import bundle
+    from apistar.resolver import validate as validate_bundle
+
+    if encoding is None:
+        encoding = _encoding_from_filename(path)
+    try:
+        bundled = bundle(path)
+        validate_bundle(path, format=format, bundled=bundled)
+    except (typesystem.ParseError, typesystem.ValidationError) as exc:
+        click.echo('Errors in schema file "%s":' % path)
+        with open(path, "rb") as schema_file:
+            content = schema_file.read()
+        _echo_schema_error(exc, content, format, encoding, verbose=verbose)
+    return bundled
+
+
+DIFF_SYMBOLS = {"added": "+", "removed": "-", "changed": "~"}
+
+
+@click.command()
+@click.argument("old", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--report", type=click.Choice(["text", "json"]), default="text")
+@click.option(
+    "--fail-on-breaking",
+    is_flag=True,
+    default=False,
+    help="Exit with a non-zero status if there are any breaking changes.",
+)
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def diff(old, new, format, report, fail_on_breaking, verbose):
+    from apistar.diff import diff
+
+    old_value = _load_schema_value(old, format, None, verbose=verbose)
+    new_value = _load_schema_value(new, format, None, verbose=verbose)
+    changes = diff(old_value, new_value)
+    breaking = len([change for change in changes if change.breaking])
+
+    if report == "json":
+        click.echo(json.dumps([change._asdict() for change in changes], indent=4))
+    else:
+        for change in changes:
+            line = "%s %s: %s" % (
+                DIFF_SYMBOLS[change.kind],
+                change.location,
+                change.message,
+            )
+            if change.breaking:
+                line = click.style(line + " (breaking)", fg="red")
+            click.echo(line)
+        if not changes:
+            click.echo(click.style("✓ ", fg="green") + "No changes.")
+        elif breaking:
+            msg = "%d changes, %d breaking." % (len(changes), breaking)
+            click.echo(click.style("✘ ", fg="red") + msg)
+        else:
+            msg = "%d changes, none breaking." % len(changes)
+            click.echo(click.style("✓ ", fg="green") + msg)
+
+    if breaking and fail_on_breaking:
+        sys.exit(1)
+
+
+@click.command(name="compile")
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="Defaults to the schema path, with an '.apistar' extension.",
+)
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def compile_document(path, format, encoding, output, verbose):
+    from apistar.compiled import dumps
+
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    document = _load_document(path, format, encoding, verbose=verbose)
+    content = dumps(document, source_path=path)
+
+    if output is None:
+        output = os.path.splitext(path)[0] + ".apistar"
+    with open(output, "wb") as output_file:
+        output_file.write(content)
+    msg = 'Compiled document written to "%s".'
+    click.echo(click.style("✓ ", fg="green") + (msg % output))
+
+
+@click.command()
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", type=int, default=8000)
+@click.option("--workers", type=int, default=1)
+@click.option("--latency", type=float, default=0.0, help="Seconds of added latency.")
+@click.option("--jitter", type=float, default=0.0, help="Seconds of random latency.")
+@click.option("--error-rate", type=float, default=0.0)
+@click.option("--error-status", type=int, default=500)
+@click.option("--verbose", "-v", is_flag=True, default=False)
+def mock(
+    path,
+    format,
+    encoding,
+    host,
+    port,
+    workers,
+    latency,
+    jitter,
+    error_rate,
+    error_status,
+    verbose,
+):
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    uvicorn = compat.uvicorn
+    if uvicorn is None:
+        raise click.UsageError('The "uvicorn" package is required for "apistar mock".')
+
+    # Validate the schema up front, so that errors are reported before any
+    # worker processes are started.
+    _load_document(path, format, encoding, verbose=verbose)
+
+    os.environ["APISTAR_MOCK_CONFIG"] = json.dumps(
+        {
+            "path": os.path.abspath(path),
+            "format": format,
+            "encoding": encoding,
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "error_status": error_status,
+        }
+    )
+    msg = 'Mock server available at "http://%s:%d/" (Ctrl+C to quit)'
+    click.echo(click.style("✓ ", fg="green") + (msg % (host, port)))
+    uvicorn.run(
+        "apistar.mock:app_from_environ",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        access_log=verbose,
+        log_level="info" if verbose else "warning",
+    )
+
+
+@click.command()
+@click.argument("operation")
+@click.argument("params", nargs=-1)
+@click.option("--path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", type=FORMAT_SCHEMA_CHOICES)
+@click.option("--encoding", type=ENCODING_CHOICES)
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=1)
+@click.option("--duration", "-d", default="10s")
+@click.option("--rate", "-r", type=float, help="Target requests per second.")
+@click.option("--output", type=click.Path(dir_okay=False))
+@click.option("--verbose", "-v", is_flag=True, default=False)
+@click.pass_context
+def bench(
+    ctx,
+    operation,
+    params,
+    path,
+    format,
+    encoding,
+    concurrency,
+    duration,
+    rate,
+    output,
+    verbose,
+):
+    options = {"schema": {"path": path, "format": format, "encoding": encoding}}
+    config = _load_config(options, verbose=verbose)
+
+    path = config["schema"]["path"]
+    format = config["schema"]["format"]
+    encoding = config["schema"]["encoding"]
+
+    import requests
+
+    from apistar.bench import parse_duration, run_benchmark
+    from apistar.client import Client
+
+    try:
+        duration = parse_duration(duration)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint='"--duration"')
+
+    document = _load_document(path, format, encoding, verbose=verbose)
+
+    params = [param.partition("=") for param in params]
+    params = dict([(key, value) for key, sep, value in params])
+
+    session = ctx.obj
+    if session is None:
+        # Size the connection pool so that every worker keeps a connection.
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=concurrency, pool_maxsize=concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    client = Client.from_document(document, session=session)
+
+    try:
+        client.lookup_operation(operation)
+    except ClientError as exc:
+        click.echo("* %s" % exc.messages[0].text)
+        click.echo(click.style("✘ ", fg="red") + "Client error")
+        sys.exit(1)
+
+    result = run_benchmark(
+        client,
+        operation,
+        params,
+        concurrency=concurrency,
+        duration=duration,
+        rate=rate,
+    )
+    data = result.as_dict()
+
+    def ms(value):
+        return "-" if value is None else "%.2fms" % (value * 1000.0)
+
+    click.echo("Requests:   %d (%.1f/s)" % (data["requests"], data["throughput"]))
+    click.echo("Errors:     %d" % data["errors"])
+    for error, count in sorted(data["error_types"].items()):
+        click.echo("  %s: %d" % (error, count))
+    latency = data["latency"]
+    click.echo(
+        "Latency:    min %s, mean %s, max %s"
+        % (ms(latency["min"]), ms(latency["mean"]), ms(latency["max"]))
+    )
+    click.echo(
+        "            p50 %s, p90 %s, p99 %s, p999 %s"
+        % (
+            ms(latency["p50"]),
+            ms(latency["p90"]),
+            ms(latency["p99"]),
+            ms(latency["p999"]),
+        )
+    )
+
+    if output is not None:
+        with open(output, "w") as output_file:
+            json.dump(data, output_file, indent=4)
+
+    if data["errors"]:
+        click.echo(click.style("✘ ", fg="red") + "Benchmark completed with errors.")
+        sys.exit(1)
+    click.echo(click.style("✓ ", fg="green") + "Benchmark completed.")
+
+
 cli.add_command(docs)
 cli.add_command(validate)
 cli.add_command(request)
+cli.add_command(codegen)
+cli.add_command(bundle)
+cli.add_command(normalize)
+cli.add_command(compile_document)
+cli.add_command(diff)
+cli.add_command(mock)
+cli.add_command(bench)
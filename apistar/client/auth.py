@@ -1,4 +1,18 @@
-from requests.auth import AuthBase
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.auth import AuthBase, HTTPBasicAuth
+
+from apistar import exceptions
+
+try:
+    import fcntl
+except ImportError:  # pragma: nocover
+    fcntl = None
 
 
 class TokenAuthentication(AuthBase):
@@ -44,3 +58,180 @@ class SessionAuthentication(AuthBase):
         if self.csrf_cookie_name is not None:
             request.register_hook("response", self.store_csrf_token)
         return request
+
+
+def _margin(token, margin, fraction):
+    # Capped at a fraction of the token's lifetime, since otherwise a token
+    # that lives no longer than the margin would be replaced on every request.
+    try:
+        return min(margin, float(token["expires_in"]) * fraction)
+    except (KeyError, TypeError, ValueError):
+        return margin
+
+
+class OAuth2ClientCredentials(AuthBase):
+    """
+    Authenticates requests using an OAuth2 access token, obtained with the
+    client credentials grant.
+
+    * Tokens are cached until `expiry_margin` seconds before they expire, or
+      a quarter of the token's lifetime for short-lived tokens.
+    * Once within `refresh_margin` seconds of expiry a replacement token is
+      fetched in the background, while the current token continues to be used.
+      For short-lived tokens the margin is at most half the token's lifetime.
+    * Concurrent refreshes are deduplicated, so only one thread ever requests
+      a token at a time.
+    * If `cache_path` is set, tokens are shared through that file between
+      processes, with refreshes serialized using a lock file.
+    """
+
+    def __init__(
+        self,
+        token_url,
+        client_id,
+        client_secret,
+        scope=None,
+        session=None,
+        cache_path=None,
+        refresh_margin=60,
+        expiry_margin=10,
+    ):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.session = requests.Session() if session is None else session
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.expiry_margin = expiry_margin
+
+        self.token = None
+        self.lock = threading.Lock()
+        self.thread_lock = threading.Lock()
+        self.refresh_thread = None
+
+    def __call__(self, request):
+        token = self.get_token()
+        request.headers["Authorization"] = "%s %s" % (
+            token.get("token_type", "Bearer").title(),
+            token["access_token"],
+        )
+        return request
+
+    def get_token(self):
+        token = self.token
+        if not self.is_usable(token):
+            with self.lock:
+                token = self.token
+                if not self.is_usable(token):
+                    token = self.refresh()
+        elif self.needs_refresh(token):
+            self.refresh_in_background()
+        return token
+
+    def is_usable(self, token):
+        try:
+            token["access_token"]
+            expires_at = float(token["expires_at"])
+        except (KeyError, TypeError, ValueError):
+            # No token yet, or an incomplete one read from the cache file.
+            return False
+        margin = _margin(token, self.expiry_margin, 0.25)
+        return time.time() < expires_at - margin
+
+    def needs_refresh(self, token):
+        margin = _margin(token, self.refresh_margin, 0.5)
+        return time.time() >= token["expires_at"] - margin
+
+    def refresh_in_background(self):
+        with self.thread_lock:
+            if self.refresh_thread is not None and self.refresh_thread.is_alive():
+                return
+            self.refresh_thread = threading.Thread(
+                target=self.background_refresh, daemon=True
+            )
+            self.refresh_thread.start()
+
+    def background_refresh(self):
+        with self.lock:
+            if self.needs_refresh(self.token):
+                try:
+                    self.refresh()
+                except (requests.RequestException, exceptions.ClientError):
+                    # The current token remains in use until it expires, at
+                    # which point the next request will retry the refresh.
+                    pass
+
+    def refresh(self):
+        """
+        Obtain a new token, storing and returning it.
+        Must be called with `self.lock` held.
+        """
+        if self.cache_path is None:
+            self.token = self.fetch_token()
+            return self.token
+
+        with open(self.cache_path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another process may already have refreshed the token.
+                token = self.read_cached_token()
+                if not (self.is_usable(token) and not self.needs_refresh(token)):
+                    token = self.fetch_token()
+                    self.write_cached_token(token)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self.token = token
+        return token
+
+    def fetch_token(self):
+        data = {"grant_type": "client_credentials"}
+        if self.scope:
+            data["scope"] = self.scope
+        auth = HTTPBasicAuth(self.client_id, self.client_secret)
+        response = self.session.post(self.token_url, data=data, auth=auth)
+        try:
+            content = response.json()
+        except ValueError:
+            content = None
+
+        if response.status_code != 200 or not isinstance(content, dict):
+            text = "Failed to obtain an access token. (%d %s)" % (
+                response.status_code,
+                response.reason,
+            )
+            message = exceptions.ErrorMessage(text=text, code="token-request-failed")
+            raise exceptions.ClientError(messages=[message])
+
+        try:
+            access_token = content["access_token"]
+            expires_in = float(content.get("expires_in", 3600))
+        except (KeyError, TypeError, ValueError):
+            # The response body isn't included, since it may hold secrets.
+            text = "Invalid access token response."
+            message = exceptions.ErrorMessage(text=text, code="invalid-token")
+            raise exceptions.ClientError(messages=[message]) from None
+
+        return {
+            "access_token": access_token,
+            "token_type": content.get("token_type", "Bearer"),
+            "expires_in": expires_in,
+            "expires_at": time.time() + expires_in,
+        }
+
+    def read_cached_token(self):
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def write_cached_token(self, token):
+        dirname = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, temp_path = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+        with os.fdopen(fd, "w") as temp_file:
+            json.dump(token, temp_file)
+        os.replace(temp_path, self.cache_path)
@@ -1,15 +1,69 @@
+import collections
+import hashlib
+import json
+import threading
+import warnings
 from urllib.parse import quote, urljoin, urlparse
 
 import apistar
 import typesystem
 from apistar import exceptions
-from apistar.client import transports
+from apistar.client import pagination, timing, transports
+
+DOCUMENT_CACHE_SIZE = 64
+
+_document_cache = collections.OrderedDict()
+_document_cache_lock = threading.Lock()
+
+
+def _document_cache_key(schema, format, encoding):
+    if isinstance(schema, str):
+        schema = schema.encode("utf-8")
+    elif isinstance(schema, dict):
+        try:
+            schema = json.dumps(schema, sort_keys=True).encode("utf-8")
+        except (TypeError, ValueError):
+            return None
+    elif not isinstance(schema, bytes):
+        return None
+    return (hashlib.sha256(schema).hexdigest(), format, encoding)
+
+
+def load_document(schema, format=None, encoding=None):
+    """
+    Return the validated `Document` for a schema.
+
+    Documents are cached by content, so that clients created for the same
+    schema within a process share a single parsed and validated document.
+    """
+    key = _document_cache_key(schema, format, encoding)
+    if key is None:
+        return apistar.validate(schema, format=format, encoding=encoding)
+
+    with _document_cache_lock:
+        document = _document_cache.get(key)
+        if document is not None:
+            _document_cache.move_to_end(key)
+            return document
+
+    document = apistar.validate(schema, format=format, encoding=encoding)
+
+    with _document_cache_lock:
+        _document_cache[key] = document
+        while len(_document_cache) > DOCUMENT_CACHE_SIZE:
+            _document_cache.popitem(last=False)
+    return document
+
+
+def clear_document_cache():
+    with _document_cache_lock:
+        _document_cache.clear()
 
 
 class Client:
     def __init__(
         self,
-        schema,
+        schema=None,
         format=None,
         encoding=None,
         auth=None,
@@ -18,11 +72,47 @@ class Client:
         headers=None,
         session=None,
         allow_cookies=True,
+        listeners=None,
+        document=None,
+        compiled=None,
     ):
-        self.document = apistar.validate(schema, format=format, encoding=encoding)
+        if document is None and compiled is not None:
+            try:
+                document = apistar.Document.load_compiled(compiled, schema=schema)
+            except exceptions.CompiledDocumentError as exc:
+                # Fall back to loading the schema itself, if we have it.
+                if schema is None:
+                    raise
+                warnings.warn("%s Loading the schema instead." % exc, RuntimeWarning)
+        if document is None:
+            if schema is None:
+                raise ValueError(
+                    "Either schema, document or compiled must be provided."
+                )
+            document = load_document(schema, format=format, encoding=encoding)
+        self.document = document
         self.transport = self.init_transport(
             auth, decoders, encoders, headers, session, allow_cookies
         )
+        self.listeners = list(listeners) if listeners else []
+
+    @classmethod
+    def from_document(cls, document, **kwargs):
+        """
+        Instantiate a client from an already loaded `Document`, skipping
+        schema parsing and validation entirely.
+        """
+        return cls(document=document, **kwargs)
+
+    def add_listener(self, listener):
+        """
+        Register a callable to be called with a `RequestTiming` instance
+        after each request completes.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
 
     def init_transport(
         self,
@@ -87,9 +177,7 @@ class Client:
             return (params[body_field.name], link.encoding)
         return (None, None)
 
-    def request(self, operation_id: str, **params):
-        link = self.lookup_operation(operation_id)
-
+    def validate_params(self, link, params):
         validator = typesystem.Object(
             properties={field.name: typesystem.Any() for field in link.fields},
             required=[field.name for field in link.fields if field.required],
@@ -100,6 +188,13 @@ class Client:
         except typesystem.ValidationError as exc:
             raise exceptions.ClientError(messages=exc.messages()) from None
 
+    def request(self, operation_id: str, **params):
+        if self.listeners:
+            return self.timed_request(operation_id, params)
+
+        link = self.lookup_operation(operation_id)
+        self.validate_params(link, params)
+
         method = link.method
         url = self.get_url(link, params)
         query_params = self.get_query_params(link, params)
@@ -108,3 +203,53 @@ class Client:
         return self.transport.send(
             method, url, query_params=query_params, content=content, encoding=encoding
         )
+
+    def timed_request(self, operation_id, params):
+        request_timing = timing.RequestTiming(operation_id)
+        try:
+            with request_timing.phase("lookup"):
+                link = self.lookup_operation(operation_id)
+            request_timing.method = link.method
+            with request_timing.phase("validate"):
+                self.validate_params(link, params)
+            with request_timing.phase("url"):
+                url = self.get_url(link, params)
+                query_params = self.get_query_params(link, params)
+            (content, encoding) = self.get_content_and_encoding(link, params)
+
+            return self.transport.send(
+                link.method,
+                url,
+                query_params=query_params,
+                content=content,
+                encoding=encoding,
+                timing=request_timing,
+            )
+        finally:
+            request_timing.finish()
+            timing.notify(self.listeners, request_timing)
+
+    def paginate(self, operation_id: str, **params):
+        """
+        Return an iterator over all the items in a paginated list operation,
+        prefetching each following page in the background.
+        """
+        link = self.lookup_operation(operation_id)
+        self.validate_params(link, params)
+
+        url = self.get_url(link, params)
+        query_params = self.get_query_params(link, params)
+        (content, encoding) = self.get_content_and_encoding(link, params)
+        request = pagination.PageRequest(
+            link.method, url, query_params, content, encoding
+        )
+
+        # Each page request is timed and reported to the client's listeners,
+        # in the same way as `request()`.
+        return pagination.Paginator(
+            self.transport,
+            request,
+            pagination=link.pagination,
+            operation_id=operation_id,
+            listeners=self.listeners,
+        )
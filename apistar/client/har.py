@@ -0,0 +1,353 @@
+"""
+This module provides a `RecordingSession` requests session class, that
+records requests and responses to a HAR file, and a `ReplaySession` class,
+that serves responses from a previously recorded HAR file.
+
+Entries are built, serialized and written by a background thread, so
+recording adds very little overhead to each request. If the writer falls
+behind, entries beyond `max_queue_size` are dropped rather than held in
+memory. Bodies may be truncated to `max_body_size` bytes, and only a
+`sample_rate` fraction of requests may be recorded. The values of sensitive
+headers, such as `Authorization` and `Cookie`, are replaced with
+`"[REDACTED]"` unless `redact_headers=()` is passed. Each response in a
+redirect chain is recorded as its own entry.
+"""
+import atexit
+import base64
+import datetime
+import itertools
+import json
+import queue
+import random
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.sessions import Session
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_MAX_BODY_SIZE = 64 * 1024
+DEFAULT_MAX_QUEUE_SIZE = 1000
+REDACTED_HEADERS = ("authorization", "proxy-authorization", "cookie", "set-cookie")
+REDACTED = "[REDACTED]"
+
+# Writers that have not yet been closed, which are closed when the process
+# exits by a single `atexit` handler.
+_open_writers = set()
+_open_writers_lock = threading.Lock()
+
+
+def close_writers():
+    """
+    Close every open `HARWriter`.
+    """
+    with _open_writers_lock:
+        writers = list(_open_writers)
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_writers)
+
+
+class HARWriter:
+    """
+    Writes HAR entries to a file, from a background thread.
+    """
+
+    def __init__(self, path, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        from apistar import __version__
+
+        self.path = path
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.creator = {"name": "apistar", "version": __version__}
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        with _open_writers_lock:
+            _open_writers.add(self)
+
+    def write(self, request, response, started, **options):
+        """
+        Queue a request and response to be recorded. The entry is built by
+        `build_entry(request, response, started, **options)` in the writer
+        thread. If the queue is full the entry is dropped.
+        """
+        try:
+            self.queue.put_nowait((request, response, started, options))
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        header = {"log": {"version": "1.2", "creator": self.creator}}
+        header = json.dumps(header)[:-2] + ', "entries": [\n'
+        with open(self.path, "w") as output:
+            output.write(header)
+            separator = ""
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                request, response, started, options = item
+                try:
+                    entry = build_entry(request, response, started, **options)
+                except Exception:
+                    # Never let a single unusual request stop the recording.
+                    self.dropped += 1
+                    continue
+                output.write(separator + json.dumps(entry))
+                separator = ",\n"
+                if self.queue.empty():
+                    output.flush()
+            output.write("\n]}}\n")
+
+    def close(self):
+        """
+        Finish writing any pending entries, and terminate the file.
+        """
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.thread.join()
+            with _open_writers_lock:
+                _open_writers.discard(self)
+
+
+def _headers(headers, redact_headers=REDACTED_HEADERS):
+    return [
+        {"name": key, "value": REDACTED if key.lower() in redact_headers else value}
+        for key, value in headers.items()
+    ]
+
+
+def _query_string(url):
+    return [
+        {"name": key, "value": value}
+        for key, value in parse_qsl(urlsplit(url).query, keep_blank_values=True)
+    ]
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    elif isinstance(body, (str, bytes)):
+        return len(body)
+    return -1
+
+
+def _content(body, mime_type, max_body_size):
+    if body is None:
+        body = b""
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    elif not isinstance(body, bytes):
+        # A streaming upload, which we do not record.
+        body = b""
+
+    size = len(body)
+    if max_body_size is not None:
+        body = body[:max_body_size]
+    try:
+        content = {"size": size, "mimeType": mime_type, "text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        text = base64.b64encode(body).decode("ascii")
+        content = {"size": size, "mimeType": mime_type, "text": text}
+        content["encoding"] = "base64"
+    if len(body) < size:
+        content["comment"] = "truncated"
+    return content
+
+
+def build_entry(
+    request,
+    response,
+    started,
+    max_body_size=DEFAULT_MAX_BODY_SIZE,
+    redact_headers=REDACTED_HEADERS,
+):
+    redact_headers = {name.lower() for name in redact_headers}
+    request_type = request.headers.get("content-type", "")
+    response_type = response.headers.get("content-type", "")
+    elapsed = response.elapsed.total_seconds() * 1000.0
+    request_entry = {
+        "method": request.method,
+        "url": request.url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [],
+        "headers": _headers(request.headers, redact_headers),
+        "queryString": _query_string(request.url),
+        "headersSize": -1,
+        "bodySize": _body_size(request.body),
+    }
+    if request.body:
+        post_data = _content(request.body, request_type, max_body_size)
+        request_entry["postData"] = {
+            "mimeType": request_type,
+            "text": post_data["text"],
+        }
+    return {
+        "startedDateTime": started.isoformat(),
+        "time": elapsed,
+        "request": request_entry,
+        "response": {
+            "status": response.status_code,
+            "statusText": response.reason or "",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": _headers(response.headers, redact_headers),
+            "content": _content(response.content, response_type, max_body_size),
+            "redirectURL": response.headers.get("location", ""),
+            "headersSize": -1,
+            "bodySize": _body_size(response.content),
+        },
+        "cache": {},
+        "timings": {"send": 0, "wait": elapsed, "receive": 0},
+    }
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(
+        self,
+        writer,
+        wrapped_session=None,
+        max_body_size=DEFAULT_MAX_BODY_SIZE,
+        sample_rate=1.0,
+        redact_headers=REDACTED_HEADERS,
+    ):
+        self.writer = writer
+        self.session = Session() if wrapped_session is None else wrapped_session
+        self.max_body_size = max_body_size
+        self.sample_rate = sample_rate
+        self.redact_headers = tuple(redact_headers)
+        super().__init__()
+
+    def send(self, request, **kwargs):
+        started = datetime.datetime.now(datetime.timezone.utc)
+        # Redirects are followed by the recording session, which sends each
+        # request in turn through this adapter, so that each is recorded.
+        response = self.session.send(request, allow_redirects=False, **kwargs)
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            # Read the body here, so that the writer thread never consumes a
+            # streamed response at the same time as the caller.
+            response.content
+            self.writer.write(
+                request,
+                response,
+                started,
+                max_body_size=self.max_body_size,
+                redact_headers=self.redact_headers,
+            )
+        return response
+
+
+def RecordingSession(
+    path,
+    wrapped_session=None,
+    max_body_size=DEFAULT_MAX_BODY_SIZE,
+    sample_rate=1.0,
+    redact_headers=REDACTED_HEADERS,
+    max_queue_size=DEFAULT_MAX_QUEUE_SIZE,
+):
+    writer = HARWriter(path, max_queue_size=max_queue_size)
+    adapter = RecordingAdapter(
+        writer,
+        wrapped_session,
+        max_body_size=max_body_size,
+        sample_rate=sample_rate,
+        redact_headers=redact_headers,
+    )
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.har_writer = writer
+    return session
+
+
+def _normalize_url(url):
+    """
+    Return a URL with its query parameters in a consistent order, for
+    matching requests against recorded entries.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def load_har(path):
+    with open(path, "r") as har_file:
+        content = har_file.read()
+    try:
+        data = json.loads(content)
+    except ValueError:
+        # The recording process may have exited without terminating the file.
+        data = json.loads(content.rstrip().rstrip(",") + "\n]}}")
+    return data["log"]["entries"]
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves responses from recorded HAR entries, matched on the request
+    method and URL. If several responses were recorded for the same request,
+    they are served in turn, cycling back to the first.
+    """
+
+    def __init__(self, entries):
+        super().__init__()
+        recorded = {}
+        for entry in entries:
+            key = (entry["request"]["method"], _normalize_url(entry["request"]["url"]))
+            recorded.setdefault(key, []).append(entry["response"])
+        self.responses = {
+            key: itertools.cycle(responses) for key, responses in recorded.items()
+        }
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        key = (request.method, _normalize_url(request.url))
+        with self.lock:
+            try:
+                recorded = next(self.responses[key])
+            except KeyError:
+                msg = "No recorded response for %s %s" % (request.method, request.url)
+                raise ConnectionError(msg, request=request) from None
+        return self.build_response(request, recorded)
+
+    def build_response(self, request, recorded):
+        content = recorded.get("content", {})
+        text = content.get("text", "")
+        if content.get("encoding") == "base64":
+            body = base64.b64decode(text)
+        else:
+            body = text.encode("utf-8")
+
+        response = Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded.get("statusText", "")
+        response.headers = CaseInsensitiveDict(
+            [
+                (header["name"], header["value"])
+                for header in recorded.get("headers", [])
+                if header["name"].lower() not in ("content-encoding", "content-length")
+            ]
+        )
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def ReplaySession(path):
+    adapter = ReplayAdapter(load_har(path))
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
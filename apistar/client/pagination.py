@@ -0,0 +1,153 @@
+"""
+This module provides the `Paginator` class, which iterates over the items
+returned by a paginated list operation.
+
+The next page is determined either by a `Link: <...>; rel="next"` response
+header, or by an `x-pagination` extension on the operation, for example:
+
+    x-pagination:
+      items: results
+      cursor:
+        param: cursor
+        field: next_cursor
+
+Supported styles are `cursor` (`param` and `field`), `offset` (`param`),
+and `page` (`param`). If `items` is omitted then the response content itself
+should be the list of items.
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from apistar import exceptions
+from apistar.client import timing
+
+PageRequest = collections.namedtuple(
+    "PageRequest", ["method", "url", "query_params", "content", "encoding"]
+)
+
+
+def lookup_dotted(value, path, default=None):
+    for key in path.split("."):
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return value
+
+
+class Paginator:
+    def __init__(
+        self,
+        transport,
+        request,
+        pagination=None,
+        prefetch=True,
+        operation_id=None,
+        listeners=None,
+    ):
+        self.transport = transport
+        self.request = request
+        self.pagination = pagination or {}
+        self.prefetch = prefetch
+        self.operation_id = operation_id
+        self.listeners = listeners if listeners is not None else []
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            request = self.request
+            page = self.fetch_page(request)
+            while True:
+                result, response = page
+                items = self.get_items(result)
+                next_request = self.get_next_request(request, result, response, items)
+
+                # Start fetching the next page before handing over the items
+                # on this page, so that network time overlaps with processing.
+                if next_request is not None and executor is not None:
+                    pending = executor.submit(self.fetch_page, next_request)
+
+                yield from items
+
+                if next_request is None:
+                    return
+                elif executor is not None:
+                    page = pending.result()
+                else:
+                    page = self.fetch_page(next_request)
+                request = next_request
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def fetch_page(self, request):
+        if not self.listeners:
+            return self.send(request)
+
+        request_timing = timing.RequestTiming(self.operation_id, request.method)
+        try:
+            return self.send(request, request_timing)
+        finally:
+            request_timing.finish()
+            timing.notify(self.listeners, request_timing)
+
+    def send(self, request, request_timing=None):
+        response = self.transport.get_response(
+            request.method,
+            request.url,
+            query_params=request.query_params,
+            content=request.content,
+            encoding=request.encoding,
+            timing=request_timing,
+        )
+        result = self.transport.handle_response(response, timing=request_timing)
+        return (result, response)
+
+    def get_items(self, result):
+        items_key = self.pagination.get("items")
+        items = result if items_key is None else lookup_dotted(result, items_key)
+        if items is None:
+            return []
+        if not isinstance(items, list):
+            text = "Paginated response did not contain a list of items."
+            message = exceptions.ErrorMessage(text=text, code="invalid-pagination")
+            raise exceptions.ClientError(messages=[message])
+        return items
+
+    def get_next_request(self, request, result, response, items):
+        """
+        Return a `PageRequest` for the following page, or `None` if this is
+        the last page.
+        """
+        next_link = response.links.get("next", {}).get("url")
+        if next_link:
+            url = urljoin(response.url or request.url, next_link)
+            return PageRequest("GET", url, None, None, None)
+
+        if not items:
+            return None
+
+        if "cursor" in self.pagination:
+            param = self.pagination["cursor"]["param"]
+            cursor = lookup_dotted(result, self.pagination["cursor"]["field"])
+            if cursor in (None, ""):
+                return None
+            return self.with_query_param(request, param, cursor)
+
+        if "offset" in self.pagination:
+            param = self.pagination["offset"]["param"]
+            offset = int((request.query_params or {}).get(param, 0)) + len(items)
+            return self.with_query_param(request, param, offset)
+
+        if "page" in self.pagination:
+            param = self.pagination["page"]["param"]
+            page = int((request.query_params or {}).get(param, 1)) + 1
+            return self.with_query_param(request, param, page)
+
+        return None
+
+    def with_query_param(self, request, key, value):
+        query_params = dict(request.query_params or {})
+        query_params[key] = value
+        return request._replace(query_params=query_params)
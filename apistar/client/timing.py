@@ -0,0 +1,209 @@
+"""
+This module provides per-request timing instrumentation for the client.
+
+Any callable passed in `Client(listeners=[...])` is called with a
+`RequestTiming` instance once each request completes. The
+`TimingAggregator` listener keeps per-operation latency histograms, which
+may be dumped as JSON or in the Prometheus text exposition format.
+"""
+import bisect
+import collections
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Phase:
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        phases = self.timing.phases
+        phases[self.name] = phases.get(self.name, 0.0) + elapsed
+
+
+class RequestTiming:
+    """
+    The time spent in each phase of a single request, in seconds.
+
+    Phases are "lookup", "validate", "url", "encode", "ttfb", "download"
+    and "decode". The "ttfb" phase includes any connection setup.
+    """
+
+    def __init__(self, operation_id, method=None):
+        self.operation_id = operation_id
+        self.method = method
+        self.status_code = None
+        self.phases = collections.OrderedDict()
+        self.start = time.perf_counter()
+        self.total = None
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def __repr__(self):
+        return "<RequestTiming %s %s %s %.6fs>" % (
+            self.operation_id,
+            self.method,
+            self.status_code,
+            self.total or 0.0,
+        )
+
+
+def notify(listeners, timing):
+    """
+    Call each listener with a finished `RequestTiming`. A listener that
+    raises an exception is logged and skipped, so that it cannot replace the
+    response or the original error.
+    """
+    for listener in list(listeners):
+        try:
+            listener(timing)
+        except Exception:
+            logger.exception("Request timing listener %r failed.", listener)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        Return a list of `(upper_bound, cumulative_count)` pairs.
+        """
+        bounds = [str(bucket) for bucket in self.buckets] + ["+Inf"]
+        running = 0
+        result = []
+        for bound, count in zip(bounds, self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": collections.OrderedDict(self.cumulative()),
+        }
+
+
+class TimingAggregator:
+    """
+    A client listener that aggregates request timings in-process.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.phases = {}
+        self.statuses = collections.Counter()
+
+    def __call__(self, timing):
+        key = (timing.operation_id, timing.method)
+        status = "error" if timing.status_code is None else str(timing.status_code)
+        with self.lock:
+            if key not in self.requests:
+                self.requests[key] = Histogram(self.buckets)
+            self.requests[key].observe(timing.total)
+            for name, elapsed in timing.phases.items():
+                phase_key = key + (name,)
+                if phase_key not in self.phases:
+                    self.phases[phase_key] = Histogram(self.buckets)
+                self.phases[phase_key].observe(elapsed)
+            self.statuses[key + (status,)] += 1
+
+    def as_dict(self):
+        with self.lock:
+            operations = collections.OrderedDict()
+            for (operation_id, method), histogram in sorted(self.requests.items()):
+                info = histogram.as_dict()
+                info["method"] = method
+                info["statuses"] = {
+                    status: count
+                    for (op, meth, status), count in sorted(self.statuses.items())
+                    if (op, meth) == (operation_id, method)
+                }
+                info["phases"] = collections.OrderedDict(
+                    (name, phase.as_dict())
+                    for (op, meth, name), phase in self.phases.items()
+                    if (op, meth) == (operation_id, method)
+                )
+                operations[operation_id] = info
+            return {"operations": operations}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def to_prometheus(self, prefix="apistar_client"):
+        lines = []
+        with self.lock:
+            name = prefix + "_request_duration_seconds"
+            lines.append("# HELP %s Client request latency." % name)
+            lines.append("# TYPE %s histogram" % name)
+            for (operation_id, method), histogram in sorted(self.requests.items()):
+                labels = _labels(operation=operation_id, method=method)
+                lines.extend(_histogram_lines(name, labels, histogram))
+
+            name = prefix + "_phase_duration_seconds"
+            lines.append("# HELP %s Client request latency by phase." % name)
+            lines.append("# TYPE %s histogram" % name)
+            for (operation_id, method, phase), histogram in sorted(
+                self.phases.items()
+            ):
+                labels = _labels(operation=operation_id, method=method, phase=phase)
+                lines.extend(_histogram_lines(name, labels, histogram))
+
+            name = prefix + "_requests_total"
+            lines.append("# HELP %s Client requests by response status." % name)
+            lines.append("# TYPE %s counter" % name)
+            for (operation_id, method, status), count in sorted(
+                self.statuses.items()
+            ):
+                labels = _labels(operation=operation_id, method=method, status=status)
+                lines.append("%s{%s} %d" % (name, labels, count))
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    value = "" if value is None else str(value)
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(
+        '%s="%s"' % (key, _escape_label(value)) for key, value in labels.items()
+    )
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    for bound, count in histogram.cumulative():
+        lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, bound, count))
+    lines.append("%s_sum{%s} %s" % (name, labels, repr(histogram.sum)))
+    lines.append("%s_count{%s} %d" % (name, labels, histogram.count))
+    return lines
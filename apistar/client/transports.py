@@ -22,7 +22,9 @@ class BlockAllCookies(http.cookiejar.CookiePolicy):
 class BaseTransport:
     schemes = None
 
-    def send(self, method, url, query_params=None, content=None, encoding=None):
+    def send(
+        self, method, url, query_params=None, content=None, encoding=None, timing=None
+    ):
         raise NotImplementedError()
 
 
@@ -67,10 +69,47 @@ class HTTPTransport(BaseTransport):
         if headers:
             self.headers.update({key.lower(): value for key, value in headers.items()})
 
-    def send(self, method, url, query_params=None, content=None, encoding=None):
-        options = self.get_request_options(query_params, content, encoding)
-        response = self.session.request(method, url, **options)
-        result = self.decode_response_content(response)
+    def send(
+        self, method, url, query_params=None, content=None, encoding=None, timing=None
+    ):
+        response = self.get_response(
+            method, url, query_params, content, encoding, timing=timing
+        )
+        return self.handle_response(response, timing=timing)
+
+    def get_response(
+        self, method, url, query_params=None, content=None, encoding=None, timing=None
+    ):
+        """
+        Make the outgoing request, and return the raw HTTP response.
+
+        If a `RequestTiming` instance is passed, then the time spent encoding
+        the request, waiting for the response headers, and downloading the
+        response body are each recorded on it.
+        """
+        if timing is None:
+            options = self.get_request_options(query_params, content, encoding)
+            return self.session.request(method, url, **options)
+
+        with timing.phase("encode"):
+            options = self.get_request_options(query_params, content, encoding)
+        with timing.phase("ttfb"):
+            response = self.session.request(method, url, stream=True, **options)
+        with timing.phase("download"):
+            response.content
+        timing.status_code = response.status_code
+        return response
+
+    def handle_response(self, response, timing=None):
+        """
+        Given an HTTP response, return the decoded data, or raise an
+        `ErrorResponse` for 4xx and 5xx status codes.
+        """
+        if timing is None:
+            result = self.decode_response_content(response)
+        else:
+            with timing.phase("decode"):
+                result = self.decode_response_content(response)
 
         if 400 <= response.status_code <= 599:
             title = "%d %s" % (response.status_code, response.reason)
@@ -0,0 +1,255 @@
+"""
+Generates a plain Python client module from a loaded `Document`.
+
+The generated module has one method per link, with the URL template, query
+parameters, request body and required parameter checks written out as
+straight-line code, so that importing and calling it requires no schema
+parsing or validation at runtime. Requests are still sent using
+`apistar.client.transports.HTTPTransport`.
+"""
+import keyword
+import re
+from urllib.parse import urljoin, urlsplit
+
+import typesystem
+
+HEADER = '''"""
+API client for "{title}" {version}.
+
+This module was generated by `apistar codegen`. Do not edit it by hand.
+"""
+import typing
+from urllib.parse import quote
+
+from apistar import exceptions
+from apistar.client.transports import HTTPTransport
+
+
+def _required(name):
+    text = "The field %r is required." % name
+    message = exceptions.ErrorMessage(text=text, code="required", index=[name])
+    return exceptions.ClientError(messages=[message])
+
+
+class {class_name}:
+    operations = {operations}
+
+    def __init__(self, base_url={base_url!r}, transport=None, **kwargs):
+        self.base_url = base_url.rstrip("/")
+        self.transport = HTTPTransport(**kwargs) if transport is None else transport
+
+    def request(*args, **params):
+        # Positional only, so that parameters may be named "self".
+        self, operation_id = args
+        try:
+            method_name, arguments = self.operations[operation_id]
+        except KeyError:
+            text = 'Operation ID "%s" not found in schema.' % operation_id
+            message = exceptions.ErrorMessage(text=text, code="invalid-operation")
+            raise exceptions.ClientError(messages=[message]) from None
+        params = {{arguments.get(key, key): value for key, value in params.items()}}
+        return getattr(self, method_name)(**params)
+'''
+
+
+def _identifier(name):
+    """
+    Return a valid Python identifier for the given field or link name.
+    """
+    name = re.sub(r"[^0-9a-zA-Z_]", "_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+    if keyword.iskeyword(name):
+        name += "_"
+    return name
+
+
+# Names used within generated methods, that arguments must not shadow.
+RESERVED_NAMES = {
+    "self",
+    "quote",
+    "_required",
+    "_url",
+    "_query",
+    "_content",
+    "_encoding",
+}
+
+
+# Attributes of the generated class, that methods must not shadow.
+RESERVED_METHOD_NAMES = {"request", "operations", "transport", "base_url"}
+
+
+def _argument_names(link):
+    """
+    Return a mapping of each field name in a link to a unique argument name.
+    """
+    arguments = {}
+    for field in link.fields:
+        argument = _identifier(field.name)
+        while argument in RESERVED_NAMES or argument in arguments.values():
+            argument += "_"
+        arguments[field.name] = argument
+    return arguments
+
+
+def _annotation(schema):
+    if isinstance(schema, typesystem.Boolean):
+        annotation = "bool"
+    elif isinstance(schema, typesystem.Integer):
+        annotation = "int"
+    elif isinstance(schema, typesystem.Number):
+        annotation = "float"
+    elif isinstance(schema, (typesystem.String, typesystem.Choice)):
+        annotation = "str"
+    elif isinstance(schema, typesystem.Object):
+        annotation = "dict"
+    elif isinstance(schema, typesystem.Array):
+        annotation = "list"
+    else:
+        return "typing.Any"
+    if schema.allow_null:
+        return "typing.Optional[%s]" % annotation
+    return annotation
+
+
+def _docstring(text, indent):
+    text = text.replace("\\", "\\\\").replace('"""', '\\"\\"\\"').strip()
+    lines = [indent + '"""']
+    lines.extend((indent + line).rstrip() for line in text.splitlines())
+    lines.append(indent + '"""')
+    return lines
+
+
+def _url_expression(url, base_url, arguments):
+    """
+    Return a Python expression that builds the URL for a link, given the
+    mapping of path field names to argument names.
+    """
+    if base_url and url.startswith(base_url.rstrip("/")):
+        parts = ["self.base_url"]
+        url = url[len(base_url.rstrip("/")) :]
+    elif not urlsplit(url).scheme:
+        # A relative URL, when the schema has no server URL.
+        parts = ["self.base_url"]
+        url = url if url.startswith("/") else "/" + url
+    else:
+        parts = []
+
+    for token in re.split(r"({\+?[^}]*})", url):
+        if not token:
+            continue
+        if token.startswith("{") and token.strip("{}+") in arguments:
+            safe = "/" if token.startswith("{+") else ""
+            argument = arguments[token.strip("{}+")]
+            parts.append("quote(str(%s), safe=%r)" % (argument, safe))
+        else:
+            parts.append(repr(token))
+    return " + ".join(parts) if parts else "''"
+
+
+def generate_method(link, method_name, base_url):
+    fields = sorted(link.fields, key=lambda field: not field.required)
+    arguments = _argument_names(link)
+
+    signature = ["self"]
+    if fields:
+        signature.append("*")
+    for field in fields:
+        annotation = _annotation(field.schema)
+        if field.required:
+            signature.append("%s: %s" % (arguments[field.name], annotation))
+        else:
+            signature.append("%s: %s = None" % (arguments[field.name], annotation))
+
+    lines = ["    def %s(%s):" % (method_name, ", ".join(signature))]
+    docstring = "\n\n".join(
+        [text for text in (link.title, link.description) if text]
+    )
+    if docstring:
+        lines.extend(_docstring(docstring, " " * 8))
+
+    for field in fields:
+        if field.required and field.location in ("path", "body"):
+            argument = arguments[field.name]
+            lines.append("        if %s is None:" % argument)
+            lines.append("            raise _required(%r)" % field.name)
+
+    url = urljoin(base_url, link.url)
+    lines.append("        _url = %s" % _url_expression(url, base_url, arguments))
+
+    query_fields = link.get_query_fields()
+    if query_fields:
+        lines.append("        _query = {}")
+        for field in query_fields:
+            argument = arguments[field.name]
+            if field.required:
+                lines.append("        _query[%r] = %s" % (field.name, argument))
+            else:
+                lines.append("        if %s is not None:" % argument)
+                lines.append("            _query[%r] = %s" % (field.name, argument))
+    else:
+        lines.append("        _query = None")
+
+    body_field = link.get_body_field()
+    if body_field is not None:
+        argument = arguments[body_field.name]
+        lines.append("        _content = %s" % argument)
+        lines.append(
+            "        _encoding = None if _content is None else %r" % link.encoding
+        )
+    else:
+        lines.append("        _content = None")
+        lines.append("        _encoding = None")
+
+    lines.append("        return self.transport.send(")
+    lines.append("            %r," % link.method)
+    lines.append("            _url,")
+    lines.append("            query_params=_query,")
+    lines.append("            content=_content,")
+    lines.append("            encoding=_encoding,")
+    lines.append("        )")
+    return "\n".join(lines)
+
+
+def generate(document, class_name="Client"):
+    """
+    Return the source code for a Python module containing a client class
+    for the given `Document`.
+    """
+    base_url = document.url or ""
+    method_names = {}
+    renamed = {}
+    methods = []
+    for link_info in document.walk_links():
+        link = link_info.link
+        method_name = _identifier(link.name)
+        if method_name.startswith("__"):
+            # Avoid both special methods and private name mangling.
+            method_name = "_" + method_name.lstrip("_")
+        while (
+            method_name in method_names.values()
+            or method_name in RESERVED_METHOD_NAMES
+        ):
+            method_name += "_"
+        method_names[link.name] = method_name
+        arguments = _argument_names(link)
+        renamed[link.name] = {
+            name: argument for name, argument in arguments.items() if name != argument
+        }
+        methods.append(generate_method(link, method_name, base_url))
+
+    operations = "{%s}" % "".join(
+        "\n        %r: (%r, %r)," % (key, value, renamed[key])
+        for key, value in method_names.items()
+    )
+    if method_names:
+        operations = operations[:-1] + "\n    }"
+    header = HEADER.format(
+        title=(document.title or "").replace('"', "'"),
+        version=document.version or "",
+        class_name=class_name,
+        operations=operations,
+        base_url=base_url,
+    )
+    return "\n\n".join([header.rstrip("\n")] + methods) + "\n"
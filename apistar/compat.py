@@ -1,36 +1,52 @@
 import collections
+import importlib
 import sys
 
 
-try:
-    import jinja2
-except ImportError:
-    jinja2 = None
+# Optional dependencies are only imported on first access, so that importing
+# the client does not pay for packages that it never uses. Accessing one that
+# is not installed returns `None`.
+OPTIONAL_MODULES = ["brotli", "jinja2", "pygments", "uvicorn"]
 
 
-try:
+def _optional_import(name):
+    if name in globals():
+        return globals()[name]
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        module = None
+    globals()[name] = module
+    return module
+
+
+def __getattr__(name):
+    if name in OPTIONAL_MODULES:
+        return _optional_import(name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def pygments_highlight(text, lang, style):
+    if _optional_import("pygments") is None:
+        return text
+
     import pygments
     from pygments.lexers import get_lexer_by_name
     from pygments.formatters import HtmlFormatter
 
-    def pygments_highlight(text, lang, style):
-        lexer = get_lexer_by_name(lang, stripall=False)
-        formatter = HtmlFormatter(nowrap=True, style=style)
-        return pygments.highlight(text, lexer, formatter)
-
-    def pygments_css(style):
-        formatter = HtmlFormatter(style=style)
-        return formatter.get_style_defs(".highlight")
+    lexer = get_lexer_by_name(lang, stripall=False)
+    formatter = HtmlFormatter(nowrap=True, style=style)
+    return pygments.highlight(text, lexer, formatter)
 
 
-except ImportError:
-    pygments = None
+def pygments_css(style):
+    if _optional_import("pygments") is None:
+        return None
 
-    def pygments_highlight(text, lang, style):
-        return text
+    from pygments.formatters import HtmlFormatter
 
-    def pygments_css(style):
-        return None
+    formatter = HtmlFormatter(style=style)
+    return formatter.get_style_defs(".highlight")
 
 
 try:
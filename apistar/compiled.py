@@ -0,0 +1,170 @@
+"""
+A binary format for validated documents, written by `apistar compile`.
+
+Loading a compiled document skips parsing, meta-schema validation and
+building the document's typesystem fields, so that clients start up
+quickly. A compiled file consists of a magic number, the format version, a
+JSON header and the pickled `Document`. The header records the versions of
+apistar and typesystem used, since the pickled fields depend on them, along
+with hashes of the source schema and of any other files that it refers to,
+so that out of date files can be detected.
+
+Compiled files are pickles, so only load files from a trusted source.
+"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+
+from apistar.exceptions import CompiledDocumentError
+
+MAGIC = b"\x89APISTAR\r\n\x1a\n"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">HI")
+
+
+def _versions():
+    import typesystem
+    from apistar import __version__
+
+    return {"apistar": __version__, "typesystem": typesystem.__version__}
+
+
+def source_digest(schema):
+    """
+    Return a hash of a schema, given as a dict, string or bytestring. A dict
+    is hashed by its parsed value, so that key order and formatting do not
+    matter.
+    """
+    if isinstance(schema, dict):
+        from apistar.diff import merkle_hash
+
+        return merkle_hash(schema, {}).hex()
+    if isinstance(schema, str):
+        schema = schema.encode("utf-8")
+    return hashlib.sha256(schema).hexdigest()
+
+
+def _file_digest(path):
+    with open(path, "rb") as input_file:
+        return hashlib.sha256(input_file.read()).hexdigest()
+
+
+def _source_header(source, source_path):
+    if source_path is not None:
+        with open(source_path, "rb") as source_file:
+            source = source_file.read()
+    if source is None:
+        return {"source": None}
+
+    header = {"source": source_digest(source)}
+    if isinstance(source, dict):
+        header["source_value"] = header["source"]
+    if source_path is not None:
+        from apistar.resolver import Resolver, bundle, needs_bundle
+
+        # The parsed schema, to check against a schema given as a dict, and
+        # every other file that it refers to.
+        resolver = Resolver()
+        header["source_value"] = source_digest(resolver.load(source_path))
+        if needs_bundle(source):
+            bundle(source_path, resolver=resolver)
+        root_path = os.path.abspath(source_path)
+        header["dependencies"] = {
+            path: _file_digest(path)
+            for path in sorted(resolver.files)
+            if path != root_path
+        }
+    return header
+
+
+def _is_up_to_date(header, source):
+    key = "source_value" if isinstance(source, dict) else "source"
+    if header.get(key) != source_digest(source):
+        return False
+    for path, digest in header.get("dependencies", {}).items():
+        try:
+            if _file_digest(path) != digest:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def dumps(document, source=None, source_path=None):
+    """
+    Return a compiled document, as a bytestring. `source` is the schema that
+    the document was loaded from, if any, or `source_path` is the path of the
+    schema file, in which case any files that it refers to are also recorded.
+    """
+    header = dict(_versions(), format=FORMAT_VERSION)
+    header.update(_source_header(source, source_path))
+    header_content = json.dumps(header, sort_keys=True).encode("utf-8")
+    payload = pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+    return (
+        MAGIC
+        + HEADER.pack(FORMAT_VERSION, len(header_content))
+        + header_content
+        + payload
+    )
+
+
+def read_header(content):
+    """
+    Return the header of a compiled document, as a dict.
+    """
+    if not content.startswith(MAGIC):
+        raise CompiledDocumentError("Not a compiled document.")
+    offset = len(MAGIC)
+    try:
+        format_version, length = HEADER.unpack_from(content, offset)
+    except struct.error:
+        raise CompiledDocumentError("Truncated compiled document.") from None
+    if format_version != FORMAT_VERSION:
+        msg = "Compiled document has format version %d, expected %d."
+        raise CompiledDocumentError(msg % (format_version, FORMAT_VERSION))
+    offset += HEADER.size
+    try:
+        header = json.loads(content[offset : offset + length].decode("utf-8"))
+    except ValueError:
+        raise CompiledDocumentError("Invalid compiled document header.") from None
+    header["offset"] = offset + length
+    return header
+
+
+def loads(content, source=None):
+    """
+    Return the `Document` from a compiled document. If the `source` schema is
+    given, the document must have been compiled from it.
+
+    Raises `CompiledDocumentError` if the document cannot be loaded.
+    """
+    header = read_header(content)
+    for name, version in _versions().items():
+        if header.get(name) != version:
+            msg = "Compiled document was built with %s %s, but %s is installed."
+            raise CompiledDocumentError(msg % (name, header.get(name), version))
+    if source is not None and not _is_up_to_date(header, source):
+        raise CompiledDocumentError("Compiled document is out of date.")
+
+    try:
+        return pickle.loads(content[header["offset"] :])
+    except Exception as exc:
+        msg = "Could not load compiled document: %s" % exc
+        raise CompiledDocumentError(msg) from None
+
+
+def load(compiled, source=None):
+    """
+    Return the `Document` from a compiled document, given either as a
+    bytestring or as a path.
+    """
+    if not isinstance(compiled, bytes):
+        try:
+            with open(os.fspath(compiled), "rb") as compiled_file:
+                compiled = compiled_file.read()
+        except OSError as exc:
+            msg = "Could not read compiled document: %s" % exc
+            raise CompiledDocumentError(msg) from None
+    return loads(compiled, source=source)
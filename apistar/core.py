@@ -1,20 +1,38 @@
+import importlib
 import os
 import re
+import threading
 import typing
 
-import jinja2
-
-from apistar.schemas.autodetermine import AUTO_DETERMINE
-from apistar.schemas.config import APISTAR_CONFIG
-from apistar.schemas.jsonschema import JSON_SCHEMA
-from apistar.schemas.openapi import OPEN_API, OpenAPI
-from apistar.schemas.swagger import SWAGGER, Swagger
+from apistar.document import Document
+from apistar.positions import parse, validate_with_positions
 
 import typesystem
 
 
 FORMAT_CHOICES = ["config", "jsonschema", "openapi", "swagger", None]
 ENCODING_CHOICES = ["json", "yaml", None]
+THEME_CHOICES = ["apistar", "redoc", "swaggerui"]
+
+# Meta-schemas are built when their module is first imported, so we only
+# import the one that is needed for each format.
+VALIDATORS = {
+    "config": ("apistar.schemas.config", "APISTAR_CONFIG"),
+    "jsonschema": ("apistar.schemas.jsonschema", "JSON_SCHEMA"),
+    "openapi": ("apistar.schemas.openapi", "OPEN_API"),
+    "swagger": ("apistar.schemas.swagger", "SWAGGER"),
+    None: ("apistar.schemas.autodetermine", "AUTO_DETERMINE"),
+}
+
+
+_environments = {}
+_environments_lock = threading.Lock()
+
+
+def get_validator(format):
+    module_name, attribute = VALIDATORS[format]
+    return getattr(importlib.import_module(module_name), attribute)
+
 
 # The regexs give us a best-guess for the encoding if none is specified.
 # They check to see if the document looks like it is probably a YAML object or
@@ -47,14 +65,10 @@ def validate(schema: typing.Union[dict, str, bytes], format: str=None, encoding:
                 position = typesystem.Position(line_no=1, column_no=1, char_index=0)
                 raise typesystem.ParseError(text=text, code=code, position=position)
 
-        tokenize = {
-            "yaml": typesystem.tokenize_yaml,
-            "json": typesystem.tokenize_json
-        }[encoding]
-        token = tokenize(schema)
-        value = token.value
+        # The content is parsed without keeping any token tree in memory.
+        # Positions for error messages are only found if validation fails.
+        value = parse(schema, encoding)
     else:
-        token = None
         value = schema
 
     if format is None:
@@ -63,16 +77,10 @@ def validate(schema: typing.Union[dict, str, bytes], format: str=None, encoding:
         elif "swagger" in value and "openapi" not in value:
              format = "swagger"
 
-    validator = {
-        "config": APISTAR_CONFIG,
-        "jsonschema": JSON_SCHEMA,
-        "openapi": OPEN_API,
-        "swagger": SWAGGER,
-        None: AUTO_DETERMINE
-    }[format]
+    validator = get_validator(format)
 
-    if token is not None:
-        value = typesystem.validate_with_positions(token=token, validator=validator)
+    if isinstance(schema, str):
+        value = validate_with_positions(value, schema, encoding, validator)
     else:
         value = validator.validate(value)
 
@@ -80,34 +88,143 @@ def validate(schema: typing.Union[dict, str, bytes], format: str=None, encoding:
         format = "swagger" if "swagger" in value else "openapi"
 
     if format == "swagger":
+        from apistar.schemas.swagger import Swagger
+
         return Swagger().load(value)
     elif format == "openapi":
+        from apistar.schemas.openapi import OpenAPI
+
         return OpenAPI().load(value)
     return value
 
 
-def docs(
-    schema,
-    format=None,
-    encoding=None,
-    theme="apistar",
-    schema_url=None,
-    static_url=None,
-):
+def get_environment(theme="apistar"):
+    """
+    Return the Jinja environment for rendering a documentation theme.
+
+    Environments are created once per theme, and keep their compiled
+    templates in memory. Compiled template bytecode is also cached on disk,
+    so that new processes can skip compiling the templates.
+    """
+    try:
+        return _environments[theme]
+    except KeyError:
+        pass
+
+    import jinja2
+
+    from apistar.cache import cache_enabled, get_cache_dir
+
+    with _environments_lock:
+        if theme not in _environments:
+            loader = jinja2.PrefixLoader(
+                {
+                    theme: jinja2.PackageLoader(
+                        "apistar", os.path.join("themes", theme, "templates")
+                    )
+                }
+            )
+            bytecode_cache = None
+            if cache_enabled():
+                directory = os.path.join(get_cache_dir(), "templates")
+                try:
+                    os.makedirs(directory, exist_ok=True)
+                except OSError:
+                    pass
+                else:
+                    bytecode_cache = jinja2.FileSystemBytecodeCache(directory)
+            env = jinja2.Environment(
+                autoescape=True,
+                loader=loader,
+                bytecode_cache=bytecode_cache,
+                auto_reload=False,
+            )
+            env.filters["highlight"] = jinja2.pass_context(_highlight_filter)
+            _environments[theme] = env
+        return _environments[theme]
+
+
+def _highlight_filter(context, value, lang):
+    """
+    Syntax highlight a code sample, if the docs are rendered with a
+    `code_style`. Otherwise the sample is left unchanged.
+    """
+    style = context.get("highlight_style")
+    if not style:
+        return value
+
+    from markupsafe import Markup
+
+    from apistar.cache import highlight
+
+    text = value.unescape() if isinstance(value, Markup) else str(value)
+    return Markup(highlight(text, lang, style))
+
+
+class LinkView:
+    """
+    The fields of a link that are used by the documentation templates, which
+    are computed once per link rather than on every use.
+    """
+
+    def __init__(self, link):
+        self.link = link
+        self.path_fields = link.get_path_fields()
+        self.query_fields = link.get_query_fields()
+        self.body_field = link.get_body_field()
+        self.expanded_body = link.get_expanded_body()
+
+
+def _render_context(code_style=None):
+    """
+    Return the template context shared by every page and fragment of a
+    single render, including a `link_view` function which memoizes the
+    `LinkView` for each link.
+    """
+    from apistar import compat
+
+    views = {}
+
+    def link_view(link):
+        view = views.get(id(link))
+        if view is None:
+            view = views[id(link)] = LinkView(link)
+        return view
+
+    if code_style is not None and compat.pygments is None:
+        # Highlighting is optional, and skipped without pygments installed.
+        code_style = None
+    return {
+        "langs": ["javascript", "python"],
+        "code_style": compat.pygments_css(code_style) if code_style else None,
+        "highlight_style": code_style,
+        "link_view": link_view,
+    }
+
+
+def prewarm(themes=None):
+    """
+    Load and compile every template for the given themes, or for all of the
+    built-in themes, so that later calls to `docs()` render immediately.
+    """
+    if themes is None:
+        themes = THEME_CHOICES
+    for theme in themes:
+        env = get_environment(theme)
+        for name in env.list_templates(extensions=["html"]):
+            env.get_template(name)
+
+
+def _load_docs_document(schema, format, encoding):
     if format not in [None, "openapi", "swagger"]:
         raise ValueError('format must be either "openapi" or "swagger"')
 
-    document = validate(schema, format=format, encoding=encoding)
+    if isinstance(schema, Document):
+        return schema
+    return validate(schema, format=format, encoding=encoding)
 
-    loader = jinja2.PrefixLoader(
-        {
-            theme: jinja2.PackageLoader(
-                "apistar", os.path.join("themes", theme, "templates")
-            )
-        }
-    )
-    env = jinja2.Environment(autoescape=True, loader=loader)
 
+def _static_url_func(static_url):
     if static_url is None:
 
         def static_url_func(path):
@@ -120,12 +237,217 @@ def docs(
 
     else:
         static_url_func = static_url
+    return static_url_func
+
+
+# The document being rendered, in each worker process of a parallel render.
+_worker_document = None
 
+
+def _init_fragment_worker(document):
+    global _worker_document
+    _worker_document = document
+
+
+def _render_fragments(theme, code_style, keys):
+    """
+    Render the link fragments for the given `(section_index, link_index)`
+    keys, in a worker process. A section index of `None` refers to the links
+    at the top level of the document.
+    """
+    document = _worker_document
+    sections = document.get_sections()
+    template = get_environment(theme).get_template(theme + "/layout/link.html")
+    context = _render_context(code_style)
+    fragments = []
+    for section_index, link_index in keys:
+        if section_index is None:
+            section = None
+            link = document.get_links()[link_index]
+        else:
+            section = sections[section_index]
+            link = section.get_links()[link_index]
+        fragments.append(
+            template.render(document=document, section=section, link=link, **context)
+        )
+    return fragments
+
+
+def render_link_fragments(document, theme="apistar", code_style=None, jobs=2):
+    """
+    Render the HTML for every link in the document using a pool of `jobs`
+    processes. Returns a dict of `(section_name, link_index)` to HTML, with
+    a section name of `None` for links at the top level of the document.
+
+    The fragments are identical to the output of including
+    'layout/link.html' in the page template, so that passing them to the
+    template as `link_fragments` gives the same page as a serial render.
+    """
+    import concurrent.futures
+
+    from markupsafe import Markup
+
+    names = []
+    keys = []
+    for link_index in range(len(document.get_links())):
+        names.append((None, link_index))
+        keys.append((None, link_index))
+    for section_index, section in enumerate(document.get_sections()):
+        for link_index in range(len(section.get_links())):
+            names.append((section.name, link_index))
+            keys.append((section_index, link_index))
+
+    # Several chunks per worker, so that large sections are spread out.
+    chunk_size = max(len(keys) // (jobs * 4), 1)
+    chunks = [keys[idx : idx + chunk_size] for idx in range(0, len(keys), chunk_size)]
+    fragments = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_fragment_worker, initargs=(document,)
+    ) as executor:
+        futures = [
+            executor.submit(_render_fragments, theme, code_style, chunk)
+            for chunk in chunks
+        ]
+        for future in futures:
+            fragments.extend(future.result())
+    return {name: Markup(html) for name, html in zip(names, fragments)}
+
+
+def _anchor(section=None, link=None):
+    if link is None:
+        return "#" + section.name
+    elif section is None:
+        return "#" + link.name
+    return "#%s-%s" % (section.name, link.name)
+
+
+def _section_pages(document):
+    """
+    Return a dict of section names to page filenames, for split output.
+    """
+    pages = {}
+    for section in document.get_sections():
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "-", section.name).strip("-") or "section"
+        filename = "section-%s.html" % slug
+        suffix = 2
+        while filename in pages.values():
+            filename = "section-%s-%d.html" % (slug, suffix)
+            suffix += 1
+        pages[section.name] = filename
+    return pages
+
+
+def split_url_for(document):
+    """
+    Return a `url_for(section, link)` function for the pages written by
+    `docs_pages()`.
+    """
+    section_pages = _section_pages(document)
+
+    def url_for(section=None, link=None):
+        page = "index.html" if section is None else section_pages[section.name]
+        return page + _anchor(section, link)
+
+    return url_for
+
+
+def docs(
+    schema,
+    format=None,
+    encoding=None,
+    theme="apistar",
+    schema_url=None,
+    static_url=None,
+    jobs=1,
+    code_style=None,
+    search_url=None,
+):
+    document = _load_docs_document(schema, format, encoding)
+    env = get_environment(theme)
     template = env.get_template(theme + "/index.html")
     return template.render(
         document=document,
-        langs=["javascript", "python"],
-        code_style=None,
-        static_url=static_url_func,
+        static_url=_static_url_func(static_url),
         schema_url=schema_url,
+        search_url=search_url,
+        sections=document.get_sections(),
+        links=document.get_links(),
+        current_section=None,
+        split=False,
+        url_for=_anchor,
+        link_fragments=_link_fragments(document, theme, jobs, code_style),
+        **_render_context(code_style)
+    )
+
+
+def _link_fragments(document, theme, jobs, code_style):
+    # Only the "apistar" theme renders links server side.
+    if jobs <= 1 or theme != "apistar":
+        return None
+    return render_link_fragments(
+        document, theme=theme, code_style=code_style, jobs=jobs
+    )
+
+
+def docs_pages(
+    schema,
+    format=None,
+    encoding=None,
+    theme="apistar",
+    schema_url=None,
+    static_url=None,
+    jobs=1,
+    code_style=None,
+    search_url=None,
+):
+    """
+    Render the documentation as one page per section, plus an index page
+    with any links that are not in a section. Returns a dict of filenames to
+    HTML. Each page only includes the links for its own section, so the size
+    of each page does not grow with the number of sections.
+
+    Only the "apistar" theme supports multiple pages. Other themes render the
+    whole document client side, and return a single "index.html".
+
+    With `jobs` greater than one, the links are rendered in parallel using a
+    pool of processes, giving the same output as a serial render.
+    """
+    document = _load_docs_document(schema, format, encoding)
+    if theme != "apistar":
+        index_html = docs(
+            document,
+            theme=theme,
+            schema_url=schema_url,
+            static_url=static_url,
+            jobs=jobs,
+            code_style=code_style,
+            search_url=search_url,
+        )
+        return {"index.html": index_html}
+
+    section_pages = _section_pages(document)
+    url_for = split_url_for(document)
+    env = get_environment(theme)
+    template = env.get_template(theme + "/index.html")
+    context = _render_context(code_style)
+    context.update(
+        {
+            "document": document,
+            "static_url": _static_url_func(static_url),
+            "schema_url": schema_url,
+            "search_url": search_url,
+            "split": True,
+            "url_for": url_for,
+            "link_fragments": _link_fragments(document, theme, jobs, code_style),
+        }
     )
+    pages = {
+        "index.html": template.render(
+            sections=[], links=document.get_links(), current_section=None, **context
+        )
+    }
+    for section in document.get_sections():
+        pages[section_pages[section.name]] = template.render(
+            sections=[section], links=[], current_section=section, **context
+        )
+    return pages
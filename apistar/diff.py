@@ -0,0 +1,419 @@
+"""
+Structural comparison of two OpenAPI or Swagger schemas, for `apistar diff`.
+
+Both schemas are hashed as Merkle trees, where the hash of each object or
+array is computed from the hashes of its items. Comparing two schemas then
+only descends into the parts whose hashes differ, so that everything that is
+unchanged is skipped after comparing a single hash. Hashing is a single pass
+over each schema, and the comparison itself scales with the size of the
+change.
+
+Changes are reported for operations, their parameters, request bodies and
+responses, and for component schemas. Changes to shared parameters, request
+bodies and responses are reported against each operation that references
+them. Changes that may break existing clients, such as removing an operation
+or adding a required parameter, are flagged as breaking.
+"""
+import collections
+import hashlib
+
+METHODS = ["get", "put", "post", "delete", "options", "head", "patch", "trace"]
+# The sections holding parameters, request bodies and responses that may be
+# referenced by operations.
+OPENAPI_REFERENCED = [
+    ["components", "parameters"],
+    ["components", "requestBodies"],
+    ["components", "responses"],
+]
+SWAGGER_REFERENCED = [["parameters"], ["responses"]]
+
+Change = collections.namedtuple("Change", ["kind", "location", "message", "breaking"])
+
+
+def merkle_hash(value, hashes):
+    """
+    Return the hash of a JSON value. The hash of every object and array
+    within it is stored in `hashes`, keyed by `id()`.
+    """
+    if isinstance(value, dict):
+        digest = hashlib.blake2b(b"{", digest_size=16)
+        for key in sorted(value, key=str):
+            digest.update(repr(key).encode("utf-8"))
+            digest.update(merkle_hash(value[key], hashes))
+    elif isinstance(value, list):
+        digest = hashlib.blake2b(b"[", digest_size=16)
+        for item in value:
+            digest.update(merkle_hash(item, hashes))
+    else:
+        return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=16).digest()
+    hashes[id(value)] = digest.digest()
+    return hashes[id(value)]
+
+
+def lookup(value, keys, default=None):
+    for key in keys:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return value
+
+
+def _mapping(value):
+    return value if isinstance(value, dict) else {}
+
+
+def _union(old, new):
+    """
+    Return the keys of both mappings, in the order they appear in `new`,
+    followed by any removed keys in the order they appeared in `old`.
+    """
+    return list(new) + [key for key in old if key not in new]
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _describe(value):
+    if isinstance(value, str):
+        return '"%s"' % value
+    return repr(value)
+
+
+class Differ:
+    """
+    Compares two schemas. See `diff()`.
+    """
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.old_hashes = {}
+        self.new_hashes = {}
+        merkle_hash(old, self.old_hashes)
+        merkle_hash(new, self.new_hashes)
+        self.swagger = "swagger" in new
+        self.changes = []
+
+    def same(self, old, new):
+        if not isinstance(old, (dict, list)) or not isinstance(new, (dict, list)):
+            return old == new
+        old_hash = self.old_hashes.get(id(old))
+        new_hash = self.new_hashes.get(id(new))
+        if old_hash is None or new_hash is None:
+            # A value built during the comparison, rather than part of either
+            # schema, isn't stored, since its id may later be reused.
+            return merkle_hash(old, {}) == merkle_hash(new, {})
+        return old_hash == new_hash
+
+    def add(self, kind, location, message, breaking=False):
+        self.changes.append(Change(kind, location, message, breaking))
+
+    def diff(self):
+        if self.same(self.old, self.new):
+            return self.changes
+        self.diff_operations()
+        if self.swagger:
+            schemas = ["definitions"]
+        else:
+            schemas = ["components", "schemas"]
+        self.diff_schemas(lookup(self.old, schemas), lookup(self.new, schemas))
+        return self.changes
+
+    def changed_references(self):
+        """
+        Return the references to any shared parameters, request bodies or
+        responses that have changed.
+        """
+        changed = set()
+        sections = SWAGGER_REFERENCED if self.swagger else OPENAPI_REFERENCED
+        for keys in sections:
+            old_section = _mapping(lookup(self.old, keys))
+            new_section = _mapping(lookup(self.new, keys))
+            if self.same(old_section, new_section):
+                continue
+            for name in _union(old_section, new_section):
+                if not self.same(old_section.get(name), new_section.get(name)):
+                    pointer = "/".join([_escape(key) for key in keys + [name]])
+                    changed.add("#/" + pointer)
+        return changed
+
+    def references(self, path_info, operation_info):
+        """
+        Return the references used by an operation's parameters, request body
+        and responses.
+        """
+        values = []
+        for items in [path_info.get("parameters"), operation_info.get("parameters")]:
+            values += items if isinstance(items, list) else []
+        values.append(operation_info.get("requestBody"))
+        values += _mapping(operation_info.get("responses")).values()
+        return {
+            value["$ref"]
+            for value in values
+            if isinstance(value, dict) and isinstance(value.get("$ref"), str)
+        }
+
+    def diff_operations(self):
+        old_paths = _mapping(self.old.get("paths"))
+        new_paths = _mapping(self.new.get("paths"))
+        changed_references = self.changed_references()
+        if self.same(old_paths, new_paths) and not changed_references:
+            return
+
+        for path in _union(old_paths, new_paths):
+            old_path = _mapping(old_paths.get(path))
+            new_path = _mapping(new_paths.get(path))
+            if self.same(old_path, new_path) and not changed_references:
+                continue
+            for method in METHODS:
+                old_operation = old_path.get(method)
+                new_operation = new_path.get(method)
+                location = "%s %s" % (method.upper(), path)
+                if old_operation is None and new_operation is None:
+                    continue
+                elif old_operation is None:
+                    self.add("added", location, "Operation added.")
+                elif new_operation is None:
+                    self.add("removed", location, "Operation removed.", breaking=True)
+                elif (
+                    not self.same(old_operation, new_operation)
+                    or not self.same(
+                        old_path.get("parameters"), new_path.get("parameters")
+                    )
+                    or not changed_references.isdisjoint(
+                        self.references(new_path, new_operation)
+                    )
+                ):
+                    self.diff_operation(
+                        location, old_path, new_path, old_operation, new_operation
+                    )
+
+    def resolve(self, root, value):
+        """
+        Follow a local reference to a parameter, request body or response.
+        """
+        ref = value.get("$ref") if isinstance(value, dict) else None
+        if not isinstance(ref, str) or not ref.startswith("#/"):
+            return value
+        keys = ref[2:].split("/")
+        return lookup(root, [key.replace("~1", "/").replace("~0", "~") for key in keys])
+
+    def parameters(self, root, path_info, operation_info):
+        """
+        Return the parameters of an operation, keyed by location and name.
+        """
+        parameters = {}
+        for items in [path_info.get("parameters"), operation_info.get("parameters")]:
+            for parameter in items if isinstance(items, list) else []:
+                parameter = self.resolve(root, parameter)
+                if isinstance(parameter, dict):
+                    key = (parameter.get("in"), parameter.get("name"))
+                    parameters[key] = parameter
+        return parameters
+
+    def diff_operation(
+        self, location, old_path, new_path, old_operation, new_operation
+    ):
+        old_parameters = self.parameters(self.old, old_path, old_operation)
+        new_parameters = self.parameters(self.new, new_path, new_operation)
+        for key in _union(old_parameters, new_parameters):
+            old_parameter = old_parameters.get(key)
+            new_parameter = new_parameters.get(key)
+            name = "Parameter '%s' (in %s)" % (key[1], key[0])
+            if old_parameter is None:
+                required = bool(new_parameter.get("required"))
+                message = "%s added%s." % (name, " as required" if required else "")
+                self.add("added", location, message, breaking=required)
+            elif new_parameter is None:
+                self.add("removed", location, "%s removed." % name, breaking=True)
+            elif not self.same(old_parameter, new_parameter):
+                self.diff_parameter(location, name, old_parameter, new_parameter)
+
+        if not self.swagger:
+            old_body = self.resolve(self.old, old_operation.get("requestBody"))
+            new_body = self.resolve(self.new, new_operation.get("requestBody"))
+            self.diff_request_body(location, old_body, new_body)
+        self.diff_responses(location, old_operation, new_operation)
+
+        for key in ["operationId", "deprecated"]:
+            old_value = old_operation.get(key)
+            new_value = new_operation.get(key)
+            if old_value != new_value:
+                message = "%s changed from %s to %s." % (
+                    key,
+                    _describe(old_value),
+                    _describe(new_value),
+                )
+                self.add("changed", location, message, breaking=key == "operationId")
+
+    def diff_parameter(self, location, name, old_parameter, new_parameter):
+        if not old_parameter.get("required") and new_parameter.get("required"):
+            self.add("changed", location, "%s is now required." % name, True)
+        elif old_parameter.get("required") and not new_parameter.get("required"):
+            self.add("changed", location, "%s is now optional." % name)
+        if self.swagger and old_parameter.get("in") != "body":
+            # Swagger describes the type of other parameters inline.
+            keys = ["type", "format", "enum", "items"]
+            old_schema = {key: old_parameter.get(key) for key in keys}
+            new_schema = {key: new_parameter.get(key) for key in keys}
+        else:
+            old_schema = old_parameter.get("schema")
+            new_schema = new_parameter.get("schema")
+        self.diff_schema(location, name, old_schema, new_schema)
+
+    def diff_request_body(self, location, old_body, new_body):
+        if old_body is None and new_body is not None:
+            required = bool(new_body.get("required"))
+            message = "Request body added%s." % (" as required" if required else "")
+            self.add("added", location, message, breaking=required)
+        elif new_body is None and old_body is not None:
+            self.add("removed", location, "Request body removed.", breaking=True)
+        elif not self.same(old_body, new_body):
+            if not old_body.get("required") and new_body.get("required"):
+                self.add("changed", location, "Request body is now required.", True)
+            self.diff_content(location, "Request body", old_body, new_body)
+
+    def diff_content(self, location, name, old, new):
+        old_content = _mapping(old.get("content"))
+        new_content = _mapping(new.get("content"))
+        for media_type in _union(old_content, new_content):
+            self.diff_schema(
+                location,
+                "%s (%s)" % (name, media_type),
+                lookup(old_content, [media_type, "schema"]),
+                lookup(new_content, [media_type, "schema"]),
+            )
+
+    def diff_responses(self, location, old_operation, new_operation):
+        old_responses = _mapping(old_operation.get("responses"))
+        new_responses = _mapping(new_operation.get("responses"))
+        for status in _union(old_responses, new_responses):
+            name = "Response %s" % status
+            old_response = self.resolve(self.old, old_responses.get(status))
+            new_response = self.resolve(self.new, new_responses.get(status))
+            if old_response is None:
+                self.add("added", location, "%s added." % name)
+            elif new_response is None:
+                self.add("removed", location, "%s removed." % name, breaking=True)
+            elif self.same(old_response, new_response):
+                continue
+            elif self.swagger:
+                old_schema = old_response.get("schema")
+                new_schema = new_response.get("schema")
+                self.diff_schema(location, name, old_schema, new_schema)
+            else:
+                self.diff_content(location, name, old_response, new_response)
+
+    def diff_schemas(self, old_schemas, new_schemas):
+        old_schemas = _mapping(old_schemas)
+        new_schemas = _mapping(new_schemas)
+        if self.same(old_schemas, new_schemas):
+            return
+        for name in _union(old_schemas, new_schemas):
+            location = "Schema '%s'" % name
+            if name not in old_schemas:
+                self.add("added", location, "Schema added.")
+            elif name not in new_schemas:
+                self.add("removed", location, "Schema removed.", breaking=True)
+            else:
+                self.diff_schema(
+                    location, "Schema", old_schemas[name], new_schemas[name]
+                )
+
+    def diff_schema(self, location, name, old, new):
+        """
+        Compare two JSON schemas, descending only into differing properties
+        and items.
+        """
+        if self.same(old, new):
+            return
+        if old is None:
+            self.add("added", location, "%s schema added." % name)
+            return
+        if new is None:
+            self.add("removed", location, "%s schema removed." % name, True)
+            return
+        old = _mapping(old)
+        new = _mapping(new)
+
+        if old.get("$ref") != new.get("$ref"):
+            message = "%s changed from %s to %s." % (
+                name,
+                _describe(old.get("$ref", "an inline schema")),
+                _describe(new.get("$ref", "an inline schema")),
+            )
+            self.add("changed", location, message, breaking=True)
+            return
+
+        if old.get("type") != new.get("type"):
+            message = "%s type changed from %s to %s." % (
+                name,
+                _describe(old.get("type")),
+                _describe(new.get("type")),
+            )
+            self.add("changed", location, message, breaking=True)
+
+        old_enum = old.get("enum")
+        new_enum = new.get("enum")
+        if isinstance(old_enum, list) and isinstance(new_enum, list):
+            removed = [item for item in old_enum if item not in new_enum]
+            if removed:
+                message = "%s no longer allows %s." % (
+                    name,
+                    ", ".join([_describe(item) for item in removed]),
+                )
+                self.add("changed", location, message, breaking=True)
+        elif old_enum is None and new_enum is not None:
+            self.add("changed", location, "%s is now an enum." % name, True)
+
+        old_required = set(old.get("required") or [])
+        new_required = set(new.get("required") or [])
+        old_properties = _mapping(old.get("properties"))
+        new_properties = _mapping(new.get("properties"))
+        for key in _union(old_properties, new_properties):
+            property_name = "%s property '%s'" % (name, key)
+            if key not in old_properties:
+                required = key in new_required
+                message = "%s added%s." % (
+                    property_name,
+                    " as required" if required else "",
+                )
+                self.add("added", location, message, breaking=required)
+            elif key not in new_properties:
+                self.add("removed", location, "%s removed." % property_name, True)
+            else:
+                if key in new_required and key not in old_required:
+                    message = "%s is now required." % property_name
+                    self.add("changed", location, message, breaking=True)
+                self.diff_schema(
+                    location, property_name, old_properties[key], new_properties[key]
+                )
+        for key in sorted(new_required - old_required):
+            if key not in new_properties:
+                message = "%s requires property '%s'." % (name, key)
+                self.add("changed", location, message, breaking=True)
+
+        self.diff_schema(
+            location, "%s items" % name, old.get("items"), new.get("items")
+        )
+
+        handled = {"type", "enum", "required", "properties", "items", "$ref"}
+        others = [
+            key
+            for key in _union(old, new)
+            if key not in handled and not self.same(old.get(key), new.get(key))
+        ]
+        if others:
+            message = "%s changed (%s)." % (name, ", ".join(others))
+            self.add("changed", location, message)
+
+
+def diff(old, new):
+    """
+    Compare two OpenAPI or Swagger schemas, given as dicts, and return a
+    list of `Change(kind, location, message, breaking)` tuples, where `kind`
+    is one of "added", "removed" or "changed".
+    """
+    return Differ(old, new).diff()
@@ -35,6 +35,19 @@ class Document:
         self.description = description
         self.version = version
 
+    @classmethod
+    def load_compiled(cls, compiled, schema=None):
+        """
+        Return a document from the output of `apistar compile`, given as a
+        path or a bytestring. If the `schema` it was compiled from is given,
+        the compiled document must be up to date with it.
+
+        Raises `CompiledDocumentError` if the document cannot be loaded.
+        """
+        from apistar.compiled import load
+
+        return load(compiled, source=schema)
+
     def get_links(self):
         return [item for item in self.content if isinstance(item, Link)]
 
@@ -115,6 +128,7 @@ class Link:
         title: str = "",
         description: str = "",
         fields: typing.Sequence["Field"] = None,
+        pagination: dict = None,
     ):
         method = method.upper()
         fields = [] if (fields is None) else list(fields)
@@ -156,6 +170,7 @@ class Link:
         self.title = title
         self.description = description
         self.fields = fields
+        self.pagination = pagination
 
     def get_path_fields(self):
         return [field for field in self.fields if field.location == "path"]
@@ -204,8 +219,29 @@ class Field:
 
 class Response:
     def __init__(
-        self, encoding: str, status_code: int = 200, schema: typing.Any = None
+        self,
+        encoding: str,
+        status_code: int = 200,
+        schema: typing.Any = None,
+        example: typing.Any = None,
+        json_schema: dict = None,
+        inline_schemas: typing.Any = None,
     ):
         self.encoding = encoding
         self.status_code = status_code
-        self.schema = schema
+        self.example = example
+        # An inline JSON schema is only converted to a typesystem field when
+        # `schema` is first accessed, since most clients never use it.
+        self.json_schema = json_schema
+        self.inline_schemas = inline_schemas
+        self._schema = schema
+
+    @property
+    def schema(self):
+        if self._schema is None and self.json_schema is not None:
+            self._schema = self.inline_schemas.get(self.json_schema)
+        return self._schema
+
+    @schema.setter
+    def schema(self, value):
+        self._schema = value
@@ -72,3 +72,10 @@ class ClientError(Exception):
     def __init__(self, messages):
         self.messages = messages
         super().__init__(messages)
+
+
+class CompiledDocumentError(Exception):
+    """
+    Raised when a compiled document cannot be loaded, because it is invalid,
+    was compiled by a different version, or is out of date with its schema.
+    """
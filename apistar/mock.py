@@ -0,0 +1,252 @@
+"""
+A schema driven mock server, for load testing API clients.
+
+`MockApp` is an ASGI application that routes requests by the URL template
+and method of each `Link` in a document. Responses are taken from the
+examples in the schema, or generated from the response schema. All response
+bodies are rendered once up front, so that serving a request does no more
+work than matching the route.
+"""
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+from urllib.parse import urlsplit
+
+import typesystem
+from typesystem.composites import AllOf, OneOf
+from typesystem.fields import Const
+
+MAX_DEPTH = 8
+
+
+def generate_value(schema, depth=0):
+    """
+    Return an example value that is valid against the given typesystem field.
+    """
+    if schema is None or depth > MAX_DEPTH:
+        return None
+    if schema.has_default() and schema.get_default_value() not in ("", None):
+        return schema.get_default_value()
+
+    if isinstance(schema, typesystem.Reference):
+        return generate_value(schema.target, depth + 1)
+    elif isinstance(schema, typesystem.Union):
+        return generate_value(schema.any_of[0], depth + 1)
+    elif isinstance(schema, OneOf):
+        return generate_value(schema.one_of[0], depth + 1)
+    elif isinstance(schema, AllOf):
+        value = None
+        for item in schema.all_of:
+            item_value = generate_value(item, depth + 1)
+            if isinstance(value, dict) and isinstance(item_value, dict):
+                value.update(item_value)
+            elif value is None:
+                value = item_value
+        return value
+    elif isinstance(schema, Const):
+        return schema.const
+    elif isinstance(schema, typesystem.Choice):
+        return schema.choices[0][0] if schema.choices else None
+    elif isinstance(schema, typesystem.Boolean):
+        return True
+    elif isinstance(schema, typesystem.Number):
+        value = 1 if schema.minimum is None else schema.minimum
+        if schema.exclusive_minimum is not None:
+            value = schema.exclusive_minimum + 1
+        if schema.maximum is not None:
+            value = min(value, schema.maximum)
+        if isinstance(schema, typesystem.Integer):
+            return int(value)
+        return float(value)
+    elif isinstance(schema, typesystem.String):
+        return {
+            "date": "2000-01-01",
+            "time": "12:00:00",
+            "datetime": "2000-01-01T12:00:00Z",
+            "date-time": "2000-01-01T12:00:00Z",
+            "uuid": "00000000-0000-0000-0000-000000000000",
+            "email": "user@example.com",
+            "url": "https://example.com/",
+            "uri": "https://example.com/",
+        }.get(schema.format, "x" * max(schema.min_length or 0, 6))
+    elif isinstance(schema, typesystem.Object):
+        return {
+            key: generate_value(value, depth + 1)
+            for key, value in schema.properties.items()
+        }
+    elif isinstance(schema, typesystem.Array):
+        items = schema.items
+        if isinstance(items, list):
+            return [generate_value(item, depth + 1) for item in items]
+        return [generate_value(items, depth + 1)] * max(schema.min_items or 0, 1)
+    return None
+
+
+def _encode(value, encoding):
+    if isinstance(value, bytes):
+        return value
+    if "json" in encoding:
+        if isinstance(value, str):
+            # Swagger examples are frequently given as JSON strings.
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        return json.dumps(value).encode("utf-8")
+    return str(value).encode("utf-8")
+
+
+def _route_pattern(url):
+    path = urlsplit(url).path or "/"
+    pattern = ""
+    for token in re.split(r"({\+?[^}]*})", path):
+        if token.startswith("{+"):
+            pattern += ".+"
+        elif token.startswith("{"):
+            pattern += "[^/]+"
+        else:
+            pattern += re.escape(token)
+    return re.compile("^" + pattern + "$")
+
+
+def _select(methods, method):
+    if method == "HEAD" and "GET" in methods:
+        return methods["GET"]
+    return methods.get(method)
+
+
+class MockApp:
+    def __init__(
+        self, document, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_body = json.dumps({"error": "Injected error."}).encode("utf-8")
+
+        # Routes without any path parameters are matched with a dict lookup.
+        # The remainder are indexed by the number of segments in their path,
+        # except for those with a `{+name}` parameter that may span several
+        # segments, which are always checked.
+        self.static_routes = {}
+        self.dynamic_routes = {}
+        self.variable_routes = []
+        for link_info in document.walk_links():
+            link = link_info.link
+            route = self.get_route(link)
+            path = urlsplit(link.url).path or "/"
+            if not re.search("{[^}]*}", link.url):
+                self.static_routes.setdefault(path, {})[link.method] = route
+            elif "{+" in path:
+                pattern = _route_pattern(link.url)
+                self.variable_routes.append((pattern, link.method, route))
+            else:
+                pattern = _route_pattern(link.url)
+                routes = self.dynamic_routes.setdefault(path.count("/"), [])
+                routes.append((pattern, link.method, route))
+
+    def get_route(self, link):
+        """
+        Return a `(status_code, headers, body)` tuple, for responding to
+        requests to the given link.
+        """
+        response = link.response
+        if response is None or not response.encoding:
+            status_code = 200 if response is None else response.status_code
+            if status_code == 204:
+                return (status_code, [], b"")
+            return (status_code, [(b"content-type", b"application/json")], b"null")
+
+        if response.example is not None:
+            value = response.example
+        else:
+            try:
+                value = generate_value(response.schema)
+            except Exception:
+                # Response schemas are only converted when first used, and
+                # one that typesystem cannot handle falls back to a null body.
+                value = None
+        body = _encode(value, response.encoding)
+        headers = [(b"content-type", response.encoding.encode("latin-1"))]
+        return (response.status_code, headers, body)
+
+    def lookup(self, method, path):
+        static_methods = self.static_routes.get(path, {})
+        route = _select(static_methods, method)
+        if route is not None:
+            return route
+
+        # A static path may also match a URL template with other methods.
+        methods = {}
+        candidates = itertools.chain(
+            self.dynamic_routes.get(path.count("/"), ()), self.variable_routes
+        )
+        for pattern, route_method, route in candidates:
+            if pattern.match(path):
+                methods.setdefault(route_method, route)
+        route = _select(methods, method)
+        if route is not None:
+            return route
+
+        headers = [(b"content-type", b"application/json")]
+        if not static_methods and not methods:
+            return (404, headers, b'"Not found."')
+        return (405, headers, b'"Method not allowed."')
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        assert scope["type"] == "http"
+
+        # Consume the request body.
+        more_body = True
+        while more_body:
+            message = await receive()
+            more_body = message.get("more_body", False)
+
+        status_code, headers, body = self.lookup(scope["method"], scope["path"])
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+        if self.error_rate and random.random() < self.error_rate:
+            status_code = self.error_status
+            headers = [(b"content-type", b"application/json")]
+            body = self.error_body
+
+        headers = headers + [(b"content-length", str(len(body)).encode("latin-1"))]
+        if scope["method"] == "HEAD":
+            body = b""
+        await send(
+            {"type": "http.response.start", "status": status_code, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def app_from_environ():
+    """
+    Return a `MockApp` configured by the `APISTAR_MOCK_CONFIG` environment
+    variable. Used by `apistar mock` to start multiple worker processes.
+    """
+    from apistar.cache import load_document
+
+    config = json.loads(os.environ["APISTAR_MOCK_CONFIG"])
+    document = load_document(
+        config["path"], format=config["format"], encoding=config["encoding"]
+    )
+    return MockApp(
+        document,
+        latency=config["latency"],
+        jitter=config["jitter"],
+        error_rate=config["error_rate"],
+        error_status=config["error_status"],
+    )
@@ -0,0 +1,173 @@
+"""
+Parsing schema content, and reporting validation errors with positions.
+
+Validation errors are reported with the line and column of the value that
+caused them, which requires knowing where each value is in the content. The
+typesystem tokenizers provide this with a tree of token objects, which takes
+several times as much memory as the parsed value itself.
+
+Instead, schema content is parsed directly into a plain value. Only if
+validation fails is the content tokenized, to build a `PositionIndex`: a
+compact mapping of the JSON pointer of each value to its start and end
+offsets, held in arrays. The token tree is discarded once the index is built.
+Positions are calculated in the same way as by the typesystem tokens, so that
+error messages are unchanged.
+"""
+import array
+import bisect
+import json
+import re
+
+import typesystem
+from typesystem.tokenize.tokens import DictToken, ListToken
+
+TOKENIZERS = {"json": typesystem.tokenize_json, "yaml": typesystem.tokenize_yaml}
+# The line boundaries recognised by `str.splitlines()`.
+LINE_BREAK = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _reject_constant(name):
+    # The typesystem tokenizer does not accept "NaN", "Infinity" or
+    # "-Infinity", which `json.loads()` does by default.
+    raise ValueError("Invalid JSON constant %r." % name)
+
+
+def parse(content, encoding):
+    """
+    Parse JSON or YAML content into a plain value.
+
+    Raises `typesystem.ParseError` if the content is invalid, with the same
+    message and position as the typesystem tokenizers.
+    """
+    if content.strip() and encoding == "json":
+        try:
+            return json.loads(content, parse_constant=_reject_constant)
+        except ValueError:
+            pass
+    elif content.strip():
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        try:
+            return yaml.load(content, Loader=loader)
+        except yaml.YAMLError:
+            pass
+    # Tokenize the content to raise a `ParseError` with its position, or for
+    # anything that the tokenizers accept but the faster parsers do not.
+    return TOKENIZERS[encoding](content).value
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def pointer(index):
+    """
+    Return the JSON pointer for an index, such as `["paths", "/users/"]`.
+    """
+    return "".join("/" + _escape(key) for key in index)
+
+
+class PositionIndex:
+    """
+    The start and end offsets of every value in JSON or YAML content, keyed
+    by JSON pointer.
+    """
+
+    def __init__(self, content, encoding):
+        self.content = content
+        self.slots = {}
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.add(TOKENIZERS[encoding](content), "")
+        self.line_breaks = None
+
+    def add(self, token, path):
+        self.slots[path] = len(self.starts)
+        self.starts.append(token._start_index)
+        self.ends.append(token._end_index)
+        if isinstance(token, DictToken):
+            for key, child in token._value.items():
+                self.add(child, path + "/" + _escape(key._value))
+        elif isinstance(token, ListToken):
+            for idx, child in enumerate(token._value):
+                self.add(child, "%s/%d" % (path, idx))
+
+    def lookup(self, index):
+        """
+        Return the `(start, end)` positions of the value at an index. Raises
+        `KeyError` if there is no value at that index.
+        """
+        slot = self.slots[pointer(index)]
+        return (self.position(self.starts[slot]), self.position(self.ends[slot]))
+
+    def nearest(self, index):
+        """
+        Return the `(start, end)` positions of the value at an index, or of
+        the nearest value that encloses it.
+        """
+        for length in range(len(index), 0, -1):
+            try:
+                return self.lookup(index[:length])
+            except KeyError:
+                continue
+        return self.lookup([])
+
+    def position(self, char_index):
+        """
+        Return the `Position` of a character, numbered the same way as by
+        `typesystem` tokens.
+        """
+        if self.line_breaks is None:
+            self.line_breaks = [
+                match.span() for match in LINE_BREAK.finditer(self.content)
+            ]
+        # Count the line breaks that start at or before this character. A
+        # "\r\n" line break already ends the line at its "\r".
+        count = bisect.bisect_right(self.line_breaks, (char_index, float("inf")))
+        line_start = self.line_breaks[count - 1][1] if count else 0
+        line_end = char_index + 1
+        if line_start < line_end:
+            line_no = count + 1
+            column_no = line_end - line_start
+        elif count:
+            # The character is itself a line break.
+            previous = self.line_breaks[count - 2][1] if count > 1 else 0
+            line_no = count
+            column_no = self.line_breaks[count - 1][0] - previous
+        else:
+            line_no = 1
+            column_no = 1
+        return typesystem.Position(
+            line_no=max(line_no, 1), column_no=max(column_no, 1), char_index=char_index
+        )
+
+
+def validate_with_positions(value, content, encoding, validator):
+    """
+    Validate a value parsed from `content`. If validation fails, the error
+    messages are given the positions of the values that caused them.
+    """
+    try:
+        return validator.validate(value)
+    except typesystem.ValidationError as exc:
+        index = PositionIndex(content, encoding)
+        messages = []
+        for message in exc.messages():
+            if message.code == "required":
+                start, end = index.nearest(message.index[:-1])
+                text = "The field %r is required." % message.index[-1]
+            else:
+                start, end = index.nearest(message.index)
+                text = message.text
+            messages.append(
+                typesystem.Message(
+                    text=text,
+                    code=message.code,
+                    index=message.index,
+                    start_position=start,
+                    end_position=end,
+                )
+            )
+        messages.sort(key=lambda message: message.start_position.char_index)
+        raise typesystem.ValidationError(messages=messages) from None
@@ -0,0 +1,375 @@
+"""
+Resolving `$ref` references across multiple schema files.
+
+Large schemas are often split into several files, which refer to each other
+with relative file references such as `$ref: "schemas/pet.yaml#/Pet"`. The
+schema loaders only understand references to the components of a single
+document, so `bundle()` combines a schema and every file it refers to into a
+single document with the same meaning:
+
+* References to the root document's own components are left as-is.
+* Schemas in other files are added to the root document's
+  `components/schemas` (or `definitions`, for Swagger), and referred to
+  there. Recursive schemas are supported.
+* Any other reference is replaced by a copy of its target.
+
+Each file is read once, and each resolved reference is memoized. Circular
+references that cannot be represented in a single document are reported as
+errors, as are references that cannot be resolved. Remote references are not
+supported.
+"""
+import json
+import os
+import re
+from urllib.parse import unquote
+
+import typesystem
+
+from apistar.positions import PositionIndex
+
+# The value of every `$ref` in a JSON or YAML document, for a quick check of
+# whether a schema needs bundling before it is loaded.
+REF_VALUE = re.compile(r"""["']?\$ref["']?\s*:\s*["']?([^"'\s,}]*)""")
+# References that the schema loaders resolve by themselves.
+COMPONENT_REF = re.compile(
+    r"^#/(components/[A-Za-z]+|definitions|parameters|responses)/[^/]+$"
+)
+REMOTE_REF = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+# Keys whose values are JSON schemas.
+SCHEMA_KEYS = {"schema", "schemas", "definitions"}
+
+
+def needs_bundle(content):
+    """
+    Return `True` if the schema content includes any references that the
+    schema loaders cannot resolve by themselves.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "ignore")
+    if "$ref" not in content:
+        return False
+    return any(not COMPONENT_REF.match(ref) for ref in REF_VALUE.findall(content))
+
+
+def _parse(content, path):
+    if path.endswith(".json"):
+        return json.loads(content.decode("utf-8"))
+
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError as exc:
+        raise ValueError(str(exc)) from None
+
+
+def _split_pointer(pointer):
+    if pointer in ("", "/"):
+        return []
+    if not pointer.startswith("/"):
+        raise LookupError("JSON pointers must start with '/'.")
+    return [
+        part.replace("~1", "/").replace("~0", "~")
+        for part in unquote(pointer[1:]).split("/")
+    ]
+
+
+class Resolver:
+    """
+    Loads schema files and resolves references between them. Each file is
+    loaded once, and every resolved target is memoized.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.targets = {}
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        if path not in self.files:
+            with open(path, "rb") as schema_file:
+                self.files[path] = _parse(schema_file.read(), path)
+        return self.files[path]
+
+    def locate(self, ref, base_path):
+        """
+        Return the `(path, pointer)` that a reference in `base_path` refers to.
+        """
+        if REMOTE_REF.match(ref):
+            raise LookupError("Remote references are not supported.")
+        file_part, _, pointer = ref.partition("#")
+        if not file_part:
+            return (base_path, pointer)
+        directory = os.path.dirname(base_path)
+        path = os.path.normpath(os.path.join(directory, unquote(file_part)))
+        return (path, pointer)
+
+    def resolve(self, path, pointer):
+        """
+        Return the value at a JSON pointer in a schema file.
+        """
+        key = (path, pointer)
+        if key not in self.targets:
+            value = self.load(path)
+            for part in _split_pointer(pointer):
+                if isinstance(value, list) and part.isdigit():
+                    value = value[int(part)]
+                elif isinstance(value, dict):
+                    value = value[part]
+                else:
+                    raise KeyError(part)
+            self.targets[key] = value
+        return self.targets[key]
+
+
+class Bundler:
+    """
+    Combines a schema file and the files that it refers to into a single
+    document. See `bundle()`.
+    """
+
+    def __init__(self, path, resolver=None):
+        self.resolver = Resolver() if resolver is None else resolver
+        self.root_path = os.path.abspath(path)
+        self.root = self.resolver.load(self.root_path)
+        if not isinstance(self.root, dict):
+            raise self.error("The schema must be an object.", "invalid_type", [])
+        if "swagger" in self.root:
+            self.schemas_index = ["definitions"]
+        else:
+            self.schemas_index = ["components", "schemas"]
+        existing = self.root
+        for key in self.schemas_index:
+            existing = existing.get(key) if isinstance(existing, dict) else None
+        self.names = set(existing or {})
+        # Maps `(path, pointer)` to the local reference of a hoisted schema.
+        self.hoisted = {}
+        self.schemas = {}
+        # Inlined references, and those currently being inlined.
+        self.inlined = {}
+        self.inlining = []
+
+    def bundle(self):
+        bundled = self.walk(self.root, self.root_path, [], [], False)
+        if self.schemas:
+            parent = bundled
+            for key in self.schemas_index:
+                parent = parent.setdefault(key, {})
+            parent.update(self.schemas)
+        return bundled
+
+    def walk(self, value, path, index, origin, in_schema):
+        """
+        Return a copy of `value`, from the file at `path`, with references
+        resolved. `index` is the location within the root document, or `None`
+        in other files, and `origin` is the location in the root document of
+        the reference that led to the current file, for error messages.
+        """
+        if index is not None:
+            origin = index
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str):
+                return self.walk_ref(ref, value, path, index, origin, in_schema)
+            items = value.items()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            return value
+
+        walked = []
+        for key, item in items:
+            child_index = None if index is None else index + [key]
+            child_in_schema = in_schema or key in SCHEMA_KEYS
+            walked.append(
+                (key, self.walk(item, path, child_index, origin, child_in_schema))
+            )
+        if isinstance(value, list):
+            return [item for key, item in walked]
+        return dict(walked)
+
+    def walk_ref(self, ref, value, path, index, origin, in_schema):
+        try:
+            target_path, pointer = self.resolver.locate(ref, path)
+        except LookupError as exc:
+            raise self.error(str(exc), "invalid_ref", origin)
+        if target_path == self.root_path and COMPONENT_REF.match("#" + pointer):
+            if path == self.root_path:
+                return dict(value)
+            return {"$ref": "#" + pointer}
+
+        key = (target_path, pointer)
+        if in_schema and key in self.hoisted:
+            return {"$ref": self.hoisted[key]}
+
+        if in_schema and (index is None or index[:-1] != self.schemas_index):
+            # Schemas are added to the root document's components, so that
+            # recursive schemas can be represented.
+            target = self.lookup(ref, path, target_path, pointer, origin)
+            name = self.unique_name(target_path, pointer)
+            local_ref = "#/" + "/".join(self.schemas_index + [name])
+            self.hoisted[key] = local_ref
+            # Reserve the name's place first, to keep the output in order.
+            self.schemas[name] = None
+            self.schemas[name] = self.walk(target, target_path, None, origin, True)
+            return {"$ref": local_ref}
+
+        if in_schema:
+            # A component schema of the root document that is defined in
+            # another file. References to the same target use the component.
+            self.hoisted[key] = "#/" + "/".join(index)
+
+        if key not in self.inlined:
+            if key in self.inlining:
+                text = "Circular $ref '%s' cannot be bundled." % ref
+                raise self.error(text, "circular_ref", origin)
+            self.inlining.append(key)
+            try:
+                target = self.lookup(ref, path, target_path, pointer, origin)
+                self.inlined[key] = self.walk(
+                    target, target_path, None, origin, in_schema
+                )
+            finally:
+                self.inlining.pop()
+        return self.inlined[key]
+
+    def lookup(self, ref, path, target_path, pointer, origin):
+        try:
+            return self.resolver.resolve(target_path, pointer)
+        except OSError:
+            text = "Could not read file for $ref '%s'." % ref
+        except (ValueError, ImportError) as exc:
+            text = "Could not parse file for $ref '%s': %s" % (ref, exc)
+        except (LookupError, TypeError):
+            text = "Could not resolve $ref '%s'." % ref
+        if path != self.root_path:
+            text += " (In '%s'.)" % os.path.relpath(path)
+        raise self.error(text, "invalid_ref", origin)
+
+    def unique_name(self, path, pointer):
+        parts = _split_pointer(pointer)
+        if parts:
+            name = str(parts[-1])
+        else:
+            name = os.path.splitext(os.path.basename(path))[0]
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", name) or "Schema"
+        candidate = name
+        suffix = 2
+        while candidate in self.names:
+            candidate = "%s_%d" % (name, suffix)
+            suffix += 1
+        self.names.add(candidate)
+        return candidate
+
+    def error(self, text, code, index):
+        index = list(index or [])
+        position = self.position(index)
+        message = typesystem.Message(
+            text=text,
+            code=code,
+            index=index,
+            start_position=position,
+            end_position=position,
+        )
+        return typesystem.ValidationError(messages=[message])
+
+    def position(self, index):
+        """
+        Return the position of the reference at `index` in the root document.
+        The root document is only tokenized if an error is reported.
+        """
+        try:
+            if index:
+                return _position_index(self.root_path).lookup(index)[0]
+        except Exception:
+            pass
+        return typesystem.Position(line_no=1, column_no=1, char_index=0)
+
+
+def _position_index(path):
+    with open(path, "rb") as schema_file:
+        content = schema_file.read().decode("utf-8")
+    encoding = "json" if path.endswith(".json") else "yaml"
+    return PositionIndex(content, encoding)
+
+
+def bundle(path, resolver=None):
+    """
+    Return the schema at `path` as a single document, including any parts of
+    the schema that are defined in other files.
+
+    Raises `typesystem.ValidationError` if a reference cannot be resolved, or
+    `typesystem.ParseError` if the schema file itself cannot be parsed.
+    """
+    if resolver is None:
+        resolver = Resolver()
+    try:
+        resolver.load(path)
+    except ValueError:
+        # Tokenizing the file raises a `ParseError` with the position.
+        _position_index(path)
+        raise
+    return Bundler(path, resolver=resolver).bundle()
+
+
+def dumps(value, encoding="json"):
+    """
+    Return a bundled schema as JSON or YAML text.
+    """
+    if encoding == "yaml":
+        import yaml
+
+        class Dumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):
+            # Inlined references share their values, which would otherwise
+            # be written as YAML aliases.
+            def ignore_aliases(self, data):
+                return True
+
+        return yaml.dump(value, Dumper=Dumper, sort_keys=False, allow_unicode=True)
+    return json.dumps(value, indent=4, ensure_ascii=False) + "\n"
+
+
+def validate(path, format=None, resolver=None, bundled=None):
+    """
+    Bundle and validate the schema at `path`, returning a `Document`. An
+    already `bundled` schema may be passed.
+
+    Validation errors are reported at their position in the root schema
+    file, or at the nearest enclosing position if they are in another file.
+    """
+    from apistar.core import validate
+
+    if bundled is None:
+        bundled = bundle(path, resolver=resolver)
+    try:
+        return validate(bundled, format=format)
+    except typesystem.ValidationError as exc:
+        positions = _position_index(path)
+        messages = []
+        for message in exc.messages():
+            if message.code == "required":
+                index = message.index[:-1]
+                text = "The field %r is required." % message.index[-1]
+            else:
+                index = message.index
+                text = message.text
+            position = typesystem.Position(line_no=1, column_no=1, char_index=0)
+            for length in range(len(index), 0, -1):
+                try:
+                    position = positions.lookup(index[:length])[0]
+                except KeyError:
+                    continue
+                break
+            messages.append(
+                typesystem.Message(
+                    text=text,
+                    code=message.code,
+                    index=message.index,
+                    start_position=position,
+                    end_position=position,
+                )
+            )
+        messages.sort(key=lambda message: message.start_position.char_index)
+        raise typesystem.ValidationError(messages=messages) from None
+
@@ -1,4 +1,19 @@
-from apistar.schemas.openapi import OpenAPI
-from apistar.schemas.swagger import Swagger
+import importlib
 
 __all__ = ["OpenAPI", "Swagger"]
+
+# Importing a loader builds its meta-schema, so only do so on first access.
+_LAZY_ATTRIBUTES = {
+    "OpenAPI": "apistar.schemas.openapi",
+    "Swagger": "apistar.schemas.swagger",
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -12,8 +12,12 @@ class AutoDetermine(typesystem.Field):
             raise self.validation_error("not_an_object")
 
         if "openapi" in value and "swagger" not in value:
+            from apistar.schemas.openapi import OPEN_API
+
             return OPEN_API.validate(value, strict=strict)
         elif "swagger" in value and "openapi" not in value:
+            from apistar.schemas.swagger import SWAGGER
+
             return SWAGGER.validate(value, strict=strict)
         elif "openapi" in value and "swagger" in value:
             raise self.validation_error("both_openapi_and_swagger")
@@ -0,0 +1,216 @@
+"""
+Deduplicating the inline JSON schemas in an OpenAPI or Swagger schema.
+
+Generated schemas often repeat the same inline schema many times. The
+loaders use `InlineSchemas` to convert each distinct schema to a typesystem
+field once, and share it between every link that uses it. `normalize()`
+rewrites a schema so that repeated schemas are moved into its
+`components/schemas`, or `definitions` for Swagger, and referred to there,
+for `apistar normalize`.
+
+Schemas are compared by a hash of their canonical JSON, with sorted keys.
+"""
+import copy
+import hashlib
+import json
+import re
+
+import typesystem
+
+# Keywords whose values are a schema, a mapping of schemas or a list of
+# schemas, and that are followed when looking for nested schemas.
+SUBSCHEMA_KEYS = ("items", "additionalProperties", "not")
+SUBSCHEMA_MAPS = ("properties", "patternProperties")
+SUBSCHEMA_LISTS = ("allOf", "anyOf", "oneOf")
+# Only schemas with some structure are worth moving into the components.
+STRUCTURED_KEYS = {"properties", "items", "allOf", "anyOf", "oneOf", "enum"}
+
+
+def lookup(value, keys, default=None):
+    for key in keys:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return value
+
+
+def schema_key(schema):
+    """
+    Return a hash of a JSON schema, which is the same for any two schemas
+    with the same content.
+    """
+    content = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class InlineSchemas:
+    """
+    Converts inline JSON schemas to typesystem fields, converting each
+    distinct schema only once.
+    """
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self.fields = {}
+
+    def get(self, schema):
+        key = schema_key(schema)
+        field = self.fields.get(key)
+        if field is None:
+            field = typesystem.from_json_schema(schema, definitions=self.definitions)
+            self.fields[key] = field
+        return field
+
+
+def _is_structured(schema):
+    return (
+        isinstance(schema, dict)
+        and "$ref" not in schema
+        and not STRUCTURED_KEYS.isdisjoint(schema)
+    )
+
+
+def _walk_schema(schema, visit, hint):
+    """
+    Call `visit(container, key, schema, hint)` for each schema nested within
+    `schema`. Nested schemas are only followed if `visit` returns `True`.
+    """
+    if not isinstance(schema, dict):
+        return
+    slots = []
+    for key in SUBSCHEMA_KEYS:
+        if isinstance(schema.get(key), dict):
+            suffix = "item" if key == "items" else key
+            slots.append((schema, key, "%s_%s" % (hint, suffix)))
+    for key in SUBSCHEMA_MAPS:
+        if isinstance(schema.get(key), dict):
+            for name in schema[key]:
+                slots.append((schema[key], name, name))
+    for key in SUBSCHEMA_LISTS:
+        if isinstance(schema.get(key), list):
+            for idx in range(len(schema[key])):
+                slots.append((schema[key], idx, "%s_%d" % (hint, idx)))
+    for container, key, child_hint in slots:
+        if visit(container, key, container[key], child_hint):
+            _walk_schema(container[key], visit, child_hint)
+
+
+def _walk_document(value, visit, hint="schema"):
+    """
+    Call `visit` for each schema in the document outside of the component
+    schemas, such as parameter, request body and response schemas.
+    """
+    if isinstance(value, list):
+        for item in value:
+            _walk_document(item, visit, hint)
+        return
+    if not isinstance(value, dict):
+        return
+    if isinstance(value.get("operationId"), str):
+        hint = value["operationId"]
+    elif isinstance(value.get("name"), str) and "in" in value:
+        hint = value["name"]
+    for key, item in value.items():
+        if key.startswith("x-") or key in ("example", "examples"):
+            continue
+        if key == "schema" and isinstance(item, dict):
+            if visit(value, key, item, hint):
+                _walk_schema(item, visit, hint)
+        elif key == "requestBody":
+            _walk_document(item, visit, hint + "_body")
+        elif key == "responses":
+            _walk_document(item, visit, hint + "_response")
+        else:
+            _walk_document(item, visit, hint)
+
+
+def normalize(data):
+    """
+    Return a copy of an OpenAPI or Swagger schema, with any structured
+    inline schema that is used more than once moved into the component
+    schemas. Inline schemas that are identical to an existing component
+    schema are replaced by a reference to it. Returns a tuple of the new
+    schema and the list of added component names.
+    """
+    data = copy.deepcopy(data)
+    if "swagger" in data:
+        existing = "definitions" in data
+        components = data.setdefault("definitions", {})
+        prefix = "#/definitions/"
+    else:
+        existing = lookup(data, ["components", "schemas"]) is not None
+        components = data.setdefault("components", {}).setdefault("schemas", {})
+        prefix = "#/components/schemas/"
+
+    # Map the hash of each component schema to its name.
+    refs = {}
+    for name, schema in components.items():
+        refs.setdefault(schema_key(schema), prefix + name)
+
+    counts = {}
+
+    def count(container, key, schema, hint):
+        schema_hash = schema_key(schema)
+        counts[schema_hash] = counts.get(schema_hash, 0) + 1
+        # Schemas nested in a repeated schema are only counted once.
+        return counts[schema_hash] == 1
+
+    for schema in list(components.values()):
+        _walk_schema(schema, count, "schema")
+    _walk_document(data, count)
+
+    added = []
+
+    def replace(container, key, schema, hint):
+        if not _is_structured(schema):
+            return True
+        schema_hash = schema_key(schema)
+        if schema_hash not in refs:
+            if counts.get(schema_hash, 0) < 2:
+                return True
+            name = _unique_name(schema.get("title") or hint, components)
+            refs[schema_hash] = prefix + name
+            components[name] = schema
+            added.append(name)
+            _walk_schema(schema, replace, name)
+        container[key] = {"$ref": refs[schema_hash]}
+        return False
+
+    # The loaders name a request body field after its schema's component, so
+    # keep the default name for request bodies that were inline.
+    request_bodies = [
+        body
+        for path_info in (data.get("paths") or {}).values()
+        if isinstance(path_info, dict)
+        for body in [lookup(info, ["requestBody"]) for info in path_info.values()]
+        if _is_structured(lookup(body, ["content", "application/json", "schema"]))
+    ]
+
+    for name, schema in list(components.items()):
+        _walk_schema(schema, replace, name)
+    _walk_document(data, replace)
+
+    for body in request_bodies:
+        if "$ref" in body["content"]["application/json"]["schema"]:
+            body.setdefault("x-name", "body")
+
+    if not components and not existing:
+        # Don't leave behind an empty section that wasn't in the schema.
+        if "swagger" in data:
+            del data["definitions"]
+        else:
+            del data["components"]["schemas"]
+            if not data["components"]:
+                del data["components"]
+    return data, added
+
+
+def _unique_name(hint, existing):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", str(hint)).strip("_") or "Schema"
+    candidate = name
+    suffix = 2
+    while candidate in existing:
+        candidate = "%s_%d" % (name, suffix)
+        suffix += 1
+    return candidate
@@ -2,8 +2,9 @@ import re
 from urllib.parse import urljoin
 
 import typesystem
-from apistar.document import Document, Field, Link, Section
+from apistar.document import Document, Field, Link, Response, Section
 from apistar.schemas.jsonschema import JSON_SCHEMA
+from apistar.schemas.normalize import InlineSchemas
 
 SCHEMA_REF = typesystem.Object(
     properties={"$ref": typesystem.String(pattern="^#/components/schemas/")}
@@ -350,6 +351,9 @@ def _simple_slugify(text):
 
 
 class OpenAPI:
+    def __init__(self):
+        self.inline_schemas = None
+
     def load(self, data):
         title = lookup(data, ["info", "title"])
         description = lookup(data, ["info", "description"])
@@ -382,6 +386,7 @@ class OpenAPI:
         """
         links_by_tag = {}
         links = []
+        response_definitions = lookup(data, ["components", "responses"], {})
 
         for path, path_info in data.get("paths", {}).items():
             operations = {key: path_info[key] for key in path_info if key in METHODS}
@@ -394,6 +399,7 @@ class OpenAPI:
                     operation,
                     operation_info,
                     schema_definitions,
+                    response_definitions=response_definitions,
                 )
                 if link is None:
                     continue
@@ -412,7 +418,14 @@ class OpenAPI:
         return links + sections
 
     def get_link(
-        self, base_url, path, path_info, operation, operation_info, schema_definitions
+        self,
+        base_url,
+        path,
+        path_info,
+        operation,
+        operation_info,
+        schema_definitions,
+        response_definitions=None,
     ):
         """
         Return a single link in the document.
@@ -451,9 +464,7 @@ class OpenAPI:
                 schema = schema_definitions.get(ref)
                 field_name = ref[len("#/components/schemas/") :].lower()
             else:
-                schema = typesystem.from_json_schema(
-                    body_schema, definitions=schema_definitions
-                )
+                schema = self.get_inline_schema(body_schema, schema_definitions)
                 field_name = "body"
             field_name = lookup(
                 operation_info, ["requestBody", "x-name"], default=field_name
@@ -468,8 +479,76 @@ class OpenAPI:
             description=description,
             fields=fields,
             encoding=encoding,
+            response=self.get_response(
+                operation_info, schema_definitions, response_definitions or {}
+            ),
+            pagination=operation_info.get("x-pagination"),
         )
 
+    def get_response(self, operation_info, schema_definitions, response_definitions):
+        """
+        Return the successful response for a link, if one is described.
+        """
+        responses = operation_info.get("responses", {})
+        status_codes = sorted([key for key in responses if key.startswith("2")])
+        if status_codes:
+            key = status_codes[0]
+        elif "default" in responses:
+            key = "default"
+        else:
+            return None
+
+        response_info = responses[key]
+        if "$ref" in response_info:
+            name = response_info["$ref"][len("#/components/responses/") :]
+            response_info = response_definitions.get(name, {})
+
+        status_code = int(key) if key.isdigit() else 200
+        content = response_info.get("content", {})
+        if not content:
+            return Response(encoding="", status_code=status_code)
+
+        encoding = "application/json" if "application/json" in content else None
+        if encoding is None:
+            encoding = list(content.keys())[0]
+        schema = content[encoding].get("schema")
+        example = content[encoding].get("example")
+        if example is None and content[encoding].get("examples"):
+            example = lookup(list(content[encoding]["examples"].values()), [0, "value"])
+
+        if schema is not None:
+            if "$ref" in schema:
+                ref = schema["$ref"]
+                schema = schema_definitions.get(ref)
+            else:
+                if example is None:
+                    example = schema.get("example")
+                return Response(
+                    encoding=encoding,
+                    status_code=status_code,
+                    example=example,
+                    json_schema=schema,
+                    inline_schemas=self.get_inline_schemas(schema_definitions),
+                )
+
+        return Response(
+            encoding=encoding, status_code=status_code, schema=schema, example=example
+        )
+
+    def get_inline_schemas(self, schema_definitions):
+        if self.inline_schemas is None or (
+            self.inline_schemas.definitions is not schema_definitions
+        ):
+            self.inline_schemas = InlineSchemas(schema_definitions)
+        return self.inline_schemas
+
+    def get_inline_schema(self, schema, schema_definitions):
+        """
+        Return the field for an inline JSON schema. Identical schemas are
+        converted once, and share the same field.
+        """
+        return self.get_inline_schemas(schema_definitions).get(schema)
+
     def get_field(self, parameter, schema_definitions):
         """
         Return a single field in a link.
@@ -486,9 +565,7 @@ class OpenAPI:
                 ref = schema["$ref"]
                 schema = schema_definitions.get(ref)
             else:
-                schema = typesystem.from_json_schema(
-                    schema, definitions=schema_definitions
-                )
+                schema = self.get_inline_schema(schema, schema_definitions)
 
         return Field(
             name=name,
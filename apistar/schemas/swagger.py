@@ -2,8 +2,9 @@ import re
 from urllib.parse import urljoin
 
 import typesystem
-from apistar.document import Document, Field, Link, Section
+from apistar.document import Document, Field, Link, Response, Section
 from apistar.schemas.jsonschema import JSON_SCHEMA
+from apistar.schemas.normalize import InlineSchemas
 
 SCHEMA_REF = typesystem.Object(
     properties={"$ref": typesystem.String(pattern="^#/definitiions/")}
@@ -336,6 +337,9 @@ def _simple_slugify(text):
 
 
 class Swagger:
+    def __init__(self):
+        self.inline_schemas = None
+
     def load(self, data):
         title = lookup(data, ["info", "title"])
         description = lookup(data, ["info", "description"])
@@ -358,9 +362,9 @@ class Swagger:
 
     def get_schema_definitions(self, data):
         definitions = typesystem.SchemaDefinitions()
-        schemas = lookup(data, ["components", "schemas"], {})
+        schemas = lookup(data, ["definitions"], {})
         for key, value in schemas.items():
-            ref = f"#/components/schemas/{key}"
+            ref = f"#/definitions/{key}"
             definitions[ref] = typesystem.from_json_schema(
                 value, definitions=definitions
             )
@@ -372,6 +376,8 @@ class Swagger:
         """
         links_by_tag = {}
         links = []
+        response_definitions = lookup(data, ["responses"], {})
+        produces = lookup(data, ["produces", 0], "application/json")
 
         for path, path_info in data.get("paths", {}).items():
             operations = {key: path_info[key] for key in path_info if key in METHODS}
@@ -384,6 +390,8 @@ class Swagger:
                     operation,
                     operation_info,
                     schema_definitions,
+                    response_definitions=response_definitions,
+                    produces=produces,
                 )
                 if link is None:
                     continue
@@ -402,7 +410,15 @@ class Swagger:
         return links + sections
 
     def get_link(
-        self, base_url, path, path_info, operation, operation_info, schema_definitions
+        self,
+        base_url,
+        path,
+        path_info,
+        operation,
+        operation_info,
+        schema_definitions,
+        response_definitions=None,
+        produces="application/json",
     ):
         """
         Return a single link in the document.
@@ -456,8 +472,75 @@ class Swagger:
             description=description,
             fields=fields,
             encoding=encoding,
+            response=self.get_response(
+                operation_info,
+                schema_definitions,
+                response_definitions or {},
+                lookup(operation_info, ["produces", 0], produces),
+            ),
+            pagination=operation_info.get("x-pagination"),
         )
 
+    def get_response(
+        self, operation_info, schema_definitions, response_definitions, encoding
+    ):
+        """
+        Return the successful response for a link, if one is described.
+        """
+        responses = operation_info.get("responses", {})
+        status_codes = sorted([key for key in responses if key.startswith("2")])
+        if status_codes:
+            key = status_codes[0]
+        elif "default" in responses:
+            key = "default"
+        else:
+            return None
+
+        response_info = responses[key]
+        if "$ref" in response_info:
+            name = response_info["$ref"][len("#/responses/") :]
+            response_info = response_definitions.get(name, {})
+
+        status_code = int(key) if key.isdigit() else 200
+        schema = response_info.get("schema")
+        example = lookup(response_info, ["examples", encoding])
+        if schema is None:
+            if example is None:
+                return Response(encoding="", status_code=status_code)
+            return Response(encoding=encoding, status_code=status_code, example=example)
+
+        if "$ref" in schema:
+            ref = schema["$ref"]
+            schema = schema_definitions.get(ref)
+        else:
+            if example is None:
+                example = schema.get("example")
+            return Response(
+                encoding=encoding,
+                status_code=status_code,
+                example=example,
+                json_schema=schema,
+                inline_schemas=self.get_inline_schemas(schema_definitions),
+            )
+
+        return Response(
+            encoding=encoding, status_code=status_code, schema=schema, example=example
+        )
+
+    def get_inline_schemas(self, schema_definitions):
+        if self.inline_schemas is None or (
+            self.inline_schemas.definitions is not schema_definitions
+        ):
+            self.inline_schemas = InlineSchemas(schema_definitions)
+        return self.inline_schemas
+
+    def get_inline_schema(self, schema, schema_definitions):
+        """
+        Return the field for an inline JSON schema. Identical schemas are
+        converted once, and share the same field.
+        """
+        return self.get_inline_schemas(schema_definitions).get(schema)
+
     def get_field(self, parameter, schema_definitions):
         """
         Return a single field in a link.
@@ -474,9 +557,7 @@ class Swagger:
                 ref = schema["$ref"]
                 schema = schema_definitions.get(ref)
             else:
-                schema = typesystem.from_json_schema(
-                    schema, definitions=schema_definitions
-                )
+                schema = self.get_inline_schema(schema, schema_definitions)
 
         return Field(
             name=name,
@@ -0,0 +1,114 @@
+"""
+A prebuilt search index for the generated documentation.
+
+The index is written alongside the docs as a small JSON file, which the
+theme loads the first time the search box is used. It contains a list of
+entries, one per link, and an inverted index mapping each term to the
+entries that contain it. Terms are sorted, so that the browser can find
+every term starting with a prefix using a binary search, and the lists of
+entries are delta encoded to keep the file small.
+
+Terms are taken from each link's name, title, description, URL, method and
+field names, along with the title of its section.
+"""
+import bisect
+import json
+import re
+
+INDEX_VERSION = 1
+
+CAMEL_CASE = re.compile(r"([a-z0-9])([A-Z])")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms, including splitting "camelCase"
+    and "snake_case" names into their parts. The theme's script tokenizes
+    search queries in the same way.
+    """
+    text = CAMEL_CASE.sub(r"\1 \2", text or "")
+    return [token for token in WORD.findall(text.lower()) if len(token) > 1]
+
+
+def _link_text(section, link):
+    text = [link.name, link.title, link.description, link.url, link.method]
+    if section is not None:
+        text += [section.name, section.title]
+    text += [field.name for field in link.fields]
+    expanded = link.get_expanded_body()
+    if expanded:
+        text += list(expanded)
+    return " ".join([item for item in text if item])
+
+
+def _delta_encode(values):
+    previous = 0
+    encoded = []
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def build_index(document, url_for=None):
+    """
+    Return the search index for a document, as a dict that can be dumped to
+    JSON. The `url_for(section, link)` function returns the URL of each link
+    in the docs, and defaults to the anchors used by a single page.
+    """
+    if url_for is None:
+        from apistar.core import _anchor as url_for
+
+    entries = []
+    postings = {}
+
+    def add(section, link):
+        entry_id = len(entries)
+        title = link.title or link.name
+        entries.append([title, url_for(section, link), link.method, link.url])
+        for term in set(tokenize(_link_text(section, link))):
+            postings.setdefault(term, []).append(entry_id)
+
+    for link in document.get_links():
+        add(None, link)
+    for section in document.get_sections():
+        for link in section.get_links():
+            add(section, link)
+
+    terms = sorted(postings)
+    return {
+        "version": INDEX_VERSION,
+        "entries": entries,
+        "terms": terms,
+        "postings": [_delta_encode(postings[term]) for term in terms],
+    }
+
+
+def dumps(index):
+    """
+    Return the search index as compact JSON.
+    """
+    return json.dumps(index, separators=(",", ":"), ensure_ascii=False)
+
+
+def search(index, query):
+    """
+    Return the entries matching every term in the query, where each term may
+    be a prefix. Used for testing the index, and mirrors the theme's script.
+    """
+    terms = index["terms"]
+    matches = None
+    for token in tokenize(query):
+        found = set()
+        position = bisect.bisect_left(terms, token)
+        while position < len(terms) and terms[position].startswith(token):
+            entry_id = 0
+            for delta in index["postings"][position]:
+                entry_id += delta
+                found.add(entry_id)
+            position += 1
+        matches = found if matches is None else matches & found
+    if not matches:
+        return []
+    return [index["entries"][entry_id] for entry_id in sorted(matches)]
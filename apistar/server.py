@@ -0,0 +1,413 @@
+"""
+WSGI and ASGI applications for serving API documentation.
+
+`DocsApp` renders the documentation for a schema and serves the page, the
+schema itself and the theme's static files, so that it can be mounted in any
+Python web application. `StaticFiles` serves a directory, such as the output
+of `apistar docs`, and is used by the CLI.
+
+All responses have strong ETags, and conditional requests are answered with
+`304 Not Modified`. Static files whose names include a content hash are sent
+with long-lived, immutable `Cache-Control` headers, and any precompressed
+`.br` or `.gz` variant alongside a file is served to clients that accept it.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import socketserver
+import threading
+from urllib.parse import unquote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import apistar
+
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+CHUNK_SIZE = 64 * 1024
+# The number of file ETags cached by `StaticFiles`.
+MAX_ETAGS = 1024
+
+STATUS_TEXT = {
+    200: "200 OK",
+    304: "304 Not Modified",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+}
+
+
+def make_etag(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def etag_matches(etag, if_none_match):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Return the set of content codings accepted by an `Accept-Encoding` header.
+    """
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def _iter_file(path):
+    with open(path, "rb") as input_file:
+        while True:
+            chunk = input_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class BaseApp:
+    """
+    Provides the WSGI and ASGI interfaces. Subclasses implement
+    `get_response(path, headers)` for GET requests, returning a tuple of
+    `(status_code, headers, body)`, where the body is either a bytestring or
+    an iterator of bytestrings. Request header names are lowercase.
+    """
+
+    def __init__(self, live_reload=None):
+        self.live_reload = live_reload
+
+    def handle(self, method, path, headers):
+        if self.live_reload is not None:
+            from apistar.watch import LIVE_RELOAD_URL, event_stream
+
+            if path == LIVE_RELOAD_URL:
+                response_headers = [
+                    ("Content-Type", "text/event-stream"),
+                    ("Cache-Control", "no-cache"),
+                ]
+                return (200, response_headers, event_stream(self.live_reload))
+
+        if method not in ("GET", "HEAD"):
+            return (405, [("Allow", "GET, HEAD")], b"")
+        status_code, response_headers, body = self.get_response(path, headers)
+        if method == "HEAD" or status_code == 304:
+            body = b""
+        return (status_code, response_headers, body)
+
+    def get_response(self, path, headers):
+        raise NotImplementedError()
+
+    def respond(
+        self, content, content_type, cache_control, headers, variants=(), etag=None
+    ):
+        """
+        Return a response for in-memory content, with optional precompressed
+        `(coding, content)` variants. The ETag is calculated from the content
+        unless it is given.
+        """
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        response_headers = [("Content-Type", content_type)]
+        if etag is None:
+            etag = make_etag(content)
+        for coding, variant in variants:
+            if coding in accepted:
+                content = variant
+                etag = etag[:-1] + "-" + coding + '"'
+                response_headers.append(("Content-Encoding", coding))
+                break
+        if variants:
+            response_headers.append(("Vary", "Accept-Encoding"))
+        response_headers += [("ETag", etag), ("Cache-Control", cache_control)]
+        if etag_matches(etag, headers.get("if-none-match")):
+            return (304, response_headers, b"")
+        response_headers.append(("Content-Length", str(len(content))))
+        return (200, response_headers, content)
+
+    def not_found(self):
+        return (404, [("Content-Type", "text/plain; charset=utf-8")], b"Not found.")
+
+    def __call__(self, environ, start_response):
+        headers = {
+            key[5:].replace("_", "-").lower(): value
+            for key, value in environ.items()
+            if key.startswith("HTTP_")
+        }
+        path = environ.get("PATH_INFO", "/") or "/"
+        status_code, response_headers, body = self.handle(
+            environ["REQUEST_METHOD"], path, headers
+        )
+        start_response(STATUS_TEXT[status_code], response_headers)
+        if isinstance(body, bytes):
+            return [body]
+        return body
+
+    async def asgi(self, scope, receive, send):
+        """
+        The ASGI interface. Requests are handled and response bodies are read
+        in a thread pool, so that finding, hashing and serving files and event
+        streams does not block the event loop.
+        """
+        assert scope["type"] == "http"
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        loop = asyncio.get_event_loop()
+        status_code, response_headers, body = await loop.run_in_executor(
+            None, self.handle, scope["method"], scope["path"], headers
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (key.lower().encode("latin-1"), value.encode("latin-1"))
+                    for key, value in response_headers
+                ],
+            }
+        )
+        if isinstance(body, bytes):
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        iterator = iter(body)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, iterator, None)
+                if chunk is None:
+                    break
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            # A generator that is still running in the thread pool, such as
+            # an event stream, finishes by itself on its next write.
+            close = getattr(iterator, "close", None)
+            if close is not None and not getattr(iterator, "gi_running", False):
+                close()
+
+
+class StaticFiles(BaseApp):
+    """
+    Serves the files in a directory.
+    """
+
+    def __init__(self, directory, index="index.html", live_reload=None):
+        super().__init__(live_reload=live_reload)
+        self.directory = os.path.realpath(directory)
+        self.index = index
+        self.etags = {}
+        self.lock = threading.Lock()
+
+    def get_etag(self, path, stat):
+        # Cached per path, so that a changed file replaces its old entry.
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self.etags.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        digest = hashlib.sha256()
+        for chunk in _iter_file(path):
+            digest.update(chunk)
+        etag = '"%s"' % digest.hexdigest()[:32]
+        with self.lock:
+            self.etags.pop(path, None)
+            while len(self.etags) >= MAX_ETAGS:
+                del self.etags[next(iter(self.etags))]
+            self.etags[path] = (version, etag)
+        return etag
+
+    def lookup(self, path):
+        """
+        Return the filesystem path for a URL path, or `None`.
+        """
+        path = posixpath.normpath(unquote(path))
+        parts = [part for part in path.split("/") if part not in ("", ".")]
+        if ".." in parts:
+            return None
+        full_path = os.path.realpath(os.path.join(self.directory, *parts))
+        if not (full_path + os.sep).startswith(self.directory + os.sep):
+            return None
+        if os.path.isdir(full_path) and self.index:
+            full_path = os.path.join(full_path, self.index)
+        if not os.path.isfile(full_path):
+            return None
+        return full_path
+
+    def get_response(self, path, headers):
+        full_path = self.lookup(path)
+        if full_path is None:
+            return self.not_found()
+
+        content_type, _ = mimetypes.guess_type(full_path)
+        if content_type is None:
+            content_type = "application/octet-stream"
+        elif content_type.startswith("text/") or content_type in (
+            "application/javascript",
+            "application/json",
+        ):
+            content_type += "; charset=utf-8"
+        if FINGERPRINTED.search(os.path.basename(full_path)):
+            cache_control = IMMUTABLE
+        else:
+            cache_control = REVALIDATE
+
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        response_headers = [("Content-Type", content_type)]
+        has_variants = False
+        serve_path = full_path
+        serve_coding = None
+        for coding, extension in ENCODINGS:
+            if os.path.isfile(full_path + extension):
+                has_variants = True
+                if serve_coding is None and coding in accepted:
+                    serve_path = full_path + extension
+                    serve_coding = coding
+
+        stat = os.stat(serve_path)
+        etag = self.get_etag(serve_path, stat)
+        if serve_coding is not None:
+            etag = etag[:-1] + "-" + serve_coding + '"'
+            response_headers.append(("Content-Encoding", serve_coding))
+        if has_variants:
+            response_headers.append(("Vary", "Accept-Encoding"))
+        response_headers += [("ETag", etag), ("Cache-Control", cache_control)]
+        if etag_matches(etag, headers.get("if-none-match")):
+            return (304, response_headers, b"")
+        response_headers.append(("Content-Length", str(stat.st_size)))
+        return (200, response_headers, _iter_file(serve_path))
+
+
+class DocsApp(BaseApp):
+    """
+    Renders and serves the API documentation for a schema.
+    """
+
+    def __init__(
+        self,
+        schema,
+        format=None,
+        encoding=None,
+        theme="apistar",
+        schema_url="/schema",
+        static_url="/static/",
+        search_url="/search-index.json",
+        live_reload=None,
+    ):
+        super().__init__(live_reload=live_reload)
+        self.theme = theme
+        self.schema_url = schema_url
+        # Only the "apistar" theme uses the prebuilt search index.
+        self.search_url = search_url if theme == "apistar" else None
+        self.static_url = "/" + static_url.strip("/") + "/"
+        package_dir = os.path.dirname(apistar.__file__)
+        static_dir = os.path.join(package_dir, "themes", theme, "static")
+        self.static_files = StaticFiles(static_dir, index=None)
+        self.load(schema, format=format, encoding=encoding)
+
+    def load(self, schema, format=None, encoding=None):
+        """
+        Render the documentation for a new version of the schema.
+        """
+        from apistar.core import _load_docs_document, docs
+        from apistar.search import build_index, dumps
+
+        if isinstance(schema, dict):
+            schema_content = json.dumps(schema, indent=4).encode("utf-8")
+            schema_encoding = "json"
+        elif isinstance(schema, str):
+            schema_content = schema.encode("utf-8")
+            schema_encoding = encoding
+        elif isinstance(schema, bytes):
+            schema_content = schema
+            schema_encoding = encoding
+        else:
+            # An already loaded `Document`, which has no schema file to serve.
+            schema_content = None
+
+        document = _load_docs_document(schema, format, encoding)
+        index_html = docs(
+            document,
+            theme=self.theme,
+            schema_url=self.schema_url,
+            static_url=self.static_url,
+            search_url=self.search_url,
+        )
+        if self.live_reload is not None:
+            from apistar.watch import inject_live_reload
+
+            index_html = inject_live_reload(index_html)
+        index_content = index_html.encode("utf-8")
+
+        def page(content, content_type):
+            # Pages are compressed and hashed once here, not on each request.
+            variants = (("gzip", gzip.compress(content)),)
+            return (content, content_type, variants, make_etag(content))
+
+        pages = {"/": page(index_content, "text/html; charset=utf-8")}
+        if self.search_url is not None:
+            search_content = dumps(build_index(document)).encode("utf-8")
+            pages[self.search_url] = page(
+                search_content, "application/json; charset=utf-8"
+            )
+        if schema_content is not None:
+            schema_type = {
+                "json": "application/json",
+                "yaml": "application/yaml",
+                None: "text/plain",
+            }[schema_encoding]
+            pages[self.schema_url] = page(
+                schema_content, schema_type + "; charset=utf-8"
+            )
+        # Replaced in a single assignment, so that requests being served
+        # concurrently always see a consistent set of pages.
+        self.pages = pages
+
+    def get_response(self, path, headers):
+        pages = self.pages
+        if path in pages:
+            content, content_type, variants, etag = pages[path]
+            return self.respond(
+                content, content_type, REVALIDATE, headers, variants, etag=etag
+            )
+        if path.startswith(self.static_url):
+            static_path = path[len(self.static_url) :]
+            return self.static_files.get_response(static_path, headers)
+        return self.not_found()
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def make_server(app, host="", port=8000, verbose=False):
+    """
+    Return a threaded WSGI server for the given application.
+    """
+    handler = WSGIRequestHandler if verbose else _QuietRequestHandler
+    server = ThreadingWSGIServer((host, port), handler)
+    server.set_app(app)
+    return server
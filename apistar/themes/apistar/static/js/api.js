@@ -56,6 +56,59 @@ function formEntries (form) {
   return entries
 }
 
+function searchTokenize (text) {
+  // Must match `apistar.search.tokenize`.
+  var words = text.replace(/([a-z0-9])([A-Z])/g, '$1 $2').toLowerCase().match(/[a-z0-9]+/g) || []
+  return words.filter(function (word) {
+    return word.length > 1
+  })
+}
+
+function searchIndex (index, query) {
+  // Return the entries matching every term in the query, treating each term
+  // as a prefix. The index terms are sorted, so we binary search for the
+  // first term with the prefix, and scan forward from there.
+  var terms = index.terms
+  var tokens = searchTokenize(query)
+  var matches = null
+
+  for (var i = 0; i < tokens.length; i++) {
+    var token = tokens[i]
+    var low = 0
+    var high = terms.length
+    while (low < high) {
+      var mid = (low + high) >>> 1
+      if (terms[mid] < token) {
+        low = mid + 1
+      } else {
+        high = mid
+      }
+    }
+
+    var found = {}
+    for (var position = low; position < terms.length && terms[position].lastIndexOf(token, 0) === 0; position++) {
+      var postings = index.postings[position]
+      var entryId = 0
+      for (var j = 0; j < postings.length; j++) {
+        entryId += postings[j]
+        if (matches === null || matches[entryId]) {
+          found[entryId] = true
+        }
+      }
+    }
+    matches = found
+  }
+
+  if (matches === null) {
+    return []
+  }
+  return Object.keys(matches).map(Number).sort(function (a, b) {
+    return a - b
+  }).map(function (entryId) {
+    return index.entries[entryId]
+  })
+}
+
 $(function () {
   var $selectedAuthentication = $('#selected-authentication')
   var $authControl = $('#auth-control')
@@ -81,9 +134,62 @@ $(function () {
     $codeBlocks.filter('[data-language="' + language + '"]').removeClass('d-none')
   })
 
+  // Search
+  var $search = $('#search')
+  var $searchResults = $('.search-results')
+  var index = null
+  var loading = false
+  var maxResults = 50
+
+  function showResults () {
+    var query = $search.val()
+    $searchResults.empty()
+    if (index === null || !query) {
+      return
+    }
+    var results = searchIndex(index, query).slice(0, maxResults)
+    for (var i = 0; i < results.length; i++) {
+      var entry = results[i]
+      var $link = $('<a>').attr('href', entry[1]).text(entry[0])
+      $link.append($('<code>').text(entry[2] + ' ' + entry[3]))
+      $searchResults.append($('<li>').append($link))
+    }
+  }
+
+  $search.on('focus', function () {
+    // The index is only fetched when the search box is first used.
+    if (index !== null || loading) {
+      return
+    }
+    loading = true
+    $.getJSON($search.data('index-url'), function (data) {
+      index = data
+      showResults()
+    })
+  })
+
+  $search.on('input', showResults)
+
+  $search.on('keydown', function (event) {
+    if (event.which === 13) {
+      var $first = $searchResults.find('a').first()
+      if ($first.length) {
+        window.location.href = $first.attr('href')
+      }
+    } else if (event.which === 27) {
+      $search.val('')
+      showResults()
+    }
+  })
+
   // mobile menu
   $(".menu-context-mobile").change(function () {
     targetLocation = $(this).find("option:selected").val();
+    if (targetLocation.charAt(0) !== '#') {
+      // A link to another page, when the docs are split by section.
+      window.location.href = targetLocation;
+      return;
+    }
     window.location.hash = targetLocation;
     $('html, body').animate({
       scrollTop: $(targetLocation).offset().top - 60
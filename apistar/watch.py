@@ -0,0 +1,221 @@
+"""
+File watching and browser live reload, for `apistar docs --watch`.
+
+On Linux files are watched with inotify, called directly through `ctypes`.
+Elsewhere, or if inotify is unavailable, files are polled for changes to
+their modification time and size. The parent directory of each file is
+watched rather than the file itself, so that editors which save by writing
+a new file and renaming it over the old one are handled.
+
+Open browsers are told to reload over a server-sent events connection,
+served by `apistar.server`. The documentation page includes a small script
+that listens for these events.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+LIVE_RELOAD_URL = "/__apistar__/livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>"
+    'new EventSource("%s").addEventListener("reload", function () {'
+    " window.location.reload(); });"
+    "</script>"
+) % LIVE_RELOAD_URL
+
+# inotify event flags, from <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Time to wait for further events after a change, so that a single save
+# which generates several events results in a single rebuild.
+DEBOUNCE = 0.05
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=0.5):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self):
+        state = {}
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                state[path] = None
+            else:
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        """
+        Block until any of the watched files change, returning the set of
+        changed paths, or an empty set if `timeout` seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self.snapshot()
+            changed = {path for path in self.paths if state[path] != self.state[path]}
+            self.state = state
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        self.paths = [os.path.abspath(path) for path in paths]
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directories = {}
+        try:
+            for directory in {os.path.dirname(path) for path in self.paths}:
+                wd = libc.inotify_add_watch(
+                    self.fd, os.fsencode(directory), WATCH_MASK
+                )
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+                self.directories[wd] = directory
+        except BaseException:
+            os.close(self.fd)
+            raise
+
+    def read_events(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.directories.get(wd)
+            if directory is not None and name:
+                path = os.path.join(directory, os.fsdecode(name))
+                if path in self.paths:
+                    changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """
+        Block until any of the watched files change, returning the set of
+        changed paths, or an empty set if `timeout` seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        while not changed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return changed
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if readable:
+                changed |= self.read_events()
+
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self.read_events()
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def get_watcher(paths, polling=False):
+    """
+    Return an inotify based watcher for the given paths if possible, or a
+    polling watcher otherwise.
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            # AttributeError if libc does not provide the inotify functions.
+            pass
+    return PollingWatcher(paths)
+
+
+def inject_live_reload(html):
+    """
+    Add the live reload script to a rendered documentation page.
+    """
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class LiveReload:
+    """
+    Tracks the number of rebuilds, and wakes up any waiting event streams
+    whenever a rebuild completes.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def event_stream(live_reload, keepalive_interval=15.0):
+    """
+    Yield a server-sent events stream, with a "reload" event after every
+    rebuild, and periodic comments to keep the connection open.
+    """
+    version = live_reload.version
+    yield b"retry: 1000\n\n"
+    while True:
+        latest = live_reload.wait(version, timeout=keepalive_interval)
+        if latest != version:
+            version = latest
+            yield b"event: reload\ndata: {}\n\n"
+        else:
+            yield b": keepalive\n\n"
@@ -1,9 +1,17 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl
+
+import pytest
 from starlette.applications import Starlette
 from starlette.responses import JSONResponse
 from starlette.testclient import TestClient
 
+from apistar import exceptions
 from apistar.client import Client
-from apistar.client.auth import TokenAuthentication
+from apistar.client.auth import OAuth2ClientCredentials, TokenAuthentication
 
 app = Starlette()
 
@@ -13,6 +21,29 @@ def token_auth(request):
     return JSONResponse({"authorization": request.headers["Authorization"]})
 
 
+token_requests = []
+
+
+@app.route("/token", methods=["POST"])
+async def token(request):
+    form = dict(parse_qsl((await request.body()).decode()))
+    assert form["grant_type"] == "client_credentials"
+    assert request.headers["Authorization"].startswith("Basic ")
+    token_requests.append(form.get("scope"))
+    return JSONResponse(
+        {
+            "access_token": "token-%d" % len(token_requests),
+            "token_type": "bearer",
+            "expires_in": int(request.query_params.get("expires_in", 3600)),
+        }
+    )
+
+
+@app.route("/invalid-token", methods=["POST"])
+def invalid_token(request):
+    return JSONResponse({"error": "none"})
+
+
 schema = {
     "openapi": "3.0.0",
     "info": {"title": "Test API", "version": "1.0"},
@@ -27,3 +58,102 @@ def test_token_auth():
     client = Client(schema, session=session, auth=auth)
     data = client.request("token-auth")
     assert data == {"authorization": "Bearer xxx"}
+
+
+def test_oauth2_client_credentials():
+    token_requests.clear()
+    session = TestClient(app)
+    auth = OAuth2ClientCredentials(
+        "http://testserver/token", "id", "secret", scope="read", session=session
+    )
+    client = Client(schema, session=session, auth=auth)
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+    assert token_requests == ["read"]
+
+
+def test_oauth2_expired_token():
+    token_requests.clear()
+    session = TestClient(app)
+    auth = OAuth2ClientCredentials(
+        "http://testserver/token?expires_in=5", "id", "secret", session=session
+    )
+    client = Client(schema, session=session, auth=auth)
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+
+    # The expiry margin is capped for short-lived tokens, so the token is
+    # used until it is close to expiring.
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+    auth.token["expires_at"] = time.time() + 1
+    assert client.request("token-auth") == {"authorization": "Bearer token-2"}
+
+
+def test_oauth2_background_refresh():
+    token_requests.clear()
+    session = TestClient(app)
+    auth = OAuth2ClientCredentials(
+        "http://testserver/token?expires_in=30", "id", "secret", session=session
+    )
+    client = Client(schema, session=session, auth=auth)
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+
+    # The refresh margin is capped at half of the token's 30 second lifetime,
+    # so a new token doesn't immediately need refreshing.
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+    assert auth.refresh_thread is None
+
+    # Once the token is within the refresh margin it is still used, while a
+    # replacement is fetched in the background.
+    auth.token["expires_at"] = time.time() + 12
+    assert client.request("token-auth") == {"authorization": "Bearer token-1"}
+    auth.refresh_thread.join()
+    assert client.request("token-auth") == {"authorization": "Bearer token-2"}
+
+
+def test_oauth2_invalid_token_response():
+    session = TestClient(app)
+    auth = OAuth2ClientCredentials(
+        "http://testserver/invalid-token", "id", "secret", session=session
+    )
+    with pytest.raises(exceptions.ClientError) as exc_info:
+        auth.get_token()
+    message = exc_info.value.messages[0]
+    assert message.code == "invalid-token"
+    assert message.text == "Invalid access token response."
+
+
+def test_oauth2_concurrent_refresh():
+    token_requests.clear()
+    session = TestClient(app)
+    auth = OAuth2ClientCredentials(
+        "http://testserver/token", "id", "secret", session=session
+    )
+    threads = [threading.Thread(target=auth.get_token) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(token_requests) == 1
+
+
+def test_oauth2_shared_cache(tmpdir):
+    token_requests.clear()
+    cache_path = os.path.join(tmpdir, "token.json")
+    session = TestClient(app)
+    auth_a = OAuth2ClientCredentials(
+        "http://testserver/token", "id", "secret", session=session, cache_path=cache_path
+    )
+    auth_b = OAuth2ClientCredentials(
+        "http://testserver/token", "id", "secret", session=session, cache_path=cache_path
+    )
+    assert auth_a.get_token()["access_token"] == "token-1"
+    assert auth_b.get_token()["access_token"] == "token-1"
+    assert len(token_requests) == 1
+
+    # Cached tokens without an expiry time are replaced.
+    with open(cache_path, "w") as cache_file:
+        json.dump({"access_token": "token-x"}, cache_file)
+    auth_c = OAuth2ClientCredentials(
+        "http://testserver/token", "id", "secret", session=session, cache_path=cache_path
+    )
+    assert auth_c.get_token()["access_token"] == "token-2"
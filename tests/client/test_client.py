@@ -1,10 +1,15 @@
+import os
+
 import pytest
 from starlette.applications import Starlette
 from starlette.responses import JSONResponse
 from starlette.testclient import TestClient
 
+import apistar
 from apistar import exceptions
 from apistar.client import Client
+from apistar.client.client import clear_document_cache
+from apistar.compiled import MAGIC, dumps
 
 app = Starlette()
 
@@ -94,3 +99,56 @@ def test_extra_param():
     client = Client(schema, session=TestClient(app))
     with pytest.raises(exceptions.ClientError):
         client.request("body-param", value={"example": 123}, extra=456)
+
+
+def test_from_document():
+    document = apistar.validate(schema)
+    client = Client.from_document(document, session=TestClient(app))
+    assert client.document is document
+    data = client.request("path-param", value=123)
+    assert data == {"value": "123"}
+
+
+def test_document_cache():
+    clear_document_cache()
+    client_a = Client(schema, session=TestClient(app))
+    client_b = Client(schema, headers={"x-tenant": "b"})
+    assert client_a.document is client_b.document
+    assert client_a.transport is not client_b.transport
+
+
+def test_compiled_document(tmpdir):
+    compiled = dumps(apistar.validate(schema), source=schema)
+    client = Client(compiled=compiled, session=TestClient(app))
+    data = client.request("body-param", value={"example": 123})
+    assert data == {"body": {"example": 123}}
+
+    path = os.path.join(tmpdir, "schema.apistar")
+    with open(path, "wb") as compiled_file:
+        compiled_file.write(compiled)
+    document = apistar.Document.load_compiled(path, schema=schema)
+    assert [link.name for link in document.get_links()] == [
+        link.name for link in client.document.get_links()
+    ]
+
+
+def test_compiled_document_fallback():
+    compiled = dumps(apistar.validate(schema), source=schema)
+    with pytest.raises(exceptions.CompiledDocumentError):
+        Client(compiled=compiled[:-1])
+    with pytest.raises(exceptions.CompiledDocumentError):
+        Client(compiled=b"Not compiled.")
+
+    # A different format version, or an out of date document, falls back to
+    # loading the schema.
+    outdated = compiled.replace(MAGIC + b"\x00\x01", MAGIC + b"\x00\x02", 1)
+    changed = dict(schema, info={"title": "Changed", "version": "2.0"})
+    for compiled_content, source in [(outdated, schema), (compiled, changed)]:
+        with pytest.warns(RuntimeWarning):
+            client = Client(source, compiled=compiled_content)
+        assert client.document.title == source["info"]["title"]
+
+
+def test_missing_schema():
+    with pytest.raises(ValueError):
+        Client()
@@ -0,0 +1,178 @@
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.testclient import TestClient
+
+from apistar.client import Client
+from apistar.client.auth import TokenAuthentication
+from apistar.client.har import RecordingSession, ReplaySession, close_writers
+
+app = Starlette()
+
+
+@app.route("/query-params/")
+def query_params(request):
+    return JSONResponse({"query": dict(request.query_params)})
+
+
+@app.route("/login/")
+def login(request):
+    response = JSONResponse({"login": True})
+    response.set_cookie("session", "secret-session")
+    return response
+
+
+@app.route("/redirect/")
+def redirect(request):
+    return RedirectResponse("/query-params/?a=1")
+
+
+@app.route("/body-param/", methods=["POST"])
+async def body_param(request):
+    data = await request.json()
+    return JSONResponse({"body": dict(data)})
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver"}],
+    "paths": {
+        "/query-params/": {
+            "get": {
+                "operationId": "query-params",
+                "parameters": [
+                    {"name": "a", "in": "query"},
+                    {"name": "b", "in": "query"},
+                ],
+            }
+        },
+        "/login/": {"get": {"operationId": "login"}},
+        "/redirect/": {"get": {"operationId": "redirect"}},
+        "/body-param/": {
+            "post": {
+                "operationId": "body-param",
+                "requestBody": {
+                    "content": {"application/json": {"schema": {"type": "object"}}}
+                },
+            }
+        },
+    },
+}
+
+
+def test_record_and_replay(tmpdir):
+    path = os.path.join(tmpdir, "requests.har")
+    session = RecordingSession(path, TestClient(app))
+    client = Client(schema, session=session)
+    client.request("query-params", a=1, b=2)
+    client.request("body-param", body={"example": 123})
+    session.har_writer.close()
+
+    with open(path) as har_file:
+        entries = json.load(har_file)["log"]["entries"]
+    assert [entry["request"]["method"] for entry in entries] == ["GET", "POST"]
+    assert entries[0]["request"]["queryString"] == [
+        {"name": "a", "value": "1"},
+        {"name": "b", "value": "2"},
+    ]
+    assert entries[1]["request"]["postData"]["text"] == '{"example": 123}'
+    assert entries[1]["response"]["status"] == 200
+
+    client = Client(schema, session=ReplaySession(path))
+    data = client.request("query-params", b=2, a=1)
+    assert data == {"query": {"a": "1", "b": "2"}}
+    data = client.request("body-param", body={"example": 123})
+    assert data == {"body": {"example": 123}}
+
+
+def test_record_redirects(tmpdir):
+    path = os.path.join(tmpdir, "requests.har")
+    session = RecordingSession(path, TestClient(app))
+    client = Client(schema, session=session)
+    assert client.request("redirect") == {"query": {"a": "1"}}
+    session.har_writer.close()
+
+    with open(path) as har_file:
+        entries = json.load(har_file)["log"]["entries"]
+    assert [entry["request"]["url"] for entry in entries] == [
+        "http://testserver/redirect/",
+        "http://testserver/query-params/?a=1",
+    ]
+    assert entries[0]["response"]["status"] == 307
+    assert entries[0]["response"]["redirectURL"] == "/query-params/?a=1"
+
+    client = Client(schema, session=ReplaySession(path))
+    assert client.request("redirect") == {"query": {"a": "1"}}
+
+
+def test_close_writers(tmpdir):
+    paths = [os.path.join(tmpdir, "%d.har" % index) for index in range(2)]
+    sessions = [RecordingSession(path, TestClient(app)) for path in paths]
+    Client(schema, session=sessions[0]).request("query-params", a=1)
+    close_writers()
+    assert all(session.har_writer.closed for session in sessions)
+    for path in paths:
+        with open(path) as har_file:
+            json.load(har_file)
+
+
+def test_truncation_and_sampling(tmpdir):
+    path = os.path.join(tmpdir, "requests.har")
+    session = RecordingSession(path, TestClient(app), max_body_size=5)
+    client = Client(schema, session=session)
+    client.request("query-params", a=1)
+    session.har_writer.close()
+
+    with open(path) as har_file:
+        entries = json.load(har_file)["log"]["entries"]
+    assert entries[0]["response"]["content"]["text"] == '{"que'
+    assert entries[0]["response"]["content"]["comment"] == "truncated"
+
+    session = RecordingSession(path, TestClient(app), sample_rate=0.0)
+    client = Client(schema, session=session)
+    client.request("query-params", a=1)
+    session.har_writer.close()
+
+    with open(path) as har_file:
+        entries = json.load(har_file)["log"]["entries"]
+    assert entries == []
+
+
+def recorded_headers(path):
+    with open(path) as har_file:
+        entry = json.load(har_file)["log"]["entries"][0]
+    request_headers = {
+        header["name"].lower(): header["value"]
+        for header in entry["request"]["headers"]
+    }
+    response_headers = {
+        header["name"].lower(): header["value"]
+        for header in entry["response"]["headers"]
+    }
+    return request_headers, response_headers
+
+
+def test_redacted_headers(tmpdir):
+    path = os.path.join(tmpdir, "requests.har")
+    session = RecordingSession(path, TestClient(app))
+    assert session.har_writer.queue.maxsize == 1000
+    client = Client(schema, session=session, auth=TokenAuthentication("xxx"))
+    client.request("login")
+    session.har_writer.close()
+
+    request_headers, response_headers = recorded_headers(path)
+    assert request_headers["authorization"] == "[REDACTED]"
+    assert response_headers["set-cookie"] == "[REDACTED]"
+    assert request_headers["accept-encoding"] != "[REDACTED]"
+
+    session = RecordingSession(path, TestClient(app), redact_headers=())
+    client = Client(schema, session=session, auth=TokenAuthentication("xxx"))
+    client.request("login")
+    session.har_writer.close()
+
+    request_headers, response_headers = recorded_headers(path)
+    assert request_headers["authorization"] == "Bearer xxx"
+    assert response_headers["set-cookie"].startswith("session=secret-session")
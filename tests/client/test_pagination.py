@@ -0,0 +1,95 @@
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from apistar.client import Client
+
+ITEMS = list(range(25))
+PAGE_SIZE = 10
+
+app = Starlette()
+
+
+@app.route("/link-header")
+def link_header(request):
+    offset = int(request.query_params.get("offset", 0))
+    headers = {}
+    if offset + PAGE_SIZE < len(ITEMS):
+        next_url = "/link-header?offset=%d" % (offset + PAGE_SIZE)
+        headers["Link"] = '<%s>; rel="next"' % next_url
+    return JSONResponse(ITEMS[offset : offset + PAGE_SIZE], headers=headers)
+
+
+@app.route("/cursor")
+def cursor(request):
+    offset = int(request.query_params.get("cursor", 0))
+    next_cursor = None
+    if offset + PAGE_SIZE < len(ITEMS):
+        next_cursor = str(offset + PAGE_SIZE)
+    return JSONResponse(
+        {"results": ITEMS[offset : offset + PAGE_SIZE], "next": next_cursor}
+    )
+
+
+@app.route("/offset")
+def offset(request):
+    offset = int(request.query_params.get("offset", 0))
+    return JSONResponse({"results": ITEMS[offset : offset + PAGE_SIZE]})
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver"}],
+    "paths": {
+        "/link-header": {"get": {"operationId": "link-header"}},
+        "/cursor": {
+            "get": {
+                "operationId": "cursor",
+                "x-pagination": {
+                    "items": "results",
+                    "cursor": {"param": "cursor", "field": "next"},
+                },
+            }
+        },
+        "/offset": {
+            "get": {
+                "operationId": "offset",
+                "parameters": [{"name": "offset", "in": "query"}],
+                "x-pagination": {"items": "results", "offset": {"param": "offset"}},
+            }
+        },
+    },
+}
+
+
+def test_paginate_link_header():
+    client = Client(schema, session=TestClient(app))
+    assert list(client.paginate("link-header")) == ITEMS
+
+
+def test_paginate_cursor():
+    client = Client(schema, session=TestClient(app))
+    assert list(client.paginate("cursor")) == ITEMS
+
+
+def test_paginate_offset():
+    client = Client(schema, session=TestClient(app))
+    assert list(client.paginate("offset")) == ITEMS
+    assert list(client.paginate("offset", offset=20)) == ITEMS[20:]
+
+
+def test_paginate_without_prefetch():
+    client = Client(schema, session=TestClient(app))
+    paginator = client.paginate("cursor")
+    paginator.prefetch = False
+    assert list(paginator) == ITEMS
+
+
+def test_paginate_timing():
+    timings = []
+    client = Client(schema, session=TestClient(app), listeners=[timings.append])
+    assert list(client.paginate("cursor")) == ITEMS
+    assert [timing.operation_id for timing in timings] == ["cursor"] * 3
+    assert [timing.status_code for timing in timings] == [200] * 3
+    assert list(timings[0].phases.keys()) == ["encode", "ttfb", "download", "decode"]
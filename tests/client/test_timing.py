@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from apistar import exceptions
+from apistar.client import Client
+from apistar.client.timing import TimingAggregator
+
+app = Starlette()
+
+
+@app.route("/homepage")
+def homepage(request):
+    return JSONResponse({"hello": "world"})
+
+
+@app.route("/error")
+def error(request):
+    return JSONResponse({"error": "something failed"}, status_code=400)
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver"}],
+    "paths": {
+        "/homepage": {"get": {"operationId": "homepage"}},
+        "/error": {"get": {"operationId": "error"}},
+    },
+}
+
+
+def test_request_timing():
+    timings = []
+    client = Client(schema, session=TestClient(app), listeners=[timings.append])
+    data = client.request("homepage")
+
+    assert data == {"hello": "world"}
+    assert len(timings) == 1
+    timing = timings[0]
+    assert timing.operation_id == "homepage"
+    assert timing.method == "GET"
+    assert timing.status_code == 200
+    assert list(timing.phases.keys()) == [
+        "lookup",
+        "validate",
+        "url",
+        "encode",
+        "ttfb",
+        "download",
+        "decode",
+    ]
+    assert timing.total >= sum(timing.phases.values())
+
+
+def test_error_response_timing():
+    timings = []
+    client = Client(schema, session=TestClient(app), listeners=[timings.append])
+    with pytest.raises(exceptions.ErrorResponse):
+        client.request("error")
+    assert timings[0].status_code == 400
+
+
+def test_failing_listener(caplog):
+    def failing_listener(timing):
+        raise RuntimeError("listener failed")
+
+    timings = []
+    client = Client(
+        schema,
+        session=TestClient(app),
+        listeners=[failing_listener, timings.append],
+    )
+    assert client.request("homepage") == {"hello": "world"}
+    with pytest.raises(exceptions.ErrorResponse):
+        client.request("error")
+    assert [timing.status_code for timing in timings] == [200, 400]
+    assert "Request timing listener" in caplog.text
+
+
+def test_aggregator():
+    aggregator = TimingAggregator()
+    client = Client(schema, session=TestClient(app))
+    client.add_listener(aggregator)
+    client.request("homepage")
+    client.request("homepage")
+    with pytest.raises(exceptions.ErrorResponse):
+        client.request("error")
+
+    data = json.loads(aggregator.to_json())
+    homepage = data["operations"]["homepage"]
+    assert homepage["count"] == 2
+    assert homepage["buckets"]["+Inf"] == 2
+    assert homepage["statuses"] == {"200": 2}
+    assert homepage["phases"]["ttfb"]["count"] == 2
+    assert data["operations"]["error"]["statuses"] == {"400": 1}
+
+    text = aggregator.to_prometheus()
+    assert "# TYPE apistar_client_request_duration_seconds histogram" in text
+    assert (
+        'apistar_client_request_duration_seconds_bucket{operation="homepage",method="GET",le="+Inf"} 2'
+        in text
+    )
+    assert (
+        'apistar_client_requests_total{operation="error",method="GET",status="400"} 1'
+        in text
+    )
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmpdir, monkeypatch):
+    # Keep the CLI's on-disk schema cache out of the user's cache directory.
+    cache_dir = tmpdir.mkdir("cache")
+    monkeypatch.setenv("APISTAR_CACHE_DIR", str(cache_dir))
+    return str(cache_dir)
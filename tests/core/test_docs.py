@@ -1,4 +1,17 @@
+import os
+
+import jinja2
+import pytest
+
 import apistar
+import apistar.core
+from apistar.core import (
+    THEME_CHOICES,
+    LinkView,
+    docs_pages,
+    get_environment,
+    prewarm,
+)
 
 
 def test_docs():
@@ -13,3 +26,110 @@ def test_docs_with_static_url_func():
     index_html = apistar.docs(schema, static_url=lambda x: "/" + x)
     assert "<title>API Star</title>" in index_html
     assert 'href="/css/base.css"' in index_html
+
+
+SECTIONED_SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "", "version": ""},
+    "paths": {
+        "/users/": {"get": {"operationId": "list_users", "tags": ["users"]}},
+        "/pets/": {"get": {"operationId": "list_pets", "tags": ["pet store"]}},
+        "/health/": {"get": {"operationId": "health"}},
+    },
+}
+
+
+def test_docs_pages():
+    pages = docs_pages(SECTIONED_SCHEMA)
+    assert sorted(pages) == [
+        "index.html",
+        "section-pet_store.html",
+        "section-users.html",
+    ]
+
+    index_html = pages["index.html"]
+    assert 'id="health"' in index_html
+    assert 'id="users-list_users"' not in index_html
+    assert 'href="section-users.html#users"' in index_html
+
+    users_html = pages["section-users.html"]
+    assert 'id="users-list_users"' in users_html
+    assert 'id="health"' not in users_html
+    assert 'id="pet_store-list_pets"' not in users_html
+    assert 'href="index.html#health"' in users_html
+
+
+def test_docs_pages_single_page_theme():
+    pages = docs_pages(SECTIONED_SCHEMA, theme="redoc")
+    assert list(pages) == ["index.html"]
+
+
+def test_parallel_render_matches_serial():
+    schema = {
+        "openapi": "3.0.0",
+        "info": {"title": "", "version": ""},
+        "paths": {
+            "/users/{id}/": {
+                "get": {
+                    "operationId": "get_user",
+                    "tags": ["users"],
+                    "parameters": [
+                        {"name": "id", "in": "path", "required": True, "schema": {}}
+                    ],
+                },
+                "delete": {"operationId": "delete_user", "tags": ["users"]},
+            },
+            **SECTIONED_SCHEMA["paths"],
+        },
+    }
+    assert apistar.docs(schema, jobs=2) == apistar.docs(schema)
+    assert docs_pages(schema, jobs=2) == docs_pages(schema)
+
+
+def test_docs_code_style():
+    pytest.importorskip("pygments")
+    html = apistar.docs(SECTIONED_SCHEMA, code_style="default")
+    assert '<span class="kn">import</span>' in html
+    assert ".highlight" in html
+    assert apistar.docs(SECTIONED_SCHEMA, code_style="default", jobs=2) == html
+
+
+def test_link_views_are_memoized(monkeypatch):
+    calls = []
+    init = LinkView.__init__
+
+    def record(self, link):
+        calls.append(link.name)
+        init(self, link)
+
+    monkeypatch.setattr(LinkView, "__init__", record)
+    apistar.docs(SECTIONED_SCHEMA)
+    assert sorted(calls) == ["health", "list_pets", "list_users"]
+
+
+def test_environment_is_cached():
+    env = get_environment("apistar")
+    assert get_environment("apistar") is env
+    assert get_environment("redoc") is not env
+
+
+def test_prewarm(monkeypatch):
+    prewarm()
+
+    def compile(*args, **kwargs):
+        raise AssertionError("Template compiled after prewarm.")
+
+    monkeypatch.setattr(jinja2.Environment, "compile", compile)
+    for title in ("First API", "Second API"):
+        info = {"title": title, "version": ""}
+        schema = {"openapi": "3.0.0", "info": info, "paths": {}}
+        assert title in apistar.docs(schema, theme="apistar")
+        for theme in THEME_CHOICES:
+            apistar.docs(schema, theme=theme, schema_url="/schema.json")
+
+
+def test_bytecode_cache(monkeypatch, cache_dir):
+    monkeypatch.setattr(apistar.core, "_environments", {})
+    prewarm(["apistar"])
+    templates = get_environment("apistar").list_templates()
+    assert len(os.listdir(os.path.join(cache_dir, "templates"))) == len(templates)
@@ -0,0 +1,124 @@
+import apistar
+from apistar.schemas.normalize import normalize, schema_key
+
+PET = {
+    "type": "object",
+    "properties": {"name": {"type": "string"}, "tag": {"type": "string"}},
+    "required": ["name"],
+}
+PET_REORDERED = {
+    "required": ["name"],
+    "properties": {"tag": {"type": "string"}, "name": {"type": "string"}},
+    "type": "object",
+}
+ERROR = {"type": "object", "properties": {"message": {"type": "string"}}}
+
+
+def json_content(schema):
+    return {"application/json": {"schema": schema}}
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1.0"},
+    "paths": {
+        "/pets/": {
+            "get": {
+                "operationId": "list_pets",
+                "responses": {
+                    "200": {
+                        "description": "OK",
+                        "content": json_content({"type": "array", "items": PET}),
+                    },
+                    "default": {"description": "Error", "content": json_content(ERROR)},
+                },
+            },
+            "post": {
+                "operationId": "create_pet",
+                "requestBody": {"content": json_content(PET_REORDERED)},
+                "responses": {
+                    "201": {"description": "Created", "content": json_content(PET)}
+                },
+            },
+        }
+    },
+    "components": {"schemas": {"Error": ERROR}},
+}
+
+
+def test_schema_key():
+    assert schema_key(PET) == schema_key(PET_REORDERED)
+    assert schema_key(PET) != schema_key(ERROR)
+
+
+def test_loader_shares_identical_schemas():
+    document = apistar.validate(schema)
+    _, create_pet = document.get_links()
+    body = create_pet.get_body_field()
+    assert body.name == "body"
+    assert create_pet.response.schema is body.schema
+
+
+def test_normalize():
+    normalized, added = normalize(schema)
+    assert added == ["list_pets_response_item"]
+    assert normalized["components"]["schemas"] == {
+        "Error": ERROR,
+        "list_pets_response_item": PET_REORDERED,
+    }
+
+    ref = {"$ref": "#/components/schemas/list_pets_response_item"}
+    operations = normalized["paths"]["/pets/"]
+    responses = operations["get"]["responses"]
+    assert responses["200"]["content"] == json_content({"type": "array", "items": ref})
+    assert responses["default"]["content"] == json_content(
+        {"$ref": "#/components/schemas/Error"}
+    )
+    assert operations["post"]["requestBody"] == {
+        "content": json_content(ref),
+        "x-name": "body",
+    }
+    assert operations["post"]["responses"]["201"]["content"] == json_content(ref)
+
+    # The original schema is unchanged, and the normalized schema loads the
+    # same links.
+    assert schema["paths"]["/pets/"]["post"]["requestBody"] == {
+        "content": json_content(PET_REORDERED)
+    }
+    document = apistar.validate(normalized)
+    _, create_pet = document.get_links()
+    assert create_pet.get_body_field().name == "body"
+    assert create_pet.response.schema is create_pet.get_body_field().schema
+
+
+def test_normalize_swagger():
+    swagger = {
+        "swagger": "2.0",
+        "info": {"title": "Pets", "version": "1.0"},
+        "paths": {
+            "/pets/": {
+                "get": {
+                    "operationId": "list_pets",
+                    "responses": {"200": {"description": "OK", "schema": PET}},
+                },
+                "post": {
+                    "operationId": "create_pet",
+                    "parameters": [
+                        {"name": "pet", "in": "body", "schema": PET_REORDERED}
+                    ],
+                    "responses": {"201": {"description": "Created"}},
+                },
+            }
+        },
+    }
+    normalized, added = normalize(swagger)
+    assert added == ["list_pets_response"]
+    assert normalized["definitions"] == {"list_pets_response": PET}
+    parameter = normalized["paths"]["/pets/"]["post"]["parameters"][0]
+    assert parameter["schema"] == {"$ref": "#/definitions/list_pets_response"}
+
+
+def test_normalize_unchanged():
+    normalized, added = normalize({"openapi": "3.0.0", "paths": {}})
+    assert added == []
+    assert normalized == {"openapi": "3.0.0", "paths": {}}
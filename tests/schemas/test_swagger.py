@@ -3,6 +3,7 @@ import os
 import pytest
 
 import apistar
+import typesystem
 
 filenames = [
     "testcases/swagger/api-with-examples.yaml",
@@ -24,3 +25,30 @@ def test_openapi(filename):
     path, extension = os.path.splitext(filename)
     encoding = {".json": "json", ".yaml": "yaml"}[extension]
     apistar.validate(content, format="swagger", encoding=encoding)
+
+
+def test_definition_refs():
+    pet = {"type": "object", "properties": {"name": {"type": "string"}}}
+    ref = {"$ref": "#/definitions/Pet"}
+    document = apistar.validate(
+        {
+            "swagger": "2.0",
+            "info": {"title": "", "version": ""},
+            "paths": {
+                "/pets/": {
+                    "post": {
+                        "operationId": "create_pet",
+                        "parameters": [{"name": "pet", "in": "body", "schema": ref}],
+                        "responses": {"201": {"description": "", "schema": ref}},
+                    }
+                }
+            },
+            "definitions": {"Pet": pet},
+        },
+        format="swagger",
+    )
+    link = document.get_links()[0]
+    body = link.get_body_field()
+    assert isinstance(body.schema, typesystem.Object)
+    assert isinstance(body.schema.properties["name"], typesystem.String)
+    assert link.response.schema is link.get_body_field().schema
@@ -0,0 +1,77 @@
+import gzip
+import os
+
+from apistar.assets import (
+    build_static,
+    fingerprint_name,
+    minify_html,
+    rewrite_references,
+)
+from apistar.server import FINGERPRINTED
+
+
+def test_fingerprint_name():
+    name = fingerprint_name("css/base.css", b"body {}")
+    assert name.startswith("css/base.") and name.endswith(".css")
+    assert FINGERPRINTED.search(name)
+    assert fingerprint_name("css/base.css", b"body {}") == name
+    assert fingerprint_name("css/base.css", b"div {}") != name
+
+
+def test_rewrite_references():
+    manifest = {
+        "fonts/icons.woff": "fonts/icons.0123456789ab.woff",
+        "css/base.css.map": "css/base.css.0123456789ab.map",
+    }
+    content = (
+        b"@font-face { src: url('../fonts/icons.woff?v=1'); }\n"
+        b"a { background: url(data:image/png;base64,AAAA); }\n"
+        b"b { background: url(../img/missing.png); }\n"
+        b"/*# sourceMappingURL=base.css.map*/"
+    )
+    assert rewrite_references("css/base.css", content, manifest) == (
+        b"@font-face { src: url('../fonts/icons.0123456789ab.woff?v=1'); }\n"
+        b"a { background: url(data:image/png;base64,AAAA); }\n"
+        b"b { background: url(../img/missing.png); }\n"
+        b"/*# sourceMappingURL=base.css.0123456789ab.map*/"
+    )
+
+
+def test_minify_html():
+    html = (
+        "<html>\n  <body>\n    <!-- A comment -->\n"
+        "    <pre>line 1\n  line 2</pre>\n"
+        "    <script>var a = 1;\n  var b = 2;</script>\n  </body>\n</html>\n"
+    )
+    assert minify_html(html) == (
+        "<html> <body> <pre>line 1\n  line 2</pre> "
+        "<script>var a = 1;\n  var b = 2;</script> </body> </html>"
+    )
+
+
+def test_build_static(tmpdir):
+    static_dir = os.path.join(tmpdir, "static")
+    output_dir = os.path.join(tmpdir, "build")
+    os.makedirs(os.path.join(static_dir, "css"))
+    os.makedirs(os.path.join(static_dir, "img"))
+    with open(os.path.join(static_dir, "css", "base.css"), "w") as css_file:
+        css_file.write("body { background: url(../img/grid.png); }\n" * 20)
+    with open(os.path.join(static_dir, "img", "grid.png"), "wb") as image_file:
+        image_file.write(b"\x89PNG")
+
+    manifest, written = build_static(static_dir, output_dir)
+    assert sorted(manifest) == ["css/base.css", "img/grid.png"]
+    assert len(written) == 2
+
+    css_path = os.path.join(output_dir, *manifest["css/base.css"].split("/"))
+    with open(css_path, "rb") as css_file:
+        content = css_file.read()
+    image_name = os.path.basename(manifest["img/grid.png"])
+    assert b"url(../img/%s)" % image_name.encode() in content
+    with open(css_path + ".gz", "rb") as gz_file:
+        assert gzip.decompress(gz_file.read()) == content
+
+    # Images are not compressed, and an unchanged rebuild writes nothing.
+    image_path = os.path.join(output_dir, *manifest["img/grid.png"].split("/"))
+    assert not os.path.exists(image_path + ".gz")
+    assert build_static(static_dir, output_dir) == (manifest, [])
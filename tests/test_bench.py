@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from apistar.bench import parse_duration, percentile, run_benchmark
+from apistar.cli import cli
+from apistar.client import Client
+
+app = Starlette()
+
+
+@app.route("/ok/")
+def ok(request):
+    return JSONResponse({"ok": True})
+
+
+@app.route("/error/")
+def error(request):
+    return JSONResponse({"error": True}, status_code=503)
+
+
+@app.route("/crash/")
+def crash(request):
+    raise RuntimeError("Crashed.")
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver"}],
+    "paths": {
+        "/ok/": {"get": {"operationId": "ok"}},
+        "/error/": {"get": {"operationId": "error"}},
+        "/crash/": {"get": {"operationId": "crash"}},
+    },
+}
+
+
+def test_parse_duration():
+    assert parse_duration("30s") == 30.0
+    assert parse_duration("2m") == 120.0
+    assert parse_duration("500ms") == 0.5
+    assert parse_duration("1.5") == 1.5
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 99.9) == 100
+    assert percentile([], 50) is None
+
+
+def test_closed_loop():
+    client = Client(schema, session=TestClient(app))
+    result = run_benchmark(client, "ok", concurrency=2, duration=0.2)
+    data = result.as_dict()
+    assert data["requests"] > 0
+    assert data["errors"] == 0
+    assert data["latency"]["min"] <= data["latency"]["p50"] <= data["latency"]["max"]
+
+
+def test_open_loop_errors():
+    client = Client(schema, session=TestClient(app))
+    result = run_benchmark(client, "error", concurrency=2, duration=0.5, rate=20)
+    data = result.as_dict()
+    assert 0 < data["requests"] <= 10
+    assert data["errors"] == data["requests"]
+    assert data["error_types"] == {"503": data["requests"]}
+
+
+def test_worker_failure():
+    client = Client(schema, session=TestClient(app))
+    with pytest.raises(RuntimeError):
+        run_benchmark(client, "crash", concurrency=2, duration=0.2)
+
+
+def test_bench_command(tmpdir):
+    schema_path = os.path.join(tmpdir, "schema.json")
+    output_path = os.path.join(tmpdir, "results.json")
+    with open(schema_path, "w") as schema_file:
+        schema_file.write(json.dumps(schema))
+
+    runner = CliRunner()
+    cmd = ["bench", "--path", schema_path, "ok", "--duration", "200ms"]
+    cmd += ["--output", output_path]
+    result = runner.invoke(cli, cmd, obj=TestClient(app))
+    assert result.exit_code == 0
+    assert result.output.endswith("✓ Benchmark completed.\n")
+
+    with open(output_path) as output_file:
+        data = json.load(output_file)
+    assert data["operation"] == "ok"
+    assert data["requests"] > 0
+
+    cmd = ["bench", "--path", schema_path, "error", "--duration", "100ms"]
+    result = runner.invoke(cli, cmd, obj=TestClient(app))
+    assert result.exit_code == 1
+    assert "  503: " in result.output
+
+    cmd = ["bench", "--path", schema_path, "missing", "--duration", "100ms"]
+    result = runner.invoke(cli, cmd, obj=TestClient(app))
+    assert result.exit_code == 1
+    assert 'Operation ID "missing" not found in schema.' in result.output
+
+    cmd = ["bench", "--path", schema_path, "ok", "--concurrency", "0"]
+    result = runner.invoke(cli, cmd, obj=TestClient(app))
+    assert result.exit_code == 2
+    assert "--concurrency" in result.output
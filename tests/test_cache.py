@@ -0,0 +1,137 @@
+import json
+import os
+
+import pytest
+
+import apistar.core
+from apistar import Document
+from apistar import compat
+from apistar.cache import clear_cache, highlight, load_document
+
+import typesystem
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "paths": {"/": {"get": {"operationId": "home"}}},
+}
+
+
+@pytest.fixture
+def schema_path(tmpdir):
+    path = os.path.join(tmpdir, "schema.json")
+    with open(path, "w") as schema_file:
+        schema_file.write(json.dumps(schema))
+    return path
+
+
+@pytest.fixture
+def validate_calls(monkeypatch):
+    calls = []
+    validate = apistar.core.validate
+
+    def counting_validate(*args, **kwargs):
+        calls.append(args)
+        return validate(*args, **kwargs)
+
+    monkeypatch.setattr(apistar.core, "validate", counting_validate)
+    return calls
+
+
+def test_cache_hit(schema_path, validate_calls, cache_dir):
+    document = load_document(schema_path, format="openapi", encoding="json")
+    assert isinstance(document, Document)
+    assert document.title == "Test API"
+    assert len(validate_calls) == 1
+    assert len(os.listdir(os.path.join(cache_dir, "schemas"))) == 1
+
+    document = load_document(schema_path, format="openapi", encoding="json")
+    assert document.title == "Test API"
+    assert [link.name for link in document.walk_links()] == ["home"]
+    assert len(validate_calls) == 1
+
+
+def test_cache_touched_file(schema_path, validate_calls):
+    load_document(schema_path)
+    stat = os.stat(schema_path)
+    os.utime(schema_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load_document(schema_path)
+    assert len(validate_calls) == 1
+
+
+def test_cache_modified_file(schema_path, validate_calls):
+    load_document(schema_path)
+    info = {"title": "New", "version": "2.0"}
+    with open(schema_path, "w") as schema_file:
+        schema_file.write(json.dumps(dict(schema, info=info)))
+    document = load_document(schema_path)
+    assert document.title == "New"
+    assert len(validate_calls) == 2
+
+
+def test_cache_invalid_schema(schema_path, validate_calls, cache_dir):
+    with open(schema_path, "w") as schema_file:
+        schema_file.write("{")
+    with pytest.raises(typesystem.ParseError):
+        load_document(schema_path, encoding="json")
+    assert not os.listdir(os.path.join(cache_dir))
+
+
+def test_cache_corrupt_entry(schema_path, validate_calls, cache_dir):
+    load_document(schema_path)
+    entries = os.path.join(cache_dir, "schemas")
+    for name in os.listdir(entries):
+        with open(os.path.join(entries, name), "wb") as entry_file:
+            entry_file.write(b"corrupt")
+    assert load_document(schema_path).title == "Test API"
+    assert len(validate_calls) == 2
+
+    clear_cache()
+    assert not os.listdir(entries)
+
+
+def test_cache_disabled(schema_path, validate_calls, monkeypatch, cache_dir):
+    monkeypatch.setenv("APISTAR_NO_CACHE", "1")
+    load_document(schema_path)
+    load_document(schema_path)
+    assert len(validate_calls) == 2
+    assert not os.listdir(cache_dir)
+
+
+def test_cache_referenced_file(tmpdir, validate_calls):
+    schema_path = os.path.join(tmpdir, "schema.json")
+    info_path = os.path.join(tmpdir, "info.json")
+    with open(schema_path, "w") as schema_file:
+        schema_file.write(json.dumps(dict(schema, info={"$ref": "info.json"})))
+    with open(info_path, "w") as info_file:
+        info_file.write(json.dumps({"title": "Test API", "version": "1.0"}))
+
+    assert load_document(schema_path).title == "Test API"
+    assert load_document(schema_path).title == "Test API"
+    assert len(validate_calls) == 1
+
+    # Changing a referenced file invalidates the cache entry.
+    with open(info_path, "w") as info_file:
+        info_file.write(json.dumps({"title": "New", "version": "2.0"}))
+    assert load_document(schema_path).title == "New"
+    assert len(validate_calls) == 2
+
+
+def test_highlight_cache(monkeypatch, cache_dir):
+    pytest.importorskip("pygments")
+    clear_cache()
+    html = highlight("import requests\n", "python", "default")
+    assert '<span class="kn">import</span>' in html
+    assert len(os.listdir(os.path.join(cache_dir, "highlight"))) == 1
+
+    # Highlighted samples are memoized, and persist across processes.
+    def pygments_highlight(text, lang, style):
+        raise AssertionError("Sample highlighted again.")
+
+    monkeypatch.setattr(compat, "pygments_highlight", pygments_highlight)
+    assert highlight("import requests\n", "python", "default") == html
+    highlight.cache_clear()
+    assert highlight("import requests\n", "python", "default") == html
+
+    clear_cache()
+    assert not os.listdir(os.path.join(cache_dir, "highlight"))
@@ -1,12 +1,15 @@
 import json
 import os
 
+import pytest
 from click.testing import CliRunner
 from starlette.applications import Starlette
 from starlette.responses import JSONResponse
 from starlette.testclient import TestClient
 
-from apistar.cli import cli
+import apistar
+from apistar.cli import _copy_file, _copy_tree, _watch_docs, cli
+from apistar.exceptions import CompiledDocumentError
 
 
 def test_valid_document(tmpdir):
@@ -40,6 +43,79 @@ def test_invalid_document(tmpdir):
     )
 
 
+def write_schemas(tmpdir):
+    os.makedirs(os.path.join(tmpdir, "specs", "nested"))
+    valid = {"openapi": "3.0.0", "info": {"title": "", "version": ""}, "paths": {}}
+    invalid = {"openapi": "3.0.0", "info": {"version": ""}}
+    for name, content in [
+        ("specs/a.json", json.dumps(valid)),
+        ("specs/b.json", json.dumps(invalid)),
+        ("specs/nested/c.yaml", "openapi: 3.0.0\ninfo: {title: C, version: ''}\n"),
+        ("specs/nested/d.yaml", "swagger: '2.0'\ninfo: {title: D, version: ''}\n"),
+        ("specs/notes.txt", "Not a schema."),
+        ("specs/apistar.yml", "schema:\n  path: a.json\n  format: openapi\n"),
+        ("specs/nested/ci.yaml", "jobs:\n  test: {runs-on: linux}\n"),
+        ("specs/package.json", json.dumps({"name": "specs"})),
+    ]:
+        if name.endswith(".yaml"):
+            content += "paths: {}\n"
+        with open(os.path.join(tmpdir, *name.split("/")), "w") as schema_file:
+            schema_file.write(content)
+    return os.path.join(tmpdir, "specs")
+
+
+def test_validate_many(tmpdir):
+    specs = write_schemas(tmpdir)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["validate", specs, "--jobs", "2"])
+    assert result.exit_code == 1
+    path = os.path.join(specs, "b.json")
+    assert result.output == (
+        "✘ %s: Invalid schema.\n"
+        "  * The field 'paths' is required. (At line 1, column 1.)\n"
+        "  * The field 'title' is required. (At ['info'], line 1, column 30.)\n"
+        "✘ 1 of 4 schema files invalid.\n" % path
+    )
+
+    pattern = os.path.join(specs, "**", "*.yaml")
+    result = runner.invoke(cli, ["validate", pattern, "--jobs", "1"])
+    assert result.exit_code == 0
+    assert result.output == "✓ All 2 schema files valid.\n"
+
+    result = runner.invoke(cli, ["validate", os.path.join(specs, "a.json"), "-v"])
+    assert result.exit_code == 0
+    assert result.output.endswith("✓ All 1 schema files valid.\n")
+
+
+def test_validate_many_reports(tmpdir):
+    specs = write_schemas(tmpdir)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["validate", specs, "--report", "json"])
+    assert result.exit_code == 1
+    data = json.loads(result.output)
+    assert data["files"] == 4
+    assert data["invalid"] == 1
+    assert [os.path.basename(item["path"]) for item in data["results"]] == [
+        "a.json",
+        "b.json",
+        "c.yaml",
+        "d.yaml",
+    ]
+    assert data["results"][1]["errors"][0]["code"] == "required"
+
+    output = os.path.join(tmpdir, "report.xml")
+    args = ["validate", specs, "--report", "junit", "--output", output]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 1
+    assert result.output == "✘ 1 of 4 schema files invalid.\n"
+    with open(output) as report_file:
+        report = report_file.read()
+    assert report.startswith('<testsuite name="apistar validate" tests="4"')
+    assert report.count("<failure ") == 1
+
+
 def test_invalid_document_verbose(tmpdir):
     schema = os.path.join(tmpdir, "schema.json")
     with open(schema, "w") as schema_file:
@@ -59,6 +135,176 @@ def test_invalid_document_verbose(tmpdir):
     )
 
 
+def test_bundle(tmpdir):
+    schema = os.path.join(tmpdir, "schema.yaml")
+    output = os.path.join(tmpdir, "bundled.json")
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            "openapi: 3.0.0\n"
+            "info: {title: Bundled, version: ''}\n"
+            "paths:\n"
+            "  /users/: {$ref: 'users.yaml'}\n"
+        )
+    with open(os.path.join(tmpdir, "users.yaml"), "w") as schema_file:
+        schema_file.write(
+            "get:\n"
+            "  operationId: list_users\n"
+            "  responses:\n"
+            "    '200':\n"
+            "      description: OK\n"
+            "      content:\n"
+            "        application/json:\n"
+            "          schema: {$ref: 'user.json'}\n"
+        )
+    with open(os.path.join(tmpdir, "user.json"), "w") as schema_file:
+        schema_file.write(json.dumps({"type": "object"}))
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["validate", "--path", schema, "--format", "openapi"])
+    assert result.exit_code == 0
+    assert result.output == "✓ Valid OpenAPI schema.\n"
+
+    result = runner.invoke(cli, ["bundle", "--path", schema, "--output", output])
+    assert result.exit_code == 0
+    assert result.output == '✓ Bundled schema written to "%s".\n' % output
+    with open(output) as output_file:
+        bundled = json.load(output_file)
+    assert bundled["components"]["schemas"] == {"user": {"type": "object"}}
+    operation = bundled["paths"]["/users/"]["get"]
+    assert operation["operationId"] == "list_users"
+
+    os.unlink(os.path.join(tmpdir, "user.json"))
+    result = runner.invoke(cli, ["bundle", "--path", schema, "--format", "openapi"])
+    assert result.exit_code != 0
+    users = os.path.relpath(os.path.join(tmpdir, "users.yaml"))
+    assert result.output == (
+        "* Could not read file for $ref 'user.json'. (In '%s'.) "
+        "(At ['paths', '/users/'], line 4, column 12.)\n"
+        "✘ Invalid OpenAPI schema.\n" % users
+    )
+
+
+def test_normalize(tmpdir):
+    schema = os.path.join(tmpdir, "schema.json")
+    output = os.path.join(tmpdir, "normalized.yaml")
+    pet = {"type": "object", "properties": {"name": {"type": "string"}}}
+    content = {"application/json": {"schema": pet}}
+    operation = {"responses": {"200": {"description": "OK", "content": content}}}
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            json.dumps(
+                {
+                    "openapi": "3.0.0",
+                    "info": {"title": "", "version": ""},
+                    "paths": {
+                        "/pets/": {"get": dict(operation, operationId="list_pets")},
+                        "/pets/{id}": {"get": dict(operation, operationId="get_pet")},
+                    },
+                }
+            )
+        )
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["normalize", "--path", schema, "--output", output])
+    assert result.exit_code == 0
+    assert result.output == '✓ Normalized schema written to "%s".\n' % output
+
+    with open(output) as output_file:
+        normalized = apistar.validate(output_file.read(), encoding="yaml")
+    list_pets, get_pet = normalized.get_links()
+    assert list_pets.response.schema is get_pet.response.schema
+
+
+def test_diff(tmpdir):
+    old = os.path.join(tmpdir, "old.json")
+    new = os.path.join(tmpdir, "new.json")
+    schema = {
+        "openapi": "3.0.0",
+        "info": {"title": "", "version": ""},
+        "paths": {"/pets/": {"get": {"operationId": "list_pets"}}},
+    }
+    with open(old, "w") as schema_file:
+        schema_file.write(json.dumps(schema))
+    schema["paths"]["/pets/"] = {"post": {"operationId": "create_pet"}}
+    with open(new, "w") as schema_file:
+        schema_file.write(json.dumps(schema))
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["diff", old, old])
+    assert result.exit_code == 0
+    assert result.output == "✓ No changes.\n"
+
+    result = runner.invoke(cli, ["diff", old, new, "--fail-on-breaking"])
+    assert result.exit_code == 1
+    assert result.output == (
+        "- GET /pets/: Operation removed. (breaking)\n"
+        "+ POST /pets/: Operation added.\n"
+        "✘ 2 changes, 1 breaking.\n"
+    )
+
+    result = runner.invoke(cli, ["diff", new, old, "--report", "json"])
+    assert result.exit_code == 0
+    assert [change["location"] for change in json.loads(result.output)] == [
+        "GET /pets/",
+        "POST /pets/",
+    ]
+
+
+def test_compile(tmpdir):
+    schema = os.path.join(tmpdir, "schema.json")
+    content = json.dumps(
+        {
+            "openapi": "3.0.0",
+            "info": {"title": "Compiled", "version": ""},
+            "paths": {"/": {"get": {"operationId": "home"}}},
+        }
+    )
+    with open(schema, "w") as schema_file:
+        schema_file.write(content)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["compile", "--path", schema])
+    assert result.exit_code == 0
+    output = os.path.join(tmpdir, "schema.apistar")
+    assert result.output == '✓ Compiled document written to "%s".\n' % output
+
+    document = apistar.Document.load_compiled(output, schema=content)
+    assert document.title == "Compiled"
+    assert [link.name for link in document.get_links()] == ["home"]
+
+    # The compiled document is up to date with the parsed schema.
+    document = apistar.Document.load_compiled(output, schema=json.loads(content))
+    assert document.title == "Compiled"
+
+
+def test_compile_multi_file_schema(tmpdir):
+    schema = os.path.join(tmpdir, "schema.yaml")
+    content = (
+        "openapi: 3.0.0\n"
+        "info: {title: Compiled, version: ''}\n"
+        "paths:\n"
+        "  /pets/: {$ref: 'pets.yaml'}\n"
+    )
+    with open(schema, "w") as schema_file:
+        schema_file.write(content)
+    pets = os.path.join(tmpdir, "pets.yaml")
+    with open(pets, "w") as pets_file:
+        pets_file.write("get:\n  operationId: list_pets\n")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["compile", "--path", schema])
+    assert result.exit_code == 0
+    output = os.path.join(tmpdir, "schema.apistar")
+    document = apistar.Document.load_compiled(output, schema=content)
+    assert [link.name for link in document.get_links()] == ["list_pets"]
+
+    # Changes to the files that the schema refers to are detected.
+    with open(pets, "w") as pets_file:
+        pets_file.write("get:\n  operationId: get_pets\n")
+    with pytest.raises(CompiledDocumentError):
+        apistar.Document.load_compiled(output, schema=content)
+
+
 def test_docs(tmpdir):
     schema = os.path.join(tmpdir, "schema.json")
     output_dir = os.path.join(tmpdir, "build")
@@ -79,6 +325,224 @@ def test_docs(tmpdir):
     assert result.output == '✓ Documentation built at "%s".\n' % output_index
 
 
+def test_docs_multi_file_schema(tmpdir):
+    schema = os.path.join(tmpdir, "schema.yaml")
+    output_dir = os.path.join(tmpdir, "build")
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            "openapi: 3.0.0\n"
+            "info: {title: Pets, version: ''}\n"
+            "paths:\n"
+            "  /pets/: {$ref: 'pets.yaml'}\n"
+        )
+    with open(os.path.join(tmpdir, "pets.yaml"), "w") as schema_file:
+        schema_file.write("get:\n  operationId: list_pets\n")
+
+    runner = CliRunner()
+    args = ["docs", "--path", schema, "--format", "openapi", "--output-dir", output_dir]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    with open(os.path.join(output_dir, "index.html")) as index_file:
+        assert "list_pets" in index_file.read()
+    with open(os.path.join(output_dir, "schema.yaml")) as bundled_file:
+        assert "operationId: list_pets" in bundled_file.read()
+    assert os.path.exists(os.path.join(output_dir, "search-index.json"))
+
+
+def test_docs_split_pages(tmpdir):
+    schema = os.path.join(tmpdir, "schema.json")
+    output_dir = os.path.join(tmpdir, "build")
+    paths = {
+        "/users/": {"get": {"operationId": "list_users", "tags": ["users"]}},
+        "/pets/": {"get": {"operationId": "list_pets", "tags": ["pets"]}},
+    }
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            json.dumps(
+                {
+                    "openapi": "3.0.0",
+                    "info": {"title": "", "version": ""},
+                    "paths": paths,
+                }
+            )
+        )
+
+    runner = CliRunner()
+    args = ["docs", "--path", schema, "--format", "openapi"]
+    args += ["--output-dir", output_dir, "--split-pages"]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    assert os.path.exists(os.path.join(output_dir, "index.html"))
+    assert os.path.exists(os.path.join(output_dir, "section-users.html"))
+    assert os.path.exists(os.path.join(output_dir, "section-pets.html"))
+    with open(os.path.join(output_dir, "search-index.json")) as search_file:
+        index = json.load(search_file)
+    assert [entry[1] for entry in index["entries"]] == [
+        "section-users.html#users-list_users",
+        "section-pets.html#pets-list_pets",
+    ]
+
+    # Pages for sections that have been removed are cleaned up.
+    del paths["/pets/"]
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            json.dumps(
+                {
+                    "openapi": "3.0.0",
+                    "info": {"title": "", "version": ""},
+                    "paths": paths,
+                }
+            )
+        )
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    assert os.path.exists(os.path.join(output_dir, "section-users.html"))
+    assert not os.path.exists(os.path.join(output_dir, "section-pets.html"))
+
+
+def test_watch_docs_rebuild(tmpdir, monkeypatch):
+    import apistar.server
+    import apistar.watch
+
+    schema = os.path.join(tmpdir, "schema.json")
+    output_dir = os.path.join(tmpdir, "build")
+    os.makedirs(output_dir)
+    content = {
+        "openapi": "3.0.0",
+        "info": {"title": "", "version": ""},
+        "servers": [{"url": "http://testserver"}],
+        "paths": {},
+    }
+    with open(schema, "w") as schema_file:
+        schema_file.write(json.dumps(content))
+
+    class Watcher:
+        changes = 0
+
+        def wait(self):
+            # Change the schema once, and then stop watching.
+            if self.changes:
+                raise KeyboardInterrupt()
+            self.changes += 1
+            content["paths"] = {"/users/": {"get": {"operationId": "list_users"}}}
+            with open(schema, "w") as schema_file:
+                schema_file.write(json.dumps(content))
+
+        def close(self):
+            pass
+
+    make_server = apistar.server.make_server
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(apistar.watch, "get_watcher", lambda paths: Watcher())
+    monkeypatch.setattr(
+        apistar.server, "make_server", lambda app, **kwargs: make_server(app, port=0)
+    )
+    options = {
+        "schema": {"path": schema, "format": "openapi", "encoding": None},
+        "docs": {"output_dir": output_dir, "theme": None},
+    }
+    _watch_docs(options, output_dir, code_style="default")
+
+    with open(os.path.join(output_dir, "index.html")) as index_file:
+        html = index_file.read()
+    assert "list_users" in html
+    assert '<span class="kn">' in html
+
+
+def test_docs_optimize(tmpdir):
+    schema = os.path.join(tmpdir, "schema.json")
+    output_dir = os.path.join(tmpdir, "build")
+    output_index = os.path.join(output_dir, "index.html")
+    with open(schema, "w") as schema_file:
+        schema_file.write(
+            json.dumps(
+                {"openapi": "3.0.0", "info": {"title": "", "version": ""}, "paths": {}}
+            )
+        )
+
+    runner = CliRunner()
+    args = ["docs", "--path", schema, "--format", "openapi"]
+    args += ["--output-dir", output_dir]
+    result = runner.invoke(cli, args + ["--optimize"])
+    assert result.exit_code == 0
+    with open(output_index) as index_file:
+        index_html = index_file.read()
+    assert "\n" not in index_html
+    assert 'href="/css/base.css"' not in index_html
+    assert os.path.exists(output_index + ".gz")
+    assert not os.path.exists(os.path.join(output_dir, "css", "base.css"))
+
+    # A normal build removes the compressed page, which would be out of date.
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    assert not os.path.exists(output_index + ".gz")
+
+
+def test_copy_tree_incremental(tmpdir, capsys):
+    src = os.path.join(tmpdir, "src")
+    dst = os.path.join(tmpdir, "dst")
+    os.makedirs(os.path.join(src, "css"))
+    for name, content in [("app.js", "app();"), ("css/base.css", "body {}")]:
+        with open(os.path.join(src, name), "w") as src_file:
+            src_file.write(content)
+
+    _copy_tree(src, dst, verbose=True)
+    copied = capsys.readouterr().out.splitlines()
+    assert sorted(copied) == [
+        os.path.join(dst, "app.js"),
+        os.path.join(dst, "css", "base.css"),
+    ]
+
+    # Nothing to do if nothing has changed, or only the mtime has changed.
+    os.utime(os.path.join(src, "app.js"), ns=(0, 10 ** 9))
+    _copy_tree(src, dst, verbose=True, jobs=4)
+    assert capsys.readouterr().out == ""
+
+    # Modified files in the destination are replaced.
+    with open(os.path.join(dst, "css", "base.css"), "w") as dst_file:
+        dst_file.write("body { color: red; }")
+    _copy_tree(src, dst, verbose=True, jobs=4)
+    expected = [os.path.join(dst, "css", "base.css")]
+    assert capsys.readouterr().out.splitlines() == expected
+    with open(os.path.join(dst, "css", "base.css")) as dst_file:
+        assert dst_file.read() == "body {}"
+
+
+def test_copy_tree_hardlink(tmpdir):
+    src = os.path.join(tmpdir, "src")
+    dst = os.path.join(tmpdir, "dst")
+    os.makedirs(src)
+    with open(os.path.join(src, "app.js"), "w") as src_file:
+        src_file.write("app();")
+
+    _copy_tree(src, dst, link="hardlink")
+    src_stat = os.stat(os.path.join(src, "app.js"))
+    dst_stat = os.stat(os.path.join(dst, "app.js"))
+    assert src_stat.st_ino == dst_stat.st_ino
+
+    # Hardlinks are kept by a later hardlinked build, but are replaced by a
+    # copy otherwise, so that editing the output can't edit the source.
+    _copy_tree(src, dst, link="hardlink")
+    dst_stat = os.stat(os.path.join(dst, "app.js"))
+    assert src_stat.st_ino == dst_stat.st_ino
+    _copy_tree(src, dst)
+    dst_stat = os.stat(os.path.join(dst, "app.js"))
+    assert src_stat.st_ino != dst_stat.st_ino
+
+    # Copying replaces the link rather than writing into the linked file.
+    os.unlink(os.path.join(dst, "app.js"))
+    _copy_tree(src, dst, link="hardlink")
+    assert os.stat(os.path.join(dst, "app.js")).st_ino == src_stat.st_ino
+    _copy_file(os.path.join(src, "app.js"), os.path.join(dst, "app.js"))
+    dst_stat = os.stat(os.path.join(dst, "app.js"))
+    assert src_stat.st_ino != dst_stat.st_ino
+
+    # Reflinks fall back to copying where the filesystem does not support them.
+    _copy_tree(src, os.path.join(tmpdir, "reflinked"), link="reflink")
+    with open(os.path.join(tmpdir, "reflinked", "app.js")) as dst_file:
+        assert dst_file.read() == "app();"
+
+
 app = Starlette()
 
 
@@ -0,0 +1,192 @@
+import json
+import os
+import types
+
+import pytest
+from click.testing import CliRunner
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+import apistar
+from apistar import exceptions
+from apistar.cli import cli
+from apistar.codegen import generate
+
+app = Starlette()
+
+
+@app.route("/path-param/{value}")
+def path_param(request):
+    return JSONResponse({"value": request.path_params["value"]})
+
+
+@app.route("/query-params/")
+def query_params(request):
+    return JSONResponse({"query": dict(request.query_params)})
+
+
+@app.route("/collisions/{quote}/")
+def collisions(request):
+    return JSONResponse(
+        {"quote": request.path_params["quote"], "query": dict(request.query_params)}
+    )
+
+
+@app.route("/body-param/", methods=["POST"])
+async def body_param(request):
+    data = await request.json()
+    return JSONResponse({"body": dict(data)})
+
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver"}],
+    "paths": {
+        "/path-param/{value}": {
+            "get": {
+                "operationId": "path-param",
+                "summary": "Return the path parameter.",
+                "parameters": [{"name": "value", "in": "path", "required": True}],
+            }
+        },
+        "/query-params/": {
+            "get": {
+                "operationId": "query-params",
+                "parameters": [
+                    {"name": "a", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "b-c", "in": "query"},
+                ],
+            }
+        },
+        "/collisions/{quote}/": {
+            "get": {
+                "operationId": "collisions",
+                "parameters": [
+                    {"name": "quote", "in": "path", "required": True},
+                    {"name": "url", "in": "query"},
+                    {"name": "self", "in": "query"},
+                    {"name": "page-size", "in": "query"},
+                    {"name": "page_size", "in": "query"},
+                ],
+            }
+        },
+        "/body-param/": {
+            "post": {
+                "operationId": "body-param",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Value"}
+                        }
+                    }
+                },
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Value": {"type": "object", "properties": {"example": {"type": "integer"}}}
+        }
+    },
+}
+
+
+def load_module(source):
+    module = types.ModuleType("generated")
+    exec(compile(source, "generated.py", "exec"), module.__dict__)
+    return module
+
+
+def test_generated_client():
+    source = generate(apistar.validate(schema))
+    client = load_module(source).Client(session=TestClient(app))
+
+    assert client.path_param(value=123) == {"value": "123"}
+    assert client.query_params(a=1, b_c=2) == {"query": {"a": "1", "b-c": "2"}}
+    assert client.query_params() == {"query": {}}
+    assert client.body_param(value={"example": 123}) == {"body": {"example": 123}}
+    assert client.path_param.__doc__.strip() == "Return the path parameter."
+
+
+def test_generated_request():
+    source = generate(apistar.validate(schema))
+    client = load_module(source).Client(session=TestClient(app))
+
+    assert client.request("query-params", **{"b-c": 2}) == {"query": {"b-c": "2"}}
+    with pytest.raises(exceptions.ClientError):
+        client.request("missing")
+    with pytest.raises(exceptions.ClientError):
+        client.body_param(value=None)
+
+
+def test_generated_argument_names():
+    source = generate(apistar.validate(schema))
+    client = load_module(source).Client(session=TestClient(app))
+
+    result = client.collisions(quote_="a b", url="x", self_="y", page_size="1")
+    query = {"url": "x", "self": "y", "page-size": "1"}
+    assert result == {"quote": "a b", "query": query}
+    result = client.collisions(quote_="a", page_size_="2")
+    assert result == {"quote": "a", "query": {"page_size": "2"}}
+    params = {"quote": "a", "url": "x", "self": "y", "page_size": "3"}
+    result = client.request("collisions", **params)
+    query = {"url": "x", "self": "y", "page_size": "3"}
+    assert result == {"quote": "a", "query": query}
+
+
+def test_generated_client_without_servers():
+    urls = []
+
+    class Session(TestClient):
+        def request(self, method, url, **kwargs):
+            urls.append(url)
+            return super().request(method, url, **kwargs)
+
+    document = apistar.validate(dict(schema, servers=[]))
+    module = load_module(generate(document))
+    client = module.Client(base_url="http://example.com/", session=Session(app))
+    assert client.path_param(value=123) == {"value": "123"}
+    assert urls == ["http://example.com/path-param/123"]
+
+
+def test_generated_method_names():
+    parameters = [{"name": "value", "in": "path", "required": True}]
+    operation_ids = ["transport", "base_url", "__init__", "__x"]
+    paths = {
+        "/path-param/%d{value}" % index: {
+            "get": {"operationId": operation_id, "parameters": parameters}
+        }
+        for index, operation_id in enumerate(operation_ids)
+    }
+    document = apistar.validate(dict(schema, paths=paths))
+    module = load_module(generate(document))
+    client = module.Client(session=TestClient(app))
+    assert sorted(module.Client.operations.values()) == [
+        ("_init__", {}),
+        ("_x", {}),
+        ("base_url_", {}),
+        ("transport_", {}),
+    ]
+    assert client.request("transport", value="a") == {"value": "0a"}
+    assert client.base_url_(value="b") == {"value": "1b"}
+    assert client.request("__init__", value="c") == {"value": "2c"}
+    assert client.request("__x", value="d") == {"value": "3d"}
+
+
+def test_codegen_command(tmpdir):
+    schema_path = os.path.join(tmpdir, "schema.json")
+    output_path = os.path.join(tmpdir, "client.py")
+    with open(schema_path, "w") as schema_file:
+        schema_file.write(json.dumps(schema))
+
+    runner = CliRunner()
+    cmd = ["codegen", "--path", schema_path, "--output", output_path]
+    result = runner.invoke(cli, cmd)
+    assert result.exit_code == 0
+    assert result.output == '✓ Client module written to "%s".\n' % output_path
+
+    with open(output_path) as output_file:
+        module = load_module(output_file.read())
+    assert module.Client().base_url == "http://testserver"
@@ -0,0 +1,202 @@
+import copy
+
+from apistar.diff import Change, diff, merkle_hash
+
+PET = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": {"type": "string"},
+        "tag": {"type": "string"},
+        "status": {"type": "string", "enum": ["available", "sold"]},
+    },
+}
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1"},
+    "paths": {
+        "/pets/": {
+            "get": {
+                "operationId": "list_pets",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}}
+                ],
+                "responses": {"200": {"description": "OK"}},
+            },
+            "post": {
+                "operationId": "create_pet",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Pet"}
+                        }
+                    }
+                },
+            },
+        },
+        "/pets/{id}/": {"delete": {"operationId": "delete_pet"}},
+    },
+    "components": {"schemas": {"Pet": PET, "Old": {"type": "string"}}},
+}
+
+
+def test_merkle_hash():
+    hashes = {}
+    reordered = {"properties": PET["properties"], "required": ["name"]}
+    reordered["type"] = "object"
+    assert merkle_hash(PET, hashes) == merkle_hash(reordered, {})
+    assert hashes[id(PET["properties"]["name"])] == merkle_hash({"type": "string"}, {})
+    assert merkle_hash({"type": "string"}, {}) != merkle_hash({"type": "number"}, {})
+    assert merkle_hash([1, 2], {}) != merkle_hash([2, 1], {})
+
+
+def test_no_changes():
+    assert diff(schema, copy.deepcopy(schema)) == []
+
+
+def test_diff():
+    new = copy.deepcopy(schema)
+    operations = new["paths"]["/pets/"]
+    operations["get"]["parameters"][0]["required"] = True
+    operations["get"]["parameters"].append(
+        {"name": "offset", "in": "query", "schema": {"type": "integer"}}
+    )
+    operations["get"]["responses"]["404"] = {"description": "Not found"}
+    operations["post"]["requestBody"]["required"] = True
+    new["paths"]["/pets/{id}/"] = {"get": {"operationId": "get_pet"}}
+    pet = new["components"]["schemas"]["Pet"]
+    pet["required"].append("age")
+    pet["properties"]["age"] = {"type": "integer"}
+    pet["properties"]["name"]["description"] = "The name."
+    pet["properties"]["status"]["enum"].remove("sold")
+    del pet["properties"]["tag"]
+    del new["components"]["schemas"]["Old"]
+    new["components"]["schemas"]["New"] = {"type": "string"}
+
+    assert diff(schema, new) == [
+        Change(
+            "changed",
+            "GET /pets/",
+            "Parameter 'limit' (in query) is now required.",
+            True,
+        ),
+        Change("added", "GET /pets/", "Parameter 'offset' (in query) added.", False),
+        Change("added", "GET /pets/", "Response 404 added.", False),
+        Change("changed", "POST /pets/", "Request body is now required.", True),
+        Change("added", "GET /pets/{id}/", "Operation added.", False),
+        Change("removed", "DELETE /pets/{id}/", "Operation removed.", True),
+        Change(
+            "changed",
+            "Schema 'Pet'",
+            "Schema property 'name' changed (description).",
+            False,
+        ),
+        Change(
+            "changed",
+            "Schema 'Pet'",
+            "Schema property 'status' no longer allows \"sold\".",
+            True,
+        ),
+        Change(
+            "added", "Schema 'Pet'", "Schema property 'age' added as required.", True
+        ),
+        Change("removed", "Schema 'Pet'", "Schema property 'tag' removed.", True),
+        Change("added", "Schema 'New'", "Schema added.", False),
+        Change("removed", "Schema 'Old'", "Schema removed.", True),
+    ]
+
+
+def test_swagger_parameters():
+    old = {
+        "swagger": "2.0",
+        "info": {"title": "", "version": ""},
+        "paths": {
+            "/pets/": {
+                "get": {
+                    "parameters": [{"name": "limit", "in": "query", "type": "string"}]
+                }
+            }
+        },
+    }
+    new = copy.deepcopy(old)
+    new["paths"]["/pets/"]["get"]["parameters"][0]["type"] = "integer"
+    assert diff(old, new) == [
+        Change(
+            "changed",
+            "GET /pets/",
+            "Parameter 'limit' (in query) type changed from \"string\" to \"integer\".",
+            True,
+        )
+    ]
+
+
+def test_referenced_components():
+    old = {
+        "openapi": "3.0.0",
+        "info": {"title": "", "version": ""},
+        "paths": {
+            "/pets/": {
+                "get": {
+                    "operationId": "list_pets",
+                    "parameters": [{"$ref": "#/components/parameters/Limit"}],
+                    "responses": {"default": {"$ref": "#/components/responses/Error"}},
+                },
+                "post": {"operationId": "create_pet"},
+            }
+        },
+        "components": {
+            "parameters": {
+                "Limit": {"name": "limit", "in": "query", "schema": {"type": "integer"}}
+            },
+            "responses": {
+                "Error": {
+                    "description": "Error",
+                    "content": {"application/json": {"schema": {"type": "object"}}},
+                }
+            },
+        },
+    }
+    new = copy.deepcopy(old)
+    new["components"]["parameters"]["Limit"]["required"] = True
+    content = new["components"]["responses"]["Error"]["content"]
+    content["application/json"]["schema"]["type"] = "string"
+    assert diff(old, new) == [
+        Change(
+            "changed",
+            "GET /pets/",
+            "Parameter 'limit' (in query) is now required.",
+            True,
+        ),
+        Change(
+            "changed",
+            "GET /pets/",
+            "Response default (application/json) type changed from \"object\" to "
+            '"string".',
+            True,
+        ),
+    ]
+
+
+def test_swagger_referenced_parameters():
+    old = {
+        "swagger": "2.0",
+        "info": {"title": "", "version": ""},
+        "paths": {
+            "/pets/": {
+                "parameters": [{"$ref": "#/parameters/limit"}],
+                "get": {"responses": {}},
+            }
+        },
+        "parameters": {"limit": {"name": "limit", "in": "query", "type": "integer"}},
+    }
+    new = copy.deepcopy(old)
+    new["parameters"]["limit"]["required"] = True
+    assert diff(old, new) == [
+        Change(
+            "changed",
+            "GET /pets/",
+            "Parameter 'limit' (in query) is now required.",
+            True,
+        )
+    ]
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough to avoid flakiness on slow machines, while still catching
+# a regression back to eagerly importing the CLI, client and meta-schemas.
+IMPORT_TIME_BUDGET = 0.1
+
+
+def run_imports(statement):
+    """
+    Run a statement in a fresh interpreter with `-X importtime`, returning
+    the set of imported modules, and the cumulative import time in seconds
+    of each module imported with an `import` statement.
+    """
+    statement += "; import sys, json; print(json.dumps(list(sys.modules)))"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        cwd=ROOT_DIR,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000000.0
+    return set(json.loads(process.stdout)), times
+
+
+def test_import_apistar():
+    modules, times = run_imports("import apistar")
+    assert times["apistar"] < IMPORT_TIME_BUDGET
+    for module in ("click", "jinja2", "requests", "typesystem", "apistar.core"):
+        assert module not in modules
+
+
+def test_import_document():
+    modules, times = run_imports("import apistar.document")
+    for module in ("click", "jinja2", "requests", "apistar.client"):
+        assert module not in modules
+
+
+def test_import_client():
+    modules, times = run_imports("from apistar import Client")
+    for module in ("click", "apistar.cli", "apistar.core"):
+        assert module not in modules
+
+
+def test_meta_schemas_built_on_first_use():
+    schema = {"openapi": "3.0.0", "info": {"title": "", "version": ""}, "paths": {}}
+    modules, times = run_imports("import apistar; apistar.validate(%r)" % schema)
+    assert "apistar.schemas.openapi" in modules
+    assert "apistar.schemas.swagger" not in modules
+    assert "apistar.cli" not in modules
@@ -0,0 +1,153 @@
+import apistar
+from starlette.testclient import TestClient
+
+from apistar.client import Client
+from apistar.mock import MockApp, generate_value
+
+import typesystem
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "Test API", "version": "1.0"},
+    "servers": [{"url": "http://testserver/"}],
+    "paths": {
+        "/widgets/": {
+            "get": {
+                "operationId": "list-widgets",
+                "responses": {
+                    "200": {
+                        "description": "",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"$ref": "#/components/schemas/Widget"},
+                                }
+                            }
+                        },
+                    }
+                },
+            },
+            "post": {
+                "operationId": "create-widget",
+                "responses": {
+                    "201": {
+                        "description": "",
+                        "content": {
+                            "application/json": {"example": {"id": 1, "name": "cog"}}
+                        },
+                    }
+                },
+            },
+        },
+        "/widgets/{id}": {
+            "delete": {
+                "operationId": "delete-widget",
+                "responses": {"204": {"description": ""}},
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Widget": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer", "minimum": 10},
+                    "name": {"type": "string"},
+                    "kind": {"enum": ["cog", "wheel"]},
+                },
+            }
+        }
+    },
+}
+
+
+def test_mock_responses():
+    document = apistar.validate(schema)
+    session = TestClient(MockApp(document))
+    client = Client(schema, session=session)
+
+    assert client.request("list-widgets") == [{"id": 10, "name": "xxxxxx", "kind": "cog"}]
+    assert client.request("create-widget") == {"id": 1, "name": "cog"}
+    assert client.request("delete-widget", id=1) is None
+
+
+def test_mock_routing():
+    document = apistar.validate(schema)
+    session = TestClient(MockApp(document))
+
+    assert session.get("/widgets/").status_code == 200
+    assert session.post("/widgets/").status_code == 201
+    assert session.delete("/widgets/123").status_code == 204
+    assert session.get("/widgets/123").status_code == 405
+    assert session.get("/missing/").status_code == 404
+
+
+def test_mock_routing_fall_through():
+    document = apistar.validate(
+        {
+            "openapi": "3.0.0",
+            "info": {"title": "", "version": ""},
+            "paths": {
+                "/files/latest/": {"get": {"operationId": "latest"}},
+                "/files/{name}/": {"post": {"operationId": "upload"}},
+                "/files/{+path}": {"delete": {"operationId": "delete"}},
+            },
+        }
+    )
+    session = TestClient(MockApp(document))
+
+    assert session.get("/files/latest/").status_code == 200
+    assert session.post("/files/latest/").status_code == 200
+    assert session.delete("/files/latest/").status_code == 200
+    assert session.delete("/files/a/b/c").status_code == 200
+    assert session.put("/files/latest/").status_code == 405
+    assert session.get("/files/a/b/").status_code == 405
+    assert session.get("/other/a/b/").status_code == 404
+
+
+def test_mock_error_injection():
+    document = apistar.validate(schema)
+    session = TestClient(MockApp(document, error_rate=1.0, error_status=503))
+    response = session.get("/widgets/")
+    assert response.status_code == 503
+    assert response.json() == {"error": "Injected error."}
+
+
+def test_mock_unsupported_response_schema():
+    content = {"application/json": {"schema": {"type": "string", "pattern": "("}}}
+    document = apistar.validate(
+        {
+            "openapi": "3.0.0",
+            "info": {"title": "", "version": ""},
+            "paths": {
+                "/pattern/": {
+                    "get": {
+                        "operationId": "pattern",
+                        "responses": {"200": {"description": "", "content": content}},
+                    }
+                }
+            },
+        }
+    )
+    session = TestClient(MockApp(document))
+    response = session.get("/pattern/")
+    assert response.status_code == 200
+    assert response.json() is None
+
+
+def test_generate_value():
+    schema = typesystem.Object(
+        properties={
+            "a": typesystem.Integer(maximum=0),
+            "b": typesystem.Array(items=typesystem.Boolean(), min_items=2),
+            "c": typesystem.String(format="date"),
+            "d": typesystem.String(default="default"),
+        }
+    )
+    assert generate_value(schema) == {
+        "a": 0,
+        "b": [True, True],
+        "c": "2000-01-01",
+        "d": "default",
+    }
@@ -0,0 +1,79 @@
+import pytest
+
+import typesystem
+from apistar.positions import PositionIndex, parse, pointer, validate_with_positions
+
+CONTENT = """openapi: 3.0.0\r
+info:\r
+  title: "Pets\u2028"\r
+  version: ''\r
+paths:\r
+  /pets/:\r
+    get:\r
+      responses: {200: {description: OK}}\r
+"""
+CONSTANTS = ["NaN", "Infinity", "-Infinity"]
+
+
+def test_pointer():
+    assert pointer([]) == ""
+    assert pointer(["paths", "/pets/", "get", 0]) == "/paths/~1pets~1/get/0"
+    assert pointer(["a~b"]) == "/a~0b"
+
+
+def test_positions_match_tokens():
+    token = typesystem.tokenize_yaml(CONTENT)
+    index = PositionIndex(CONTENT, "yaml")
+    for keys in [[], ["info"], ["info", "title"], ["paths", "/pets/", "get"]]:
+        start, end = index.lookup(keys)
+        assert start == token.lookup(keys).start
+        assert end == token.lookup(keys).end
+    for char_index in range(len(CONTENT)):
+        position = index.position(char_index)
+        expected = typesystem.tokenize.tokens.ScalarToken(
+            None, char_index, char_index, CONTENT
+        ).start
+        assert position == expected
+
+
+def test_nearest():
+    index = PositionIndex(CONTENT, "yaml")
+    start, _ = index.nearest(["paths", "/pets/", "get", "responses", 200, "x"])
+    assert (start.line_no, start.column_no) == (9, 24)
+    with pytest.raises(KeyError):
+        index.lookup(["paths", "/users/"])
+
+
+def test_parse_errors():
+    assert parse('{"a": [1, 2]}', "json") == {"a": [1, 2]}
+    assert parse("a: [1, 2]", "yaml") == {"a": [1, 2]}
+    invalid = [('{"a": ', "json"), ("a: [", "yaml"), ("  ", "yaml")]
+    invalid += [('{"a": %s}' % constant, "json") for constant in CONSTANTS]
+    for content, encoding in invalid:
+        with pytest.raises(typesystem.ParseError) as exc_info:
+            parse(content, encoding)
+        tokenize = {"json": typesystem.tokenize_json, "yaml": typesystem.tokenize_yaml}
+        with pytest.raises(typesystem.ParseError) as expected_info:
+            tokenize[encoding](content)
+        assert exc_info.value.messages() == expected_info.value.messages()
+
+
+def test_validate_with_positions():
+    content = '{\n  "name": 1,\n  "tags": ["a", 2]\n}'
+    validator = typesystem.Object(
+        properties={
+            "name": typesystem.String(),
+            "tags": typesystem.Array(items=typesystem.String()),
+            "id": typesystem.Integer(),
+        },
+        required=["id"],
+    )
+    with pytest.raises(typesystem.ValidationError) as exc_info:
+        validate_with_positions(parse(content, "json"), content, "json", validator)
+    token = typesystem.tokenize_json(content)
+    messages = exc_info.value.messages()
+    assert [message.index for message in messages] == [["id"], ["name"], ["tags", 1]]
+    assert messages[0].start_position == token.start
+    assert messages[1].start_position == token.lookup(["name"]).start
+    assert messages[2].start_position == token.lookup(["tags", 1]).start
+    assert messages[2].end_position == token.lookup(["tags", 1]).end
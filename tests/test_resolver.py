@@ -0,0 +1,196 @@
+import os
+
+import pytest
+
+import apistar
+from apistar.resolver import Resolver, bundle, dumps, needs_bundle, validate
+
+import typesystem
+
+FILES = {
+    "openapi.yaml": """
+openapi: 3.0.0
+info:
+  title: Pets
+  version: '1.0'
+paths:
+  /pets/:
+    $ref: paths/pets.yaml
+components:
+  schemas:
+    Error:
+      type: object
+      properties:
+        message: {type: string}
+""",
+    "paths/pets.yaml": """
+get:
+  operationId: list_pets
+  parameters:
+    - $ref: '../common.yaml#/parameters/limit'
+  responses:
+    '200':
+      description: OK
+      content:
+        application/json:
+          schema:
+            type: array
+            items:
+              $ref: '../schemas/pet.yaml#/Pet'
+    default:
+      description: Error
+      content:
+        application/json:
+          schema:
+            $ref: '../openapi.yaml#/components/schemas/Error'
+post:
+  operationId: create_pet
+  requestBody:
+    content:
+      application/json:
+        schema:
+          $ref: '../schemas/pet.yaml#/Pet'
+""",
+    "common.yaml": """
+parameters:
+  limit:
+    name: limit
+    in: query
+    schema: {type: integer}
+""",
+    "schemas/pet.yaml": """
+Pet:
+  type: object
+  properties:
+    name: {type: string}
+    owner: {$ref: 'owner.yaml'}
+    parent: {$ref: '#/Pet'}
+""",
+    "schemas/owner.yaml": """
+type: object
+properties:
+  name: {type: string}
+  pets:
+    type: array
+    items: {$ref: 'pet.yaml#/Pet'}
+""",
+}
+
+
+@pytest.fixture
+def schema_dir(tmpdir):
+    for name, content in FILES.items():
+        path = os.path.join(tmpdir, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as schema_file:
+            schema_file.write(content)
+    return str(tmpdir)
+
+
+def test_needs_bundle():
+    assert not needs_bundle("openapi: 3.0.0")
+    assert not needs_bundle('{"$ref": "#/components/schemas/Pet"}')
+    assert not needs_bundle("$ref: '#/definitions/Pet'")
+    assert needs_bundle('{"$ref": "pet.json"}')
+    assert needs_bundle("$ref: '#/components/schemas/Pet/properties/name'")
+
+
+def test_bundle(schema_dir):
+    resolver = Resolver()
+    bundled = bundle(os.path.join(schema_dir, "openapi.yaml"), resolver=resolver)
+
+    assert len(resolver.files) == 5
+    operation = bundled["paths"]["/pets/"]["get"]
+    assert operation["parameters"] == [
+        {"name": "limit", "in": "query", "schema": {"type": "integer"}}
+    ]
+    content = operation["responses"]["200"]["content"]["application/json"]
+    assert content["schema"]["items"] == {"$ref": "#/components/schemas/Pet"}
+    content = operation["responses"]["default"]["content"]["application/json"]
+    assert content["schema"] == {"$ref": "#/components/schemas/Error"}
+
+    # Schemas from other files are added to the components, including
+    # recursive references.
+    schemas = bundled["components"]["schemas"]
+    assert list(schemas) == ["Error", "Pet", "owner"]
+    assert schemas["Pet"]["properties"]["parent"] == {
+        "$ref": "#/components/schemas/Pet"
+    }
+    assert schemas["Pet"]["properties"]["owner"] == {
+        "$ref": "#/components/schemas/owner"
+    }
+    assert schemas["owner"]["properties"]["pets"]["items"] == {
+        "$ref": "#/components/schemas/Pet"
+    }
+
+    document = apistar.validate(bundled)
+    assert [link.name for link in document.walk_links()] == [
+        "list_pets",
+        "create_pet",
+    ]
+    assert apistar.validate(dumps(bundled, encoding="yaml")).title == "Pets"
+
+
+def test_bundle_name_collision(schema_dir):
+    with open(os.path.join(schema_dir, "openapi.yaml"), "a") as schema_file:
+        schema_file.write("    Pet: {type: string}\n")
+
+    bundled = bundle(os.path.join(schema_dir, "openapi.yaml"))
+    schemas = bundled["components"]["schemas"]
+    assert schemas["Pet"] == {"type": "string"}
+    assert schemas["Pet_2"]["properties"]["parent"] == {
+        "$ref": "#/components/schemas/Pet_2"
+    }
+
+
+def test_missing_reference(schema_dir):
+    with open(os.path.join(schema_dir, "common.yaml"), "w") as schema_file:
+        schema_file.write("parameters: {}\n")
+
+    with pytest.raises(typesystem.ValidationError) as exc_info:
+        validate(os.path.join(schema_dir, "openapi.yaml"))
+
+    (message,) = exc_info.value.messages()
+    assert message.code == "invalid_ref"
+    assert message.text == (
+        "Could not resolve $ref '../common.yaml#/parameters/limit'. "
+        "(In '%s'.)" % os.path.relpath(os.path.join(schema_dir, "paths", "pets.yaml"))
+    )
+    # Reported against the reference in the root document.
+    assert message.index == ["paths", "/pets/"]
+    assert message.start_position.line_no == 8
+
+
+def test_circular_reference(tmpdir):
+    path = os.path.join(tmpdir, "openapi.yaml")
+    with open(path, "w") as schema_file:
+        schema_file.write(
+            "openapi: 3.0.0\n"
+            "info: {title: Loop, version: '1'}\n"
+            "paths:\n"
+            "  /a/: {$ref: '#/x-paths/a'}\n"
+            "x-paths:\n"
+            "  a: {$ref: '#/x-paths/b'}\n"
+            "  b: {$ref: '#/x-paths/a'}\n"
+        )
+
+    with pytest.raises(typesystem.ValidationError) as exc_info:
+        bundle(path)
+
+    (message,) = exc_info.value.messages()
+    assert message.code == "circular_ref"
+    assert message.index == ["paths", "/a/"]
+    assert message.start_position.line_no == 4
+
+
+def test_validation_error_positions(schema_dir):
+    with open(os.path.join(schema_dir, "paths", "pets.yaml"), "a") as schema_file:
+        schema_file.write("delete: {responses: 1}\n")
+
+    with pytest.raises(typesystem.ValidationError) as exc_info:
+        validate(os.path.join(schema_dir, "openapi.yaml"))
+
+    (message,) = exc_info.value.messages()
+    assert message.index == ["paths", "/pets/", "delete", "responses"]
+    # The nearest position in the root document.
+    assert message.start_position.line_no == 8
@@ -0,0 +1,71 @@
+import json
+
+import apistar
+from apistar.search import build_index, dumps, search, tokenize
+
+schema = {
+    "openapi": "3.0.0",
+    "info": {"title": "", "version": ""},
+    "paths": {
+        "/users/{user_id}/": {
+            "get": {
+                "operationId": "getUser",
+                "summary": "Retrieve a user",
+                "tags": ["users"],
+                "parameters": [
+                    {"name": "user_id", "in": "path", "required": True, "schema": {}}
+                ],
+            },
+            "put": {
+                "operationId": "updateUser",
+                "tags": ["users"],
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {"email_address": {"type": "string"}},
+                            }
+                        }
+                    }
+                },
+            },
+        },
+        "/health/": {
+            "get": {"operationId": "health", "description": "Check the service."}
+        },
+    },
+}
+
+
+def test_tokenize():
+    assert tokenize("getUser") == ["get", "user"]
+    assert tokenize("/users/{user_id}/") == ["users", "user", "id"]
+    assert tokenize("A v2 API") == ["v2", "api"]
+    assert tokenize(None) == []
+
+
+def test_build_index():
+    document = apistar.validate(schema)
+    index = build_index(document)
+    assert index["entries"] == [
+        ["health", "#health", "GET", "/health/"],
+        ["Retrieve a user", "#users-getUser", "GET", "/users/{user_id}/"],
+        ["updateUser", "#users-updateUser", "PUT", "/users/{user_id}/"],
+    ]
+    assert index["terms"] == sorted(index["terms"])
+    assert json.loads(dumps(index)) == index
+
+
+def test_search():
+    index = build_index(apistar.validate(schema))
+    assert [entry[0] for entry in search(index, "user")] == [
+        "Retrieve a user",
+        "updateUser",
+    ]
+    assert [entry[0] for entry in search(index, "retr")] == ["Retrieve a user"]
+    assert [entry[0] for entry in search(index, "email")] == ["updateUser"]
+    assert [entry[0] for entry in search(index, "put users")] == ["updateUser"]
+    assert [entry[0] for entry in search(index, "serv")] == ["health"]
+    assert search(index, "missing") == []
+    assert search(index, "") == []
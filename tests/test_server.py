@@ -0,0 +1,177 @@
+import gzip
+import json
+import os
+import threading
+import urllib.request
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+from starlette.testclient import TestClient
+
+from apistar.server import DocsApp, StaticFiles, make_server
+from apistar.watch import LIVE_RELOAD_URL, LiveReload
+
+schema = {"openapi": "3.0.0", "info": {"title": "Test API", "version": ""}, "paths": {}}
+
+
+def wsgi_get(app, path, method="GET", **headers):
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": method}
+    for key, value in headers.items():
+        environ["HTTP_" + key.upper()] = value
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = int(status.split()[0])
+        response["headers"] = dict(headers)
+
+    response["body"] = b"".join(app(environ, start_response))
+    return response
+
+
+@pytest.fixture
+def static_dir(tmpdir):
+    with open(os.path.join(tmpdir, "index.html"), "w") as index_file:
+        index_file.write("<p>Docs</p>")
+    os.mkdir(os.path.join(tmpdir, "js"))
+    with open(os.path.join(tmpdir, "js", "app.0123abcd.js"), "w") as js_file:
+        js_file.write("console.log('app');")
+    with open(os.path.join(tmpdir, "js", "app.0123abcd.js.gz"), "wb") as js_file:
+        js_file.write(gzip.compress(b"console.log('app');"))
+    return str(tmpdir)
+
+
+def test_static_files(static_dir):
+    app = StaticFiles(static_dir)
+
+    response = wsgi_get(app, "/")
+    assert response["status"] == 200
+    assert response["body"] == b"<p>Docs</p>"
+    assert response["headers"]["Content-Type"] == "text/html; charset=utf-8"
+    assert response["headers"]["Cache-Control"] == "no-cache"
+    etag = response["headers"]["ETag"]
+
+    response = wsgi_get(app, "/index.html", if_none_match=etag)
+    assert response["status"] == 304
+    assert response["body"] == b""
+
+    # A changed file replaces its cached ETag.
+    with open(os.path.join(static_dir, "index.html"), "w") as index_file:
+        index_file.write("<p>New docs</p>")
+    response = wsgi_get(app, "/index.html", if_none_match=etag)
+    assert response["status"] == 200
+    assert response["headers"]["ETag"] != etag
+    assert len(app.etags) == 1
+
+    response = wsgi_get(app, "/missing.css")
+    assert response["status"] == 404
+
+    response = wsgi_get(app, "/../" + os.path.basename(static_dir) + "/index.html")
+    assert response["status"] == 404
+
+    response = wsgi_get(app, "/", method="POST")
+    assert response["status"] == 405
+
+
+def test_static_files_etag_cache_size(static_dir, monkeypatch):
+    import apistar.server
+
+    monkeypatch.setattr(apistar.server, "MAX_ETAGS", 1)
+    app = StaticFiles(static_dir)
+    wsgi_get(app, "/")
+    wsgi_get(app, "/js/app.0123abcd.js")
+    assert list(app.etags) == [os.path.join(static_dir, "js", "app.0123abcd.js")]
+
+
+def test_static_files_fingerprinted_and_precompressed(static_dir):
+    app = StaticFiles(static_dir)
+
+    response = wsgi_get(app, "/js/app.0123abcd.js")
+    assert response["body"] == b"console.log('app');"
+    assert response["headers"]["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in response["headers"]
+
+    response = wsgi_get(app, "/js/app.0123abcd.js", accept_encoding="gzip, br;q=0")
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response["body"]) == b"console.log('app');"
+    assert response["headers"]["ETag"].endswith('-gzip"')
+
+    response = wsgi_get(app, "/js/app.0123abcd.js", method="HEAD")
+    assert response["status"] == 200
+    assert response["headers"]["Content-Length"] == "19"
+    assert response["body"] == b""
+
+
+def test_docs_app():
+    app = DocsApp(schema, schema_url="/schema.json", static_url="/static/")
+
+    response = wsgi_get(app, "/")
+    assert response["status"] == 200
+    assert b"Test API" in response["body"]
+    assert b'href="/static/css/base.css"' in response["body"]
+
+    response = wsgi_get(app, "/", accept_encoding="gzip")
+    assert b"Test API" in gzip.decompress(response["body"])
+
+    response = wsgi_get(app, "/schema.json")
+    assert response["headers"]["Content-Type"] == "application/json; charset=utf-8"
+    assert b'"openapi": "3.0.0"' in response["body"]
+
+    response = wsgi_get(app, "/static/css/base.css")
+    assert response["status"] == 200
+    assert response["headers"]["Content-Type"] == "text/css; charset=utf-8"
+
+    response = wsgi_get(app, "/search-index.json")
+    assert response["status"] == 200
+    assert json.loads(response["body"])["entries"] == []
+
+
+def test_docs_app_asgi():
+    app = DocsApp(schema, static_url="/static/")
+
+    async def asgi(scope, receive, send):
+        await app.asgi(scope, receive, send)
+
+    client = TestClient(asgi)
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "Test API" in response.text
+    etag = response.headers["etag"]
+    assert etag == app.pages["/"][3][:-1] + '-gzip"'
+
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/static/css/base.css")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+    app.load(dict(schema, info={"title": "New API", "version": ""}))
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "New API" in response.text
+
+
+def test_threaded_server_with_live_reload(static_dir):
+    live_reload = LiveReload()
+    server = make_server(StaticFiles(static_dir, live_reload=live_reload), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = "http://127.0.0.1:%d" % server.server_address[1]
+
+        # An open event stream does not block other requests.
+        events = urllib.request.urlopen(url + LIVE_RELOAD_URL, timeout=5)
+        assert events.readline() == b"retry: 1000\n"
+        assert events.readline() == b"\n"
+        with urllib.request.urlopen(url + "/", timeout=5) as response:
+            assert response.read() == b"<p>Docs</p>"
+
+        live_reload.notify()
+        assert events.readline() == b"event: reload\n"
+        events.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+from apistar.watch import (
+    LIVE_RELOAD_SCRIPT,
+    InotifyWatcher,
+    LiveReload,
+    PollingWatcher,
+    event_stream,
+    inject_live_reload,
+)
+
+
+def watcher_classes():
+    classes = [lambda paths: PollingWatcher(paths, interval=0.01)]
+    if sys.platform.startswith("linux"):
+        classes.append(InotifyWatcher)
+    return classes
+
+
+@pytest.mark.parametrize("watcher_class", watcher_classes())
+def test_watcher(tmpdir, watcher_class):
+    path = os.path.join(tmpdir, "schema.json")
+    other = os.path.join(tmpdir, "other.json")
+    with open(path, "w") as schema_file:
+        schema_file.write("{}")
+
+    watcher = watcher_class([path])
+    try:
+        assert watcher.wait(timeout=0.05) == set()
+
+        with open(other, "w") as other_file:
+            other_file.write("{}")
+        assert watcher.wait(timeout=0.05) == set()
+
+        with open(path, "w") as schema_file:
+            schema_file.write('{"openapi": "3.0.0"}')
+        assert watcher.wait(timeout=1.0) == {path}
+
+        # Replacing the file, as many editors do when saving.
+        os.replace(other, path)
+        assert watcher.wait(timeout=1.0) == {path}
+    finally:
+        watcher.close()
+
+
+def test_inject_live_reload():
+    html = "<html><body><p>Docs</p></body></html>"
+    assert inject_live_reload(html) == (
+        "<html><body><p>Docs</p>" + LIVE_RELOAD_SCRIPT + "</body></html>"
+    )
+    assert inject_live_reload("<p>Docs</p>") == "<p>Docs</p>" + LIVE_RELOAD_SCRIPT
+
+
+def test_event_stream():
+    live_reload = LiveReload()
+    stream = event_stream(live_reload, keepalive_interval=0.01)
+    assert next(stream) == b"retry: 1000\n\n"
+    assert next(stream) == b": keepalive\n\n"
+    live_reload.notify()
+    assert next(stream) == b"event: reload\ndata: {}\n\n"
+    assert next(stream) == b": keepalive\n\n"